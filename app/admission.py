@@ -0,0 +1,216 @@
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+
+from fastapi import HTTPException, status
+
+from app.config import settings
+from app.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Menor número = maior prioridade
+PRIORITY_API = 0  # /predict (X-API-Key)
+PRIORITY_UI = 1  # /ui/predict (anônimo)
+_PRIORITY_NAMES = {PRIORITY_API: "api", PRIORITY_UI: "ui"}
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, reason: str, retry_after_s: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after_s = retry_after_s
+
+
+class AdmissionController:
+    """
+    Limita o trabalho de inferência em voo e na fila.
+
+    Até max_in_flight requisições rodam ao mesmo tempo; as demais esperam numa
+    fila por prioridade (API antes de UI). Quando a espera estimada
+    (fila / max_in_flight * tempo médio de serviço) passa do orçamento de
+    latência, ou a fila está cheia, a requisição é recusada na hora, em vez de
+    ficar lenta até o timeout do Cloud Run.
+
+    UI usa só uma fração (ui_budget_factor) do orçamento e da fila: sob carga
+    ela é descartada primeiro. Roda inteiro no event loop (sem locks).
+
+    Cada requisição ocupa cost slots (um por texto: /predict/batch e cada lote
+    do /predict/stream pagam o tamanho do lote, limitado a max_in_flight), e o
+    tempo de serviço estimado é por slot.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int = 64,
+        max_queue: int = 256,
+        latency_budget_ms: float = 2000.0,
+        ui_budget_factor: float = 0.5,
+        initial_service_ms: float = 50.0,
+    ):
+        self.max_in_flight = max(1, int(max_in_flight))
+        self.max_queue = max(0, int(max_queue))
+        self.latency_budget_ms = max(0.0, float(latency_budget_ms))
+        self.ui_budget_factor = min(1.0, max(0.0, float(ui_budget_factor)))
+        self._service_ms = max(0.1, float(initial_service_ms))
+
+        self._in_flight = 0
+        self._waiters: dict[int, deque] = {PRIORITY_API: deque(), PRIORITY_UI: deque()}
+
+        self.admitted = {name: 0 for name in _PRIORITY_NAMES.values()}
+        self.shed = {name: 0 for name in _PRIORITY_NAMES.values()}
+        self.shed_reasons = {"queue_full": 0, "latency_budget": 0, "timeout": 0}
+
+    def _limits(self, priority: int) -> tuple[float, int]:
+        if priority == PRIORITY_API:
+            return self.latency_budget_ms, self.max_queue
+        return self.latency_budget_ms * self.ui_budget_factor, int(self.max_queue * self.ui_budget_factor)
+
+    def queue_depth(self) -> int:
+        return sum(len(q) for q in self._waiters.values())
+
+    def _cost(self, cost: int) -> int:
+        # lote maior que a capacidade ocupa todos os slots (senão nunca entraria)
+        return min(self.max_in_flight, max(1, int(cost)))
+
+    def estimated_wait_ms(self, priority: int, cost: int = 1) -> float:
+        # quem está na frente: mesma prioridade ou maior
+        ahead = sum(c for p, q in self._waiters.items() if p <= priority for _, c in q)
+        return (ahead + self._cost(cost)) * self._service_ms / self.max_in_flight
+
+    def _reject(self, priority: int, reason: str, wait_ms: float) -> AdmissionRejected:
+        self.shed[_PRIORITY_NAMES[priority]] += 1
+        self.shed_reasons[reason] += 1
+        return AdmissionRejected(reason, max(1, math.ceil(wait_ms / 1000.0)))
+
+    async def acquire(self, priority: int = PRIORITY_API, cost: int = 1) -> float:
+        """Espera por cost slots. Retorna o tempo de espera (ms) ou levanta AdmissionRejected."""
+        cost = self._cost(cost)
+        if self._in_flight + cost <= self.max_in_flight and not self.queue_depth():
+            self._in_flight += cost
+            self.admitted[_PRIORITY_NAMES[priority]] += 1
+            return 0.0
+
+        budget_ms, queue_limit = self._limits(priority)
+        estimated = self.estimated_wait_ms(priority, cost)
+        if self.queue_depth() >= queue_limit:
+            raise self._reject(priority, "queue_full", estimated)
+        if estimated > budget_ms:
+            raise self._reject(priority, "latency_budget", estimated)
+
+        fut = asyncio.get_running_loop().create_future()
+        entry = (fut, cost)
+        self._waiters[priority].append(entry)
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(fut, timeout=budget_ms / 1000.0)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if fut.done() and not fut.cancelled():
+                # os slots chegaram junto com o timeout/cancelamento: devolve
+                self._free(cost)
+            else:
+                try:
+                    self._waiters[priority].remove(entry)
+                except ValueError:
+                    pass
+                # quem estava atrás pode caber agora
+                self._grant()
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            raise self._reject(priority, "timeout", self.estimated_wait_ms(priority))
+
+        self.admitted[_PRIORITY_NAMES[priority]] += 1
+        return (time.perf_counter() - started) * 1000.0
+
+    def release(self, service_ms: float | None = None, cost: int = 1):
+        cost = self._cost(cost)
+        if service_ms is not None:
+            # média móvel exponencial do tempo de serviço por slot
+            self._service_ms = 0.8 * self._service_ms + 0.2 * max(0.1, service_ms / cost)
+        self._free(cost)
+
+    def _free(self, cost: int):
+        self._in_flight -= cost
+        self._grant()
+
+    def _grant(self):
+        # libera os primeiros da fila (API primeiro) enquanto couberem; sem
+        # furar a fila, para um lote grande não esperar para sempre
+        for priority in sorted(self._waiters):
+            queue = self._waiters[priority]
+            while queue:
+                fut, cost = queue[0]
+                if fut.done():
+                    queue.popleft()
+                    continue
+                if self._in_flight + cost > self.max_in_flight:
+                    return
+                queue.popleft()
+                self._in_flight += cost
+                fut.set_result(None)
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": self._in_flight,
+            "max_in_flight": self.max_in_flight,
+            "queue_depth": self.queue_depth(),
+            "queue_depth_api": len(self._waiters[PRIORITY_API]),
+            "queue_depth_ui": len(self._waiters[PRIORITY_UI]),
+            "max_queue": self.max_queue,
+            "latency_budget_ms": self.latency_budget_ms,
+            "service_ms_ewma": self._service_ms,
+            "estimated_wait_ms": self.estimated_wait_ms(PRIORITY_UI),
+            "admitted": dict(self.admitted),
+            "shed": dict(self.shed),
+            "shed_reasons": dict(self.shed_reasons),
+        }
+
+
+_controller: AdmissionController | None = None
+
+
+def get_admission() -> AdmissionController:
+    global _controller
+    if _controller is None:
+        _controller = AdmissionController(
+            max_in_flight=settings.admission_max_in_flight,
+            max_queue=settings.admission_max_queue,
+            latency_budget_ms=settings.admission_latency_budget_ms,
+            ui_budget_factor=settings.admission_ui_budget_factor,
+        )
+    return _controller
+
+
+def is_admission_enabled() -> bool:
+    return bool(settings.admission_enabled)
+
+
+@asynccontextmanager
+async def admit(priority: int = PRIORITY_API, cost: int = 1):
+    """Slots de inferência (cost = textos); sob sobrecarga responde 503 + Retry-After na hora."""
+    if not is_admission_enabled():
+        yield
+        return
+
+    controller = get_admission()
+    try:
+        await controller.acquire(priority, cost)
+    except AdmissionRejected as e:
+        logger.warning(f"Load shedding ({_PRIORITY_NAMES[priority]}): {e.reason}, retry_after={e.retry_after_s}s")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Serviço sobrecarregado, tente novamente",
+            headers={"Retry-After": str(e.retry_after_s)},
+        )
+
+    started = time.perf_counter()
+    service_ms = None
+    try:
+        yield
+        service_ms = (time.perf_counter() - started) * 1000.0
+    finally:
+        # só inferência concluída entra na média: 429 da quota ou erro rápido
+        # puxariam o tempo de serviço para baixo e o controller admitiria demais
+        controller.release(service_ms, cost)
@@ -0,0 +1,363 @@
+import queue
+import threading
+import time
+from concurrent.futures import Executor, Future
+from dataclasses import dataclass
+from functools import partial
+
+from app.config import settings
+from app.executor import get_inference_executor, inference_workers
+from app.logger import get_logger
+from app.metrics import batch_size as batch_size_histogram, observe_stage
+from app.process_pool import is_process_mode, run_in_pool
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class BatchResult:
+    label: str
+    score: float
+    queue_wait_ms: float
+    compute_time_ms: float
+    batch_size: int
+
+    @property
+    def inference_time_ms(self) -> float:
+        # Tempo total visto pelo cliente: espera na fila + forward pass
+        return self.queue_wait_ms + self.compute_time_ms
+
+
+def bucket_index(length: int, bounds: list[int]) -> int:
+    """Primeira faixa que comporta length tokens (a última recebe o que sobrar)."""
+    for i, bound in enumerate(bounds):
+        if length <= bound:
+            return i
+    return len(bounds) - 1
+
+
+class MicroBatcher:
+    """
+    Fila de textos na frente do pipeline.
+
+    Uma thread coleta itens até atingir max_batch_size ou até max_wait_ms
+    desde o primeiro item da fila, roda um único forward pass (com padding)
+    e resolve o Future de cada chamador.
+
+    Com bucket_bounds, a thread tokeniza os textos ao tirá-los da fila e
+    separa por faixa de tamanho (em tokens): cada faixa tem seu próprio batch
+    e prazo, então um tweet de 10 tokens nunca é preenchido até 512. Nesse
+    modo predict_fn recebe as features tokenizadas, e max_batch_tokens limita
+    batch * faixa (faixas longas saem com batches menores).
+
+    Com um executor, o forward pass roda nele (até max_concurrency batches
+    simultâneos); enquanto todos os slots estão ocupados a fila acumula e o
+    próximo batch sai maior.
+    """
+
+    def __init__(
+        self,
+        predict_fn=None,
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+        executor: Executor | None = None,
+        max_concurrency: int = 1,
+        bucket_bounds: list[int] | None = None,
+        max_batch_tokens: int | None = None,
+        tokenize_fn=None,
+    ):
+        self._predict_fn = predict_fn
+        self._tokenize_fn = tokenize_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait_s = max(0.0, float(max_wait_ms)) / 1000.0
+        self._executor = executor
+        self._slots = threading.Semaphore(max(1, int(max_concurrency)))
+
+        self.bucket_bounds = sorted({int(b) for b in bucket_bounds or [] if int(b) > 0})
+        self.max_batch_tokens = int(max_batch_tokens) if max_batch_tokens else None
+
+        self._queue: queue.Queue = queue.Queue()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+
+        self.batches_total = 0
+        self.items_total = 0
+        self.last_batch_size = 0
+        # modo por faixas: tokens reais vs. processados (com padding)
+        self.tokens_total = 0
+        self.padded_tokens_total = 0
+        self.bucket_batches = [0] * len(self.bucket_bounds)
+        self._pending = 0  # itens tokenizados esperando nas faixas
+
+    @property
+    def bucketing(self) -> bool:
+        return bool(self.bucket_bounds)
+
+    def _resolve_predict_fn(self):
+        if self._predict_fn is not None:
+            return self._predict_fn
+        # import tardio: permite monkeypatch de app.utils.predict_batch
+        from app import utils
+        fn = utils.predict_features if self.bucketing else utils.predict_batch
+        if is_process_mode():
+            # a thread do executor só despacha; o forward pass roda num processo do pool
+            return partial(run_in_pool, fn)
+        return fn
+
+    def _resolve_tokenize_fn(self):
+        if self._tokenize_fn is not None:
+            return self._tokenize_fn
+        from app import utils
+        return utils.tokenize
+
+    def bucket_capacity(self, index: int) -> int:
+        if not self.max_batch_tokens:
+            return self.max_batch_size
+        return max(1, min(self.max_batch_size, self.max_batch_tokens // self.bucket_bounds[index]))
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+                self._thread.start()
+
+    def submit(self, text: str) -> Future:
+        fut: Future = Future()
+        self._ensure_started()
+        self._queue.put((text, time.perf_counter(), fut))
+        return fut
+
+    def stop(self, timeout: float | None = 5.0):
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join(timeout=timeout)
+        self._thread = None
+
+    def stats(self) -> dict:
+        stats = {
+            "queue_depth": self._queue.qsize() + self._pending,
+            "batches_total": self.batches_total,
+            "items_total": self.items_total,
+            "last_batch_size": self.last_batch_size,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_s * 1000.0,
+            "bucketing": self.bucketing,
+        }
+        if self.bucketing:
+            with self._stats_lock:
+                stats.update(
+                    {
+                        "bucket_bounds": list(self.bucket_bounds),
+                        "bucket_batches": list(self.bucket_batches),
+                        "max_batch_tokens": self.max_batch_tokens,
+                        "tokens_total": self.tokens_total,
+                        "padded_tokens_total": self.padded_tokens_total,
+                        # fração do compute gasta em tokens reais (1.0 = sem padding)
+                        "padding_efficiency": (
+                            self.tokens_total / self.padded_tokens_total if self.padded_tokens_total else 1.0
+                        ),
+                    }
+                )
+        return stats
+
+    def _collect(self, first) -> tuple[list, bool]:
+        batch = [first]
+        deadline = first[1] + self.max_wait_s
+        stop = False
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                if remaining > 0:
+                    item = self._queue.get(timeout=remaining)
+                else:
+                    # prazo estourado: só pega o que já está na fila
+                    item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                stop = True
+                break
+            batch.append(item)
+
+        return batch, stop
+
+    def _run(self):
+        if self.bucketing:
+            self._run_bucketed()
+            return
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            if self._executor is None:
+                batch, stop = self._collect(first)
+                self._flush(batch)
+            else:
+                self._slots.acquire()
+                batch, stop = self._collect(first)
+                self._dispatch(batch)
+            if stop:
+                return
+
+    def _take(self, timeout: float | None) -> tuple[list, bool]:
+        """Espera o primeiro item (até timeout) e pega o que mais já estiver na fila."""
+        try:
+            if timeout is None:
+                first = self._queue.get()
+            elif timeout > 0:
+                first = self._queue.get(timeout=timeout)
+            else:
+                first = self._queue.get_nowait()
+        except queue.Empty:
+            return [], False
+        if first is None:
+            return [], True
+
+        items = [first]
+        while len(items) < self.max_batch_size:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                return items, True
+            items.append(item)
+        return items, False
+
+    def _tokenize(self, items: list) -> list:
+        if not items:
+            return []
+        texts = [text for text, _, _ in items]
+        started = time.perf_counter()
+        try:
+            features = self._resolve_tokenize_fn()(texts)
+        except Exception as e:
+            logger.error(f"Falha ao tokenizar (size={len(items)}): {e}", exc_info=True)
+            for _, _, fut in items:
+                if fut.set_running_or_notify_cancel():
+                    fut.set_exception(e)
+            return []
+        observe_stage("tokenize", time.perf_counter() - started)
+        return [(feat, enqueued_at, fut) for feat, (_, enqueued_at, fut) in zip(features, items)]
+
+    def _run_bucketed(self):
+        buckets: list[list] = [[] for _ in self.bucket_bounds]
+        while True:
+            # acorda no prazo da faixa mais antiga
+            deadlines = [b[0][1] + self.max_wait_s for b in buckets if b]
+            timeout = min(deadlines) - time.perf_counter() if deadlines else None
+            items, stop = self._take(timeout)
+
+            for item in self._tokenize(items):
+                i = bucket_index(len(item[0]["input_ids"]), self.bucket_bounds)
+                buckets[i].append(item)
+                self._pending += 1
+                if len(buckets[i]) >= self.bucket_capacity(i):
+                    self._emit(i, buckets[i])
+                    buckets[i] = []
+
+            now = time.perf_counter()
+            for i, batch in enumerate(buckets):
+                if batch and (stop or batch[0][1] + self.max_wait_s <= now):
+                    self._emit(i, batch)
+                    buckets[i] = []
+            if stop:
+                return
+
+    def _emit(self, index: int, batch: list):
+        self._pending -= len(batch)
+        with self._stats_lock:
+            self.bucket_batches[index] += 1
+        if self._executor is None:
+            self._flush(batch)
+        else:
+            self._slots.acquire()
+            self._dispatch(batch)
+
+    def _dispatch(self, batch: list):
+        try:
+            fut = self._executor.submit(self._flush, batch)
+        except RuntimeError:
+            # executor já finalizado (shutdown): roda na própria thread
+            self._slots.release()
+            self._flush(batch)
+            return
+        fut.add_done_callback(lambda _: self._slots.release())
+
+    def _flush(self, batch: list):
+        # descarta quem já cancelou (ex.: cliente desconectou)
+        batch = [item for item in batch if item[2].set_running_or_notify_cancel()]
+        if not batch:
+            return
+
+        # textos, ou features tokenizadas no modo por faixas
+        inputs = [payload for payload, _, _ in batch]
+        started = time.perf_counter()
+        try:
+            results, compute_time_ms = self._resolve_predict_fn()(inputs)
+        except Exception as e:
+            logger.error(f"Falha no batch de inferência (size={len(batch)}): {e}", exc_info=True)
+            for _, _, fut in batch:
+                fut.set_exception(e)
+            return
+
+        with self._stats_lock:
+            self.batches_total += 1
+            self.items_total += len(batch)
+            self.last_batch_size = len(batch)
+            if self.bucketing:
+                lengths = [len(payload["input_ids"]) for payload in inputs]
+                self.tokens_total += sum(lengths)
+                self.padded_tokens_total += max(lengths) * len(lengths)
+
+        batch_size_histogram.observe(len(batch))
+
+        for (_, enqueued_at, fut), (label, score) in zip(batch, results):
+            fut.set_result(
+                BatchResult(
+                    label=label,
+                    score=score,
+                    queue_wait_ms=(started - enqueued_at) * 1000.0,
+                    compute_time_ms=compute_time_ms,
+                    batch_size=len(batch),
+                )
+            )
+
+
+_batcher: MicroBatcher | None = None
+
+
+def get_batcher() -> MicroBatcher:
+    global _batcher
+    if _batcher is None:
+        _batcher = MicroBatcher(
+            max_batch_size=settings.batch_max_size,
+            max_wait_ms=settings.batch_max_wait_ms,
+            executor=get_inference_executor(),
+            max_concurrency=inference_workers(),
+            bucket_bounds=settings.batch_buckets,
+            max_batch_tokens=settings.batch_max_tokens,
+        )
+    return _batcher
+
+
+def batcher_stats() -> dict:
+    """stats() do batcher, se já existir (não cria o singleton nem o executor)."""
+    batcher = _batcher
+    return batcher.stats() if batcher is not None else {}
+
+
+def shutdown_batcher():
+    global _batcher
+    if _batcher is not None:
+        _batcher.stop()
+        _batcher = None
+
+
+def is_batching_enabled() -> bool:
+    return bool(settings.batch_enabled)
@@ -0,0 +1,183 @@
+import json
+import uuid
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import ClientDisconnect
+
+from app.admission import PRIORITY_API, admit
+from app.config import settings
+from app.executor import run_inference
+from app.firestore_client import build_inference_doc
+from app.persistence import enqueue_inferences
+from app.logger import get_logger
+from app.models import BatchPredictItemRequest
+from app.security import require_predict_api_key
+from app import utils
+
+logger = get_logger(__name__)
+
+router = APIRouter(tags=["Prediction"])
+
+
+class _DuplexStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse que não escuta disconnect em paralelo.
+
+    O gerador lê o corpo do request enquanto responde; o listener padrão
+    disputaria o mesmo receive() e consumiria as mensagens do corpo.
+    Disconnect continua chegando como ClientDisconnect via request.stream().
+    """
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await self.stream_response(send)
+        except OSError:
+            raise ClientDisconnect()
+        if self.background is not None:
+            await self.background()
+
+
+async def _iter_lines(chunks, max_line_bytes: int):
+    """
+    Quebra o corpo (bytes em pedaços) em linhas.
+    Linhas maiores que max_line_bytes viram None (erro) sem acumular o resto.
+    """
+    buf = b""
+    skipping = False
+    async for chunk in chunks:
+        parts = (buf + chunk).split(b"\n")
+        buf = parts.pop()  # linha ainda incompleta
+        for line in parts:
+            if skipping:
+                # fim da linha longa que já foi reportada
+                skipping = False
+                continue
+            # linha longa inteira dentro de um único pedaço
+            yield None if len(line) > max_line_bytes else line
+        if len(buf) > max_line_bytes:
+            if not skipping:
+                yield None
+            skipping = True
+            buf = b""
+    if buf and not skipping:
+        yield buf
+
+
+def _parse_line(raw: bytes | None) -> BatchPredictItemRequest:
+    if raw is None:
+        raise ValueError("linha excede STREAM_MAX_LINE_BYTES")
+    return BatchPredictItemRequest.model_validate(json.loads(raw))
+
+
+def _error_message(e: Exception) -> str:
+    if isinstance(e, ValidationError):
+        return "; ".join(
+            f"{'.'.join(str(p) for p in err['loc']) or 'body'}: {err['msg']}" for err in e.errors()
+        )
+    return str(e)
+
+
+def _dumps(obj: dict) -> str:
+    return json.dumps(obj, ensure_ascii=False) + "\n"
+
+
+async def _score_batch(batch: list[tuple[int, BatchPredictItemRequest]], persist: bool) -> str:
+    texts = [req.text for _, req in batch]
+    outputs = await run_inference(utils.predict_many, texts, settings.batch_max_size)
+
+    model_version = settings.app_version
+    lines = []
+    docs = []
+    for (line_no, req), (label, score, item_time_ms, _) in zip(batch, outputs):
+        inference_id = str(uuid.uuid4())
+        score = round(float(score), 5)
+        item_time_ms = round(float(item_time_ms), 2)
+        lines.append(
+            _dumps(
+                {
+                    "line": line_no,
+                    "inference_id": inference_id,
+                    "label": label,
+                    "score": score,
+                    "inference_time_ms": item_time_ms,
+                    "model_version": model_version,
+                }
+            )
+        )
+        if persist:
+            docs.append(
+                (
+                    inference_id,
+                    build_inference_doc(
+                        inference_id, req.text, req.lang, label, score, item_time_ms, model_version
+                    ),
+                )
+            )
+
+    if docs:
+        # block=True: com a fila cheia o stream desacelera em vez de descartar
+        await run_in_threadpool(enqueue_inferences, docs, True)
+    return "".join(lines)
+
+
+async def _score_batch_safe(batch: list[tuple[int, BatchPredictItemRequest]], persist: bool) -> str:
+    # o status 200 já foi enviado: erro vira uma linha por item do batch
+    try:
+        # cada batch passa pelo admission control, pagando um slot por texto
+        async with admit(PRIORITY_API, cost=len(batch)):
+            return await _score_batch(batch, persist)
+    except HTTPException as e:
+        retry_after = int(e.headers.get("Retry-After", 1)) if e.headers else 1
+        return "".join(
+            _dumps({"line": line_no, "error": e.detail, "retry_after_s": retry_after}) for line_no, _ in batch
+        )
+    except Exception as e:
+        logger.error(f"Erro no batch do stream: {e}", exc_info=True)
+        return "".join(_dumps({"line": line_no, "error": "Erro interno"}) for line_no, _ in batch)
+
+
+async def _score_ndjson(request: Request, persist: bool):
+    """
+    Lê o NDJSON incrementalmente e devolve um pedaço NDJSON por batch.
+
+    Memória limitada: no máximo um batch de entrada + um pedaço de saída.
+    Backpressure: o StreamingResponse só pede o próximo pedaço depois de
+    enviar o anterior, então um cliente lento também desacelera a leitura
+    do corpo.
+    """
+    batch_size = max(1, settings.stream_batch_size)
+    batch: list[tuple[int, BatchPredictItemRequest]] = []
+    line_no = 0
+    scored = 0
+    errors = 0
+
+    async for raw in _iter_lines(request.stream(), settings.stream_max_line_bytes):
+        line_no += 1
+        if raw is not None and not raw.strip():
+            continue
+        try:
+            batch.append((line_no, _parse_line(raw)))
+        except (ValueError, ValidationError) as e:
+            errors += 1
+            yield _dumps({"line": line_no, "error": _error_message(e)})
+            continue
+
+        if len(batch) >= batch_size:
+            yield await _score_batch_safe(batch, persist)
+            scored += len(batch)
+            batch = []
+
+    if batch:
+        yield await _score_batch_safe(batch, persist)
+        scored += len(batch)
+
+    logger.info(f"Predição(stream) concluída: scored={scored}, errors={errors}")
+
+
+# API "puro" em streaming (COM senha): NDJSON in, NDJSON out
+@router.post("/predict/stream", dependencies=[Depends(require_predict_api_key)])
+async def predict_stream(request: Request, persist: bool = True):
+    return _DuplexStreamingResponse(_score_ndjson(request, persist), media_type="application/x-ndjson")
@@ -0,0 +1,112 @@
+import hashlib
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+from app.config import settings
+from app import utils
+
+
+def normalize_text(text: str) -> str:
+    # RoBERTa é case-sensitive: normaliza só unicode e espaços
+    return " ".join(unicodedata.normalize("NFC", text or "").split())
+
+
+def cache_key(text: str, model_version: str) -> str:
+    raw = f"{model_version}\x00{normalize_text(text)}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class PredictionCache:
+    """
+    LRU em memória com TTL: chave -> (label, score).
+
+    A chave já inclui a versão do modelo (APP_VERSION + arquivos do modelo),
+    então um modelo novo nunca bate em entradas antigas: elas saem pelo LRU/TTL.
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: float = 3600.0):
+        self.max_entries = max(1, int(max_entries))
+        self.ttl_seconds = float(ttl_seconds)
+        self._data: OrderedDict[str, tuple[tuple[str, float], float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str) -> tuple[str, float] | None:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at = entry
+            if expires_at <= now:
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: str, value: tuple[str, float]):
+        expires_at = time.monotonic() + self.ttl_seconds
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+_cache: PredictionCache | None = None
+
+
+def get_cache() -> PredictionCache:
+    global _cache
+    if _cache is None:
+        _cache = PredictionCache(
+            max_entries=settings.cache_max_entries,
+            ttl_seconds=settings.cache_ttl_seconds,
+        )
+    return _cache
+
+
+def is_cache_enabled() -> bool:
+    return bool(settings.cache_enabled)
+
+
+def current_model_version() -> str:
+    return f"{settings.app_version}:{utils.model_fingerprint()}"
+
+
+def lookup(text: str) -> tuple[str, tuple[str, float] | None]:
+    """Retorna (chave, (label, score) ou None)."""
+    key = cache_key(text, current_model_version())
+    return key, get_cache().get(key)
+
+
+def store(key: str, label: str, score: float):
+    get_cache().put(key, (label, score))
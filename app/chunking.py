@@ -0,0 +1,109 @@
+import time
+
+import numpy as np
+
+from app.config import settings
+
+# mean_logits: média simples dos logits das janelas
+# length_weighted: média ponderada pelos tokens reais de cada janela
+#   (a última janela, geralmente curta, pesa menos)
+AGGREGATIONS = ("mean_logits", "length_weighted")
+
+
+def split_windows(tokenizer, text: str, window: int, stride: int, max_windows: int | None = None) -> list[dict]:
+    """
+    Quebra o texto em janelas de até window tokens, com stride tokens de
+    sobreposição entre janelas vizinhas (overflow do tokenizer).
+    Cada janela: {"input_ids", "attention_mask", "start_char", "end_char"}.
+    """
+    window = max(8, int(window))
+    # o tokenizer exige stride menor que o conteúdo da janela
+    stride = min(max(0, int(stride)), window // 2)
+    enc = tokenizer(
+        text,
+        truncation=True,
+        max_length=window,
+        stride=stride,
+        return_overflowing_tokens=True,
+        return_offsets_mapping=True,
+    )
+
+    ids, masks, offsets = enc["input_ids"], enc["attention_mask"], enc["offset_mapping"]
+    if ids and isinstance(ids[0], int):
+        # tokenizer "lento": sem overflow em lista, fica só a primeira janela
+        ids, masks, offsets = [ids], [masks], [offsets]
+
+    windows = []
+    for input_ids, mask, spans in zip(ids, masks, offsets):
+        # tokens especiais vêm com offset (0, 0)
+        spans = [s for s in spans if s[1] > s[0]]
+        windows.append(
+            {
+                "input_ids": input_ids,
+                "attention_mask": mask,
+                "start_char": spans[0][0] if spans else 0,
+                "end_char": spans[-1][1] if spans else 0,
+            }
+        )
+    if max_windows:
+        windows = windows[: max(1, int(max_windows))]
+    return windows
+
+
+def aggregate_logits(logits: np.ndarray, weights: list[float], strategy: str) -> np.ndarray:
+    """Combina os logits [janelas, classes] num vetor [classes]."""
+    if strategy == "mean_logits":
+        return logits.mean(axis=0)
+    if strategy == "length_weighted":
+        w = np.asarray(weights, dtype=np.float64)
+        return (logits * (w / w.sum())[:, None]).sum(axis=0)
+    raise ValueError(f"Agregação inválida: {strategy} (use {', '.join(AGGREGATIONS)})")
+
+
+def predict_chunked(text: str, aggregation: str | None = None):
+    """
+    Classifica o texto inteiro (sem truncar em 512 tokens): todas as janelas
+    vão num único forward pass em batch e os logits são agregados.
+    Retorna (label, score, compute_time_ms, chunks), com o detalhe por janela
+    em chunks.
+    """
+    # import tardio: app.utils puxa o pipeline
+    from app import utils
+    from app.onnx_backend import softmax
+
+    aggregation = aggregation or settings.chunk_aggregation
+    if aggregation not in AGGREGATIONS:
+        raise ValueError(f"Agregação inválida: {aggregation} (use {', '.join(AGGREGATIONS)})")
+
+    pipe = utils.load_model()
+    windows = split_windows(
+        pipe.tokenizer,
+        text,
+        min(settings.chunk_window_tokens, utils.MAX_LENGTH),
+        settings.chunk_stride_tokens,
+        settings.chunk_max_windows,
+    )
+    features = [{"input_ids": w["input_ids"], "attention_mask": w["attention_mask"]} for w in windows]
+
+    start = time.perf_counter()
+    logits = np.asarray(utils.forward_logits(pipe, features), dtype=np.float64)
+    compute_time_ms = (time.perf_counter() - start) * 1000
+
+    weights = [sum(w["attention_mask"]) for w in windows]
+    probs = softmax(aggregate_logits(logits, weights, aggregation))
+    id2label = utils._id2label(pipe)
+    label = utils._map_label(id2label[int(probs.argmax())])
+
+    chunks = []
+    for i, (w, row) in enumerate(zip(windows, softmax(logits))):
+        chunks.append(
+            {
+                "index": i,
+                "start_char": w["start_char"],
+                "end_char": w["end_char"],
+                "tokens": weights[i],
+                "label": utils._map_label(id2label[int(row.argmax())]),
+                "score": float(row.max()),
+            }
+        )
+    return label, float(probs.max()), compute_time_ms, chunks
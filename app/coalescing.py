@@ -0,0 +1,61 @@
+import threading
+from concurrent.futures import Future
+
+from app.config import settings
+
+
+class SingleFlight:
+    """
+    Deduplicação de trabalho em voo: chamadas concorrentes com a mesma chave
+    recebem o mesmo Future enquanto o primeiro (líder) não termina.
+    """
+
+    def __init__(self):
+        self._inflight: dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+        self.leaders = 0
+        self.coalesced = 0
+
+    def do(self, key: str, submit) -> tuple[Future, bool]:
+        """
+        submit() só é chamado pelo líder e deve devolver um Future.
+        Retorna (future, coalesced).
+        """
+        with self._lock:
+            fut = self._inflight.get(key)
+            if fut is not None:
+                self.coalesced += 1
+                return fut, True
+            fut = submit()
+            self._inflight[key] = fut
+            self.leaders += 1
+
+        fut.add_done_callback(lambda f: self._forget(key, f))
+        return fut, False
+
+    def _forget(self, key: str, fut: Future):
+        with self._lock:
+            if self._inflight.get(key) is fut:
+                del self._inflight[key]
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": len(self._inflight),
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+        }
+
+
+_singleflight: SingleFlight | None = None
+
+
+def get_singleflight() -> SingleFlight:
+    global _singleflight
+    if _singleflight is None:
+        _singleflight = SingleFlight()
+    return _singleflight
+
+
+def is_coalescing_enabled() -> bool:
+    return bool(settings.coalesce_enabled)
@@ -3,6 +3,11 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+
+def _int_list(raw: str) -> list[int]:
+    return [int(x) for x in raw.split(",") if x.strip()]
+
+
 # Aplicação
 APP_NAME = os.getenv("APP_NAME", "Sentiment Analysis API")
 APP_VERSION = os.getenv("APP_VERSION", "1.0.0")
@@ -20,6 +25,96 @@ MODEL_LOCAL_PATH = os.getenv("MODEL_LOCAL_PATH", "/tmp/sentiment-model")  # ✅
 MODEL_DEVICE = os.getenv("MODEL_DEVICE", "cpu")
 USE_LOCAL_MODEL = os.getenv("USE_LOCAL_MODEL", "True").lower() == "true"
 
+# Startup: carrega o modelo no lifespan e aquece antes de ficar "ready"
+EAGER_LOAD = os.getenv("EAGER_LOAD", "True").lower() == "true"
+# blocking: o servidor só sobe depois do warm-up
+# background: sobe na hora (health checks OK) e carrega modelo/deps em background
+STARTUP_MODE = os.getenv("STARTUP_MODE", "blocking").strip().lower()
+WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "True").lower() == "true"
+WARMUP_LENGTHS = _int_list(os.getenv("WARMUP_LENGTHS", "16,64,256"))
+WARMUP_BATCH_SIZES = _int_list(os.getenv("WARMUP_BATCH_SIZES", "1,8"))
+
+# Micro-batching (agrupa requisições concorrentes num único forward pass)
+BATCH_ENABLED = os.getenv("BATCH_ENABLED", "True").lower() == "true"
+BATCH_MAX_SIZE = int(os.getenv("BATCH_MAX_SIZE", 32))
+BATCH_MAX_WAIT_MS = float(os.getenv("BATCH_MAX_WAIT_MS", 5))
+# Faixas de tamanho (tokens): cada batch só junta textos da mesma faixa.
+# Vazio desliga (batch único, padding até o maior texto).
+BATCH_BUCKETS = _int_list(os.getenv("BATCH_BUCKETS", "16,32,64,128,256,512"))
+# Teto de tokens com padding por batch (faixas longas saem com batches menores)
+BATCH_MAX_TOKENS = int(os.getenv("BATCH_MAX_TOKENS", 8192))
+
+# Textos longos (PredictRequest.chunking): janelas sobrepostas de tokens + agregação
+CHUNK_WINDOW_TOKENS = int(os.getenv("CHUNK_WINDOW_TOKENS", 512))
+CHUNK_STRIDE_TOKENS = int(os.getenv("CHUNK_STRIDE_TOKENS", 64))  # sobreposição entre janelas
+CHUNK_MAX_WINDOWS = int(os.getenv("CHUNK_MAX_WINDOWS", 16))
+CHUNK_AGGREGATION = os.getenv("CHUNK_AGGREGATION", "mean_logits").strip().lower()
+
+# Cache de predições (LRU em memória + TTL)
+CACHE_ENABLED = os.getenv("CACHE_ENABLED", "True").lower() == "true"
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", 10000))
+CACHE_TTL_SECONDS = float(os.getenv("CACHE_TTL_SECONDS", 3600))
+
+# Coalescing: textos idênticos em voo compartilham o mesmo forward pass
+COALESCE_ENABLED = os.getenv("COALESCE_ENABLED", "True").lower() == "true"
+
+# Serialização das respostas: stdlib (padrão) ou orjson (precisa do pacote orjson)
+JSON_RESPONSE = os.getenv("JSON_RESPONSE", "stdlib").strip().lower()
+
+# POST /predict/batch
+PREDICT_BATCH_MAX_ITEMS = int(os.getenv("PREDICT_BATCH_MAX_ITEMS", 256))
+
+# POST /predict/stream (NDJSON)
+STREAM_BATCH_SIZE = int(os.getenv("STREAM_BATCH_SIZE", 64))
+STREAM_MAX_LINE_BYTES = int(os.getenv("STREAM_MAX_LINE_BYTES", 64 * 1024))
+
+# GET /inferences: máximo por página (o resto vem por next_cursor)
+INFERENCES_PAGE_MAX = int(os.getenv("INFERENCES_PAGE_MAX", 1000))
+# GET /inferences/export: documentos por consulta ao Firestore (a memória fica limitada a uma página)
+EXPORT_PAGE_SIZE = int(os.getenv("EXPORT_PAGE_SIZE", 500))
+
+# Persistência: fila + batched writes no Firestore
+PERSIST_QUEUE_MAX = int(os.getenv("PERSIST_QUEUE_MAX", 10000))
+PERSIST_BATCH_SIZE = int(os.getenv("PERSIST_BATCH_SIZE", 500))  # limite do Firestore: 500
+PERSIST_FLUSH_MS = float(os.getenv("PERSIST_FLUSH_MS", 1000))
+PERSIST_MAX_RETRIES = int(os.getenv("PERSIST_MAX_RETRIES", 3))
+PERSIST_RETRY_BACKOFF_MS = float(os.getenv("PERSIST_RETRY_BACKOFF_MS", 200))
+PERSIST_DRAIN_SECONDS = float(os.getenv("PERSIST_DRAIN_SECONDS", 10))
+
+# Rollups por minuto/hora/dia, incrementados no mesmo batched write das inferências
+ROLLUPS_ENABLED = os.getenv("ROLLUPS_ENABLED", "True").lower() == "true"
+SUMMARY_MAX_BUCKETS = int(os.getenv("SUMMARY_MAX_BUCKETS", 1440))
+
+# Quota do /ui/predict
+# local: decide em memória e sincroniza com o Firestore em background
+# memory: só em memória (nada persiste)
+# firestore: uma transação por requisição
+# redis: script Lua no Redis (um round-trip, compartilhado entre instâncias)
+UI_QUOTA_BACKEND = os.getenv("UI_QUOTA_BACKEND", "local").strip().lower()
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+UI_QUOTA_REDIS_PREFIX = os.getenv("UI_QUOTA_REDIS_PREFIX", "ui_quota:")
+UI_QUOTA_MAX_ENTRIES = int(os.getenv("UI_QUOTA_MAX_ENTRIES", 100000))
+UI_QUOTA_SYNC_MS = float(os.getenv("UI_QUOTA_SYNC_MS", 1000))
+
+# Admission control: limita inferências em voo/na fila e descarta (503) sob sobrecarga
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "True").lower() == "true"
+ADMISSION_MAX_IN_FLIGHT = int(os.getenv("ADMISSION_MAX_IN_FLIGHT", 64))
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", 256))
+ADMISSION_LATENCY_BUDGET_MS = float(os.getenv("ADMISSION_LATENCY_BUDGET_MS", 2000))
+# fração do orçamento/fila que o /ui/predict pode usar (API tem prioridade)
+ADMISSION_UI_BUDGET_FACTOR = float(os.getenv("ADMISSION_UI_BUDGET_FACTOR", 0.5))
+
+# thread: forward pass num pool de threads do próprio processo
+# process: este processo só atende HTTP; inferência num pool de processos
+#          criado por fork depois da carga (pesos compartilhados)
+SERVING_MODE = os.getenv("SERVING_MODE", "thread").strip().lower()
+PROCESS_WORKERS = int(os.getenv("PROCESS_WORKERS", 0))  # 0 = um por core disponível
+
+# Executor de inferência (tira o forward pass do event loop)
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", 2))
+# 0 = divide os cores entre os workers do executor
+TORCH_NUM_THREADS = int(os.getenv("TORCH_NUM_THREADS", 0))
+
 # Classe para acesso fácil
 class Settings:
     app_name = APP_NAME
@@ -33,5 +128,51 @@ class Settings:
     model_local_path = MODEL_LOCAL_PATH
     model_device = MODEL_DEVICE
     use_local_model = USE_LOCAL_MODEL
+    eager_load = EAGER_LOAD
+    startup_mode = STARTUP_MODE
+    warmup_enabled = WARMUP_ENABLED
+    warmup_lengths = WARMUP_LENGTHS
+    warmup_batch_sizes = WARMUP_BATCH_SIZES
+    batch_enabled = BATCH_ENABLED
+    batch_max_size = BATCH_MAX_SIZE
+    batch_max_wait_ms = BATCH_MAX_WAIT_MS
+    batch_buckets = BATCH_BUCKETS
+    batch_max_tokens = BATCH_MAX_TOKENS
+    chunk_window_tokens = CHUNK_WINDOW_TOKENS
+    chunk_stride_tokens = CHUNK_STRIDE_TOKENS
+    chunk_max_windows = CHUNK_MAX_WINDOWS
+    chunk_aggregation = CHUNK_AGGREGATION
+    cache_enabled = CACHE_ENABLED
+    cache_max_entries = CACHE_MAX_ENTRIES
+    cache_ttl_seconds = CACHE_TTL_SECONDS
+    coalesce_enabled = COALESCE_ENABLED
+    json_response = JSON_RESPONSE
+    predict_batch_max_items = PREDICT_BATCH_MAX_ITEMS
+    stream_batch_size = STREAM_BATCH_SIZE
+    stream_max_line_bytes = STREAM_MAX_LINE_BYTES
+    inferences_page_max = INFERENCES_PAGE_MAX
+    export_page_size = EXPORT_PAGE_SIZE
+    persist_queue_max = PERSIST_QUEUE_MAX
+    persist_batch_size = PERSIST_BATCH_SIZE
+    persist_flush_ms = PERSIST_FLUSH_MS
+    persist_max_retries = PERSIST_MAX_RETRIES
+    persist_retry_backoff_ms = PERSIST_RETRY_BACKOFF_MS
+    persist_drain_seconds = PERSIST_DRAIN_SECONDS
+    rollups_enabled = ROLLUPS_ENABLED
+    summary_max_buckets = SUMMARY_MAX_BUCKETS
+    ui_quota_backend = UI_QUOTA_BACKEND
+    redis_url = REDIS_URL
+    ui_quota_redis_prefix = UI_QUOTA_REDIS_PREFIX
+    ui_quota_max_entries = UI_QUOTA_MAX_ENTRIES
+    ui_quota_sync_ms = UI_QUOTA_SYNC_MS
+    admission_enabled = ADMISSION_ENABLED
+    admission_max_in_flight = ADMISSION_MAX_IN_FLIGHT
+    admission_max_queue = ADMISSION_MAX_QUEUE
+    admission_latency_budget_ms = ADMISSION_LATENCY_BUDGET_MS
+    admission_ui_budget_factor = ADMISSION_UI_BUDGET_FACTOR
+    serving_mode = SERVING_MODE
+    process_workers = PROCESS_WORKERS
+    inference_workers = INFERENCE_WORKERS
+    torch_num_threads = TORCH_NUM_THREADS
 
 settings = Settings()
@@ -1,73 +1,183 @@
-import os
-from datetime import datetime, timezone
-
-from fastapi import APIRouter, Depends
-from fastapi.responses import FileResponse
-from google.cloud import firestore
-
-from app.firestore_client import get_db
+import json
+from datetime import datetime, timedelta, timezone
+from itertools import chain
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import FileResponse, PlainTextResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+
+from app.admission import get_admission
+from app.batching import batcher_stats
+from app.cache import get_cache
+from app.coalescing import get_singleflight
+from app.config import settings
+from app.export import MEDIA_TYPES as EXPORT_MEDIA_TYPES, encode_rows, gzip_chunks
+from app.inference_query import (
+    ALL_FIELDS,
+    LEGACY_FIELDS,
+    InferenceFilters,
+    decode_cursor,
+    iter_all_rows,
+    iter_rows,
+    parse_fields,
+)
+from app.logger import logging_stats
+from app.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, render_metrics
+from app.persistence import writer_stats
+from app.process_pool import stats as serving_stats
+from app.quota import quota_store_stats
+from app.responses import dumps
+from app.rollups import GRANULARITIES, build_summary
 from app.security import require_api_key
 
 router = APIRouter(tags=["Dashboard"])
 
 
-def _format_ts(ts) -> str:
-    if ts is None:
-        return "-"
-    if isinstance(ts, datetime):
-        if ts.tzinfo is None:
-            ts = ts.replace(tzinfo=timezone.utc)
-        return ts.astimezone(timezone.utc).strftime("%Y-%m-%d %H:%M:%S UTC")
-    return str(ts)
-
-
 @router.get("/dash")
 async def dash_page():
     # HTML estático do dashboard
     return FileResponse("static/dash.html", media_type="text/html")
 
 
-@router.get("/inferences", dependencies=[Depends(require_api_key)])
-async def list_inferences(limit: int = 50):
-    # limita o range aceitável
-    limit = max(1, min(limit, 200))
+def _stream_page(first, rows, limit: int):
+    """Corpo JSON em pedaços: cada documento sai assim que é lido do Firestore."""
+    yield '{"items":['
+    count, last_cursor = 0, None
+    if first is not None:
+        for row, row_cursor in chain([first], rows):
+            yield ("," if count else "") + dumps(row)
+            count += 1
+            last_cursor = row_cursor
+    # página cheia: pode haver mais depois do último documento
+    next_cursor = last_cursor if count == limit else None
+    yield f'],"count":{count},"next_cursor":{json.dumps(next_cursor)}}}'
 
-    collection = os.getenv("FIRESTORE_COLLECTION", "inferences").strip() or "inferences"
 
-    db = get_db()
-    query = (
-        db.collection(collection)
-        .order_by("created_at", direction=firestore.Query.DESCENDING)
-        .limit(limit)
+@router.get("/inferences", dependencies=[Depends(require_api_key)])
+async def list_inferences(
+    limit: int = 50,
+    cursor: str | None = None,
+    fields: str | None = None,
+    label: Literal["positive", "neutral", "negative"] | None = None,
+    model_version: str | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+):
+    # página limitada; o histórico inteiro é percorrido com next_cursor
+    limit = max(1, min(limit, settings.inferences_page_max))
+    # sem fields=: resposta no formato de sempre; a projeção enxuta é opt-in
+    legacy = not fields
+    try:
+        projection = parse_fields(fields, default=LEGACY_FIELDS)
+        if cursor:
+            decode_cursor(cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    filters = InferenceFilters(label=label, model_version=model_version, since=since, until=until)
+    rows = iter_rows(filters, projection, limit, cursor=cursor, legacy=legacy)
+    # o primeiro documento é lido antes de responder: erro de query (ex.: índice faltando) ainda vira 500
+    first = await run_in_threadpool(next, rows, None)
+    # gerador síncrono: o StreamingResponse itera numa thread, fora do event loop
+    return StreamingResponse(_stream_page(first, rows, limit), media_type="application/json")
+
+
+@router.get("/inferences/export", dependencies=[Depends(require_api_key)])
+async def export_inferences(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    gzip: bool = False,
+    fields: str | None = None,
+    label: Literal["positive", "neutral", "negative"] | None = None,
+    model_version: str | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+):
+    # histórico completo: página a página por cursor, cada linha sai assim que é lida
+    try:
+        projection = parse_fields(fields, default=ALL_FIELDS)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    filters = InferenceFilters(label=label, model_version=model_version, since=since, until=until)
+    rows = iter_all_rows(filters, projection, settings.export_page_size)
+    # mesmo esquema do /inferences: erro na primeira consulta ainda vira status HTTP
+    first = await run_in_threadpool(next, rows, None)
+    if first is not None:
+        rows = chain([first], rows)
+
+    body = encode_rows(rows, projection, format)
+    filename = f"inferences-{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')}.{format}"
+    media_type = EXPORT_MEDIA_TYPES[format]
+    if gzip:
+        body = gzip_chunks(body)
+        filename += ".gz"
+        media_type = "application/gzip"
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
     )
 
-    items = []
-    for doc in query.stream():
-        d = doc.to_dict() or {}
-
-        score = d.get("score")
-        time_ms = d.get("inference_time_ms")
-
-        # dado antigo pode não estar arredondado
-        try:
-            if isinstance(score, (int, float)):
-                score = round(float(score), 5)
-            if isinstance(time_ms, (int, float)):
-                time_ms = round(float(time_ms), 2)
-        except Exception:
-            pass
-
-        items.append(
-            {
-                "id": d.get("id", doc.id),
-                "created_at": _format_ts(d.get("created_at")),
-                "lang": d.get("lang"),
-                "label": d.get("label"),
-                "score": score,
-                "inference_time_ms": time_ms,
-                "model_version": d.get("model_version"),
-                "text": d.get("text"),
-            }
-        )
 
-    return {"count": len(items), "items": items}
+@router.get("/summary", dependencies=[Depends(require_api_key)])
+async def sentiment_summary(
+    granularity: Literal["minute", "hour", "day"] = "hour",
+    since: datetime | None = None,
+    until: datetime | None = None,
+    model_version: str | None = None,
+):
+    """
+    Resumo por bucket lido dos rollups pré-agregados (um documento por bucket,
+    nunca os documentos brutos).
+
+    Os contadores acompanham as inferências gravadas: cada lote incrementa os
+    rollups no mesmo commit dos documentos, e uma retentativa só é enviada se
+    o lote comprovadamente não foi aplicado. Ainda assim a entrega é
+    at-least-once por inference_id: a mesma inferência enfileirada duas vezes
+    conta duas vezes, e lotes descartados depois de PERSIST_MAX_RETRIES
+    (ou pela fila cheia) não aparecem no resumo.
+    """
+    step = GRANULARITIES[granularity]
+    until = until or datetime.now(timezone.utc)
+    if until.tzinfo is None:
+        until = until.replace(tzinfo=timezone.utc)
+    since = since or until - step * 24
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    if since >= until:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="since precisa ser anterior a until")
+    if (until - since) / step > settings.summary_max_buckets:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Faixa grande demais para granularity={granularity} (máx. {settings.summary_max_buckets} buckets)",
+        )
+    return await run_in_threadpool(build_summary, granularity, since, until, model_version)
+
+
+def _collect_stats(admission: dict) -> dict:
+    # só lê: componente que ainda não existe (batching desligado, processo novo) vem vazio
+    return {
+        "cache": get_cache().stats(),
+        "coalescing": get_singleflight().stats(),
+        "batcher": batcher_stats(),
+        "persistence": writer_stats(),
+        "ui_quota": quota_store_stats(),
+        "admission": admission,
+        "serving": serving_stats(),
+        "logging": logging_stats(),
+    }
+
+
+@router.get("/stats", dependencies=[Depends(require_api_key)])
+async def runtime_stats():
+    # contadores em memória desta instância (cache, coalescing, micro-batching, persistência, quota, admission)
+    # o admission controller só é tocado no event loop (sem locks): snapshot aqui, o resto numa thread
+    return await run_in_threadpool(_collect_stats, get_admission().stats())
+
+
+@router.get("/metrics", dependencies=[Depends(require_api_key)])
+async def prometheus_metrics():
+    # formato texto do Prometheus: histogramas por etapa + gauges/contadores desta instância
+    body = await run_in_threadpool(render_metrics, get_admission().stats())
+    return PlainTextResponse(body, media_type=METRICS_CONTENT_TYPE)
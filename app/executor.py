@@ -0,0 +1,76 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
+
+from app.config import settings
+from app.logger import get_logger
+from app.process_pool import is_process_mode, process_workers, run_in_pool
+
+logger = get_logger(__name__)
+
+_executor: ThreadPoolExecutor | None = None
+_lock = threading.Lock()
+
+
+def inference_workers() -> int:
+    if is_process_mode():
+        # uma thread por processo: só despacha e espera o resultado
+        return process_workers()
+    return max(1, int(settings.inference_workers))
+
+
+def torch_threads_per_worker(workers: int | None = None) -> int:
+    if settings.torch_num_threads > 0:
+        return int(settings.torch_num_threads)
+    # evita oversubscription: N workers x M threads intra-op <= cores
+    return max(1, (os.cpu_count() or 1) // (workers or inference_workers()))
+
+
+def configure_torch_threads():
+    n = torch_threads_per_worker()
+    try:
+        import torch
+    except ImportError:
+        return
+    torch.set_num_threads(n)
+    logger.info(f"torch intra-op threads={n} (workers={inference_workers()})")
+
+
+def get_inference_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is not None:
+        return _executor
+    with _lock:
+        if _executor is None:
+            configure_torch_threads()
+            _executor = ThreadPoolExecutor(
+                max_workers=inference_workers(),
+                thread_name_prefix="inference",
+            )
+    return _executor
+
+
+def submit_inference(fn, *args, **kwargs) -> Future:
+    """Agenda fn no executor de inferência (threads ou, em SERVING_MODE=process, processos)."""
+    if is_process_mode():
+        # a thread só despacha; run_in_pool recria o pool se um worker morrer
+        return get_inference_executor().submit(run_in_pool, fn, *args, **kwargs)
+    return get_inference_executor().submit(fn, *args, **kwargs)
+
+
+async def run_inference(fn, *args, **kwargs):
+    """Roda uma função bloqueante (forward pass) no executor dedicado."""
+    if is_process_mode():
+        return await asyncio.wrap_future(submit_inference(fn, *args, **kwargs))
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_inference_executor(), partial(fn, *args, **kwargs))
+
+
+def shutdown_executor(wait: bool = True):
+    global _executor
+    with _lock:
+        if _executor is not None:
+            _executor.shutdown(wait=wait)
+            _executor = None
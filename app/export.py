@@ -0,0 +1,61 @@
+import csv
+import io
+import zlib
+from typing import Iterable, Iterator
+
+from app.responses import dumps
+
+# pedaços de ~64 KB: poucas idas à thread do StreamingResponse sem segurar o download
+CHUNK_BYTES = 64 * 1024
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+def _ndjson_chunks(rows: Iterable[dict]) -> Iterator[str]:
+    buf, size = [], 0
+    for row in rows:
+        line = dumps(row) + "\n"
+        buf.append(line)
+        size += len(line)
+        if size >= CHUNK_BYTES:
+            yield "".join(buf)
+            buf, size = [], 0
+    if buf:
+        yield "".join(buf)
+
+
+def _csv_chunks(rows: Iterable[dict], fields: list[str]) -> Iterator[str]:
+    out = io.StringIO()
+    writer = csv.DictWriter(out, fieldnames=fields, extrasaction="ignore")
+    writer.writeheader()
+    for row in rows:
+        writer.writerow(row)
+        if out.tell() >= CHUNK_BYTES:
+            yield out.getvalue()
+            out.seek(0)
+            out.truncate()
+    if out.tell():
+        yield out.getvalue()
+
+
+def encode_rows(rows: Iterable[dict], fields: list[str], fmt: str) -> Iterator[bytes]:
+    """Linhas -> pedaços de NDJSON ou CSV (com cabeçalho) em UTF-8."""
+    chunks = _csv_chunks(rows, fields) if fmt == "csv" else _ndjson_chunks(rows)
+    for chunk in chunks:
+        yield chunk.encode("utf-8")
+
+
+def gzip_chunks(chunks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    """
+    Comprime em streaming (formato gzip). Cada pedaço de entrada é descarregado
+    com Z_SYNC_FLUSH, então o cliente recebe dados sem esperar o fim da consulta.
+    """
+    comp = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        out = comp.compress(chunk) + comp.flush(zlib.Z_SYNC_FLUSH)
+        if out:
+            yield out
+    yield comp.flush()
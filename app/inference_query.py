@@ -0,0 +1,166 @@
+import base64
+import json
+import os
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+from app.firestore_client import get_db, get_firestore
+
+# colunas da tabela do dashboard (sem o texto, que é o campo mais pesado)
+TABLE_FIELDS = ("id", "created_at", "lang", "label", "score", "inference_time_ms", "model_version")
+ALL_FIELDS = TABLE_FIELDS + ("text", "queue_wait_ms", "compute_time_ms", "cached", "num_chunks", "aggregation")
+# /inferences sem fields=: mesmas chaves e formato de sempre (com o texto)
+LEGACY_FIELDS = TABLE_FIELDS + ("text",)
+
+# dado antigo pode não estar arredondado
+_ROUND_DIGITS = {"score": 5, "inference_time_ms": 2}
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+@dataclass
+class InferenceFilters:
+    """Filtros aplicados no Firestore (cada combinação tem índice composto em firestore.indexes.json)."""
+
+    label: str | None = None
+    model_version: str | None = None
+    since: datetime | None = None  # inclusive
+    until: datetime | None = None  # exclusivo
+
+
+def collection_name() -> str:
+    return os.getenv("FIRESTORE_COLLECTION", "inferences").strip() or "inferences"
+
+
+def parse_fields(raw: str | None, default: tuple[str, ...] = TABLE_FIELDS) -> list[str]:
+    """Projeção pedida pelo cliente; created_at sempre vem (é a chave do cursor)."""
+    if not raw:
+        fields = list(default)
+    else:
+        fields = [f.strip() for f in raw.split(",") if f.strip()]
+        unknown = sorted(set(fields) - set(ALL_FIELDS))
+        if unknown:
+            raise ValueError(f"Campos desconhecidos: {', '.join(unknown)} (use {', '.join(ALL_FIELDS)})")
+    if "created_at" not in fields:
+        fields.append("created_at")
+    return fields
+
+
+def _utc(ts: datetime) -> datetime:
+    return ts.replace(tzinfo=timezone.utc) if ts.tzinfo is None else ts.astimezone(timezone.utc)
+
+
+def encode_cursor(created_at: datetime, doc_id: str) -> str:
+    raw = json.dumps([_utc(created_at).isoformat(), doc_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, str]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        ts, doc_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.fromisoformat(ts), str(doc_id)
+    except Exception as e:
+        raise InvalidCursor("cursor inválido") from e
+
+
+def build_query(
+    filters: InferenceFilters,
+    fields: list[str] | None = None,
+    cursor: str | None = None,
+    limit: int | None = None,
+    db=None,
+):
+    """
+    Consulta mais recentes primeiro, com filtros e projeção no servidor.
+
+    A ordem é (created_at desc, id do documento desc): o id desempata
+    documentos com o mesmo timestamp, então o cursor nunca pula nem repete.
+    """
+    firestore = get_firestore()
+    db = db or get_db()
+    field_filter = firestore.FieldFilter
+
+    query = db.collection(collection_name())
+    if filters.label:
+        query = query.where(filter=field_filter("label", "==", filters.label))
+    if filters.model_version:
+        query = query.where(filter=field_filter("model_version", "==", filters.model_version))
+    if filters.since:
+        query = query.where(filter=field_filter("created_at", ">=", _utc(filters.since)))
+    if filters.until:
+        query = query.where(filter=field_filter("created_at", "<", _utc(filters.until)))
+
+    query = query.order_by("created_at", direction=firestore.Query.DESCENDING)
+    query = query.order_by("__name__", direction=firestore.Query.DESCENDING)
+    if fields:
+        query = query.select(fields)
+    if cursor:
+        created_at, doc_id = decode_cursor(cursor)
+        query = query.start_after({"created_at": created_at, "__name__": doc_id})
+    if limit:
+        query = query.limit(limit)
+    return query
+
+
+def _format_legacy_ts(ts) -> str:
+    if ts is None:
+        return "-"
+    if isinstance(ts, datetime):
+        return _utc(ts).strftime("%Y-%m-%d %H:%M:%S UTC")
+    return str(ts)
+
+
+def doc_row(doc, fields: list[str], legacy: bool = False) -> dict:
+    """
+    Linha de saída de um documento projetado (timestamps em ISO 8601 UTC).
+    legacy=True mantém o formato original do /inferences ("2026-01-01 09:00:00 UTC").
+    """
+    d = doc.to_dict() or {}
+    row = {}
+    for name in fields:
+        value = doc.id if name == "id" and d.get("id") is None else d.get(name)
+        if legacy and name == "created_at":
+            value = _format_legacy_ts(value)
+        elif isinstance(value, datetime):
+            value = _utc(value).isoformat()
+        elif name in _ROUND_DIGITS and isinstance(value, (int, float)) and not isinstance(value, bool):
+            value = round(float(value), _ROUND_DIGITS[name])
+        row[name] = value
+    return row
+
+
+def iter_rows(
+    filters: InferenceFilters,
+    fields: list[str],
+    limit: int,
+    cursor: str | None = None,
+    db=None,
+    legacy: bool = False,
+):
+    """
+    Lê até limit documentos em ordem e gera (linha, cursor do documento).
+    Bloqueante (gRPC): rodar fora do event loop.
+    """
+    query = build_query(filters, fields, cursor=cursor, limit=limit, db=db)
+    for doc in query.stream():
+        created_at = (doc.to_dict() or {}).get("created_at")
+        row = doc_row(doc, fields, legacy=legacy)
+        yield row, encode_cursor(created_at, doc.id) if isinstance(created_at, datetime) else None
+
+
+def iter_all_rows(filters: InferenceFilters, fields: list[str], page_size: int, cursor: str | None = None, db=None):
+    """
+    Percorre todos os documentos que casam com os filtros, uma consulta de
+    page_size por vez, retomando pelo cursor do último documento lido.
+    """
+    while True:
+        count = 0
+        for row, row_cursor in iter_rows(filters, fields, page_size, cursor=cursor, db=db):
+            yield row
+            count += 1
+            cursor = row_cursor
+        if count < page_size or cursor is None:
+            return
@@ -1,20 +1,167 @@
+import atexit
 import json
 import logging
+import logging.handlers
 import os
-from datetime import datetime, timezone
+import queue
+import random
+import threading
+import time
+
+# registros esperando o listener; fila cheia descarta (nunca bloqueia o request)
+LOG_QUEUE_MAX = int(os.getenv("LOG_QUEUE_MAX", 10000))
+# LOG_ASYNC=false volta ao StreamHandler síncrono (útil para depurar)
+LOG_ASYNC = os.getenv("LOG_ASYNC", "True").lower() == "true"
+# fração das linhas INFO marcadas com extra={"sampled": True} que é mantida (1 = todas)
+LOG_INFO_SAMPLE_RATE = float(os.getenv("LOG_INFO_SAMPLE_RATE", 1.0))
+
+_encode = json.JSONEncoder(ensure_ascii=False).encode
 
 
 class JSONFormatter(logging.Formatter):
+    """
+    Uma linha JSON por registro. O timestamp vem de record.created (o instante
+    do log, não o da escrita) e o prefixo até os segundos é reaproveitado.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._ts_second = -1
+        self._ts_prefix = ""
+
+    def _timestamp(self, created: float) -> str:
+        second = int(created)
+        if second != self._ts_second:
+            self._ts_prefix = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(second))
+            self._ts_second = second
+        return f"{self._ts_prefix}.{int((created - second) * 1e6):06d}+00:00"
+
     def format(self, record: logging.LogRecord) -> str:
         log_data = {
-            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "timestamp": self._timestamp(record.created),
             "level": record.levelname,
             "logger": record.name,
             "message": record.getMessage(),
         }
         if record.exc_info:
             log_data["exception"] = self.formatException(record.exc_info)
-        return json.dumps(log_data, ensure_ascii=False)
+        return _encode(log_data)
+
+
+class _SampleFilter(logging.Filter):
+    """Amostra linhas INFO de alto volume (marcadas com extra={"sampled": True})."""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = max(0.0, min(1.0, rate))
+        self.sampled_out = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.rate >= 1.0 or record.levelno != logging.INFO or not getattr(record, "sampled", False):
+            return True
+        if random.random() < self.rate:
+            return True
+        self.sampled_out += 1
+        return False
+
+
+class _DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Só enfileira: formatação e escrita no stdout acontecem na thread do
+    QueueListener. Fila cheia descarta o registro e conta em dropped.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.enqueued = 0
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # fixa a mensagem (args podem mudar depois); exc_info segue como está,
+        # o listener está no mesmo processo e formata o traceback por lá
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+            self.enqueued += 1
+        except queue.Full:
+            self.dropped += 1
+
+
+_lock = threading.Lock()
+_handler: logging.Handler | None = None
+_sample_filter = _SampleFilter(LOG_INFO_SAMPLE_RATE)
+_listener: logging.handlers.QueueListener | None = None
+
+
+def _output_handler() -> logging.Handler:
+    handler = logging.StreamHandler()
+    handler.setFormatter(JSONFormatter())
+    return handler
+
+
+def _start_listener(handler: _DroppingQueueHandler):
+    global _listener
+    _listener = logging.handlers.QueueListener(handler.queue, _output_handler())
+    _listener.start()
+
+
+def _shared_handler() -> logging.Handler:
+    """Handler único de todos os loggers do app (uma fila e uma thread de escrita)."""
+    global _handler
+    if _handler is None:
+        with _lock:
+            if _handler is None:
+                if LOG_ASYNC:
+                    handler = _DroppingQueueHandler(queue.Queue(maxsize=max(1, LOG_QUEUE_MAX)))
+                    _start_listener(handler)
+                else:
+                    handler = _output_handler()
+                handler.addFilter(_sample_filter)
+                _handler = handler
+    return _handler
+
+
+def stop_logging():
+    """Esvazia a fila e para o listener (chamado no atexit)."""
+    global _listener
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+def _after_fork_in_child():
+    # a thread do listener não existe no processo filho (pool de inferência)
+    # e a fila herdada pode ter ficado com o lock preso: começa do zero
+    global _listener, _lock
+    _lock = threading.Lock()
+    _listener = None
+    if isinstance(_handler, _DroppingQueueHandler):
+        _handler.queue = queue.Queue(maxsize=max(1, LOG_QUEUE_MAX))
+        _start_listener(_handler)
+
+
+atexit.register(stop_logging)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+def logging_stats() -> dict:
+    handler = _handler
+    if not isinstance(handler, _DroppingQueueHandler):
+        return {"async": False, "sampled_out": _sample_filter.sampled_out}
+    return {
+        "async": True,
+        "queue_depth": handler.queue.qsize(),
+        "queue_max": handler.queue.maxsize,
+        "records_enqueued": handler.enqueued,
+        "records_dropped": handler.dropped,
+        "sampled_out": _sample_filter.sampled_out,
+    }
 
 
 def get_logger(name: str) -> logging.Logger:
@@ -24,9 +171,7 @@ def get_logger(name: str) -> logging.Logger:
     logger.propagate = False
 
     if not logger.handlers:
-        handler = logging.StreamHandler()
-        handler.setFormatter(JSONFormatter())
-        logger.addHandler(handler)
+        logger.addHandler(_shared_handler())
 
     level = os.getenv("LOGLEVEL", "INFO").upper()
     logger.setLevel(level)
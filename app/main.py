@@ -1,19 +1,48 @@
+from concurrent.futures import Future
 from contextlib import asynccontextmanager
+import asyncio
 import os
+import time
 import uuid
 
-from fastapi import FastAPI, HTTPException, status, BackgroundTasks, Request, Depends
+from fastapi import FastAPI, HTTPException, status, Request, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse, FileResponse
 from fastapi.staticfiles import StaticFiles
-from google.cloud import firestore
+from starlette.concurrency import run_in_threadpool
 
 from app.config import settings
 from app.logger import get_logger
-from app.models import PredictRequest, PredictResponse, HealthResponse
-from app.utils import predict, is_model_loaded
-from app.firestore_client import save_inference
+from app.models import (
+    PredictRequest,
+    PredictResponse,
+    HealthResponse,
+    ReadinessResponse,
+    BatchPredictRequest,
+    BatchPredictResponse,
+)
+from app.utils import predict, predict_many, is_model_loaded
+from app.chunking import predict_chunked
+from app.batching import BatchResult, get_batcher, is_batching_enabled, shutdown_batcher
+from app.executor import get_inference_executor, run_inference, shutdown_executor, submit_inference
+from app.process_pool import is_process_mode, shutdown_process_pool
+from app.cache import (
+    cache_key,
+    current_model_version,
+    is_cache_enabled,
+    lookup as cache_lookup,
+    store as cache_store,
+)
+from app.coalescing import get_singleflight, is_coalescing_enabled
+from app.admission import PRIORITY_API, PRIORITY_UI, admit
+from app.metrics import observe_stage, stage_timer
+from app.startup import is_ready, mark_ready, preload_firestore, prepare_model, startup_metrics
+from app.firestore_client import build_inference_doc
+from app.persistence import enqueue_inference, enqueue_inferences, shutdown_writer
+from app.quota import shutdown_quota_store
+from app.responses import respond
 from app.dash import router as dash_router
+from app.bulk import router as bulk_router
 from app.security import require_predict_api_key, enforce_ui_quota
 
 logger = get_logger(__name__)
@@ -32,7 +61,30 @@ async def lifespan(app_: FastAPI):
     app_name = _cfg("app_name", "appname", default="App")
     app_version = _cfg("app_version", "appversion", default="0.0.0")
     logger.info(f"Iniciando {app_name} v{app_version}")
+    loop = asyncio.get_running_loop()
+    # deps pesadas do Firestore carregam em paralelo, fora do event loop
+    # (SERVING_MODE=process: só depois do fork do pool, que não deve herdar threads no meio de imports)
+    if not is_process_mode():
+        loop.run_in_executor(None, preload_firestore)
+
+    # prepare_model roda sempre numa thread deste processo (no modo process é ele que cria o pool)
+    if not _cfg("eager_load", default=True):
+        mark_ready()
+    elif _cfg("startup_mode", default="blocking") == "background":
+        # aceita health checks já; /ready fica 503 até o warm-up terminar
+        loop.run_in_executor(get_inference_executor(), prepare_model)
+    else:
+        # fora do event loop; o servidor só sobe depois do warm-up
+        await loop.run_in_executor(get_inference_executor(), prepare_model)
+    if is_process_mode():
+        loop.run_in_executor(None, preload_firestore)
     yield
+    shutdown_batcher()
+    shutdown_executor()
+    shutdown_process_pool()
+    # grava o que ainda está na fila de persistência e o estado da quota
+    shutdown_writer()
+    shutdown_quota_store()
     logger.info("Encerrando aplicação")
 
 
@@ -64,6 +116,7 @@ if os.path.exists("static"):
 
 # Routers
 app.include_router(dash_router)
+app.include_router(bulk_router)
 
 
 @app.get("/", tags=["Info"])
@@ -103,76 +156,316 @@ async def health():
         )
 
 
-def _run_prediction(payload: PredictRequest, background_tasks: BackgroundTasks) -> PredictResponse:
-    label, score, inference_time_ms = predict(payload.text)
+@app.get("/ready", response_model=ReadinessResponse, tags=["Health"])
+async def ready():
+    metrics = startup_metrics()
+    body = ReadinessResponse(
+        status="ready" if is_ready() else "starting",
+        model_ready=is_model_loaded(),
+        model_load_ms=metrics["model_load_ms"],
+        warmup_ms=metrics["warmup_ms"],
+        startup_ms=metrics["startup_ms"],
+        firestore_import_ms=metrics["firestore_import_ms"],
+        error=metrics["error"],
+    )
+    if not is_ready():
+        return JSONResponse(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, content=body.model_dump())
+    return body
 
-    score = round(float(score), 5)
-    inference_time_ms = round(float(inference_time_ms), 2)
 
-    inference_id = str(uuid.uuid4())
+def _predict_unbatched(text: str, enqueued_at: float) -> BatchResult:
+    queue_wait_ms = (time.perf_counter() - enqueued_at) * 1000
+    label, score, inference_time_ms = predict(text)
+    return BatchResult(
+        label=label,
+        score=score,
+        queue_wait_ms=queue_wait_ms,
+        compute_time_ms=inference_time_ms,
+        batch_size=1,
+    )
+
+
+def _submit_inference(text: str) -> Future:
+    """Agenda o forward pass; o Future resolve com um BatchResult."""
+    if is_batching_enabled():
+        return get_batcher().submit(text)
+    return submit_inference(_predict_unbatched, text, time.perf_counter())
+
+
+async def _infer(text: str) -> dict:
+    """Retorna label, score, inference_time_ms, queue_wait_ms, compute_time_ms e cached."""
+    start = time.perf_counter()
+    key = None
+    if is_cache_enabled():
+        key, hit = cache_lookup(text)
+        if hit is not None:
+            label, score = hit
+            return {
+                "label": label,
+                "score": score,
+                "inference_time_ms": (time.perf_counter() - start) * 1000,
+                "queue_wait_ms": None,
+                "compute_time_ms": 0.0,
+                "cached": True,
+            }
+
+    if is_coalescing_enabled():
+        if key is None:
+            key = cache_key(text, current_model_version())
+        fut, coalesced = get_singleflight().do(key, lambda: _submit_inference(text))
+        # shield: se este cliente desistir, não cancela o forward pass dos outros
+        result = await asyncio.shield(asyncio.wrap_future(fut))
+    else:
+        coalesced = False
+        result = await asyncio.wrap_future(_submit_inference(text))
+
+    inference_time_ms = result.inference_time_ms
+    queue_wait_ms = result.queue_wait_ms
+    if coalesced:
+        # quem pegou carona mede o próprio tempo de espera
+        inference_time_ms = (time.perf_counter() - start) * 1000
+        queue_wait_ms = max(0.0, inference_time_ms - result.compute_time_ms)
+
+    observe_stage("queue_wait", queue_wait_ms / 1000.0)
+    if not coalesced:
+        # carona não roda forward pass próprio
+        observe_stage("forward", result.compute_time_ms / 1000.0)
+
+    if is_cache_enabled() and not coalesced:
+        cache_store(key, result.label, result.score)
+
+    return {
+        "label": result.label,
+        "score": result.score,
+        "inference_time_ms": inference_time_ms,
+        "queue_wait_ms": queue_wait_ms,
+        "compute_time_ms": result.compute_time_ms,
+        "cached": False,
+    }
 
-    doc = {
-        "id": inference_id,
-        "text": payload.text,
-        "lang": payload.lang,
+
+async def _infer_chunked(payload: PredictRequest) -> dict:
+    """Texto inteiro em janelas: um forward pass com todas elas (sem cache/micro-batching)."""
+    start = time.perf_counter()
+    aggregation = payload.aggregation or settings.chunk_aggregation
+    label, score, compute_time_ms, chunks = await run_inference(predict_chunked, payload.text, aggregation)
+    inference_time_ms = (time.perf_counter() - start) * 1000
+    queue_wait_ms = max(0.0, inference_time_ms - compute_time_ms)
+    observe_stage("queue_wait", queue_wait_ms / 1000.0)
+    observe_stage("forward", compute_time_ms / 1000.0)
+    return {
         "label": label,
         "score": score,
         "inference_time_ms": inference_time_ms,
-        "model_version": _cfg("app_version", "appversion"),
-        "created_at": firestore.SERVER_TIMESTAMP,
+        "queue_wait_ms": queue_wait_ms,
+        "compute_time_ms": compute_time_ms,
+        "cached": False,
+        "aggregation": aggregation,
+        "chunks": chunks,
     }
 
-    background_tasks.add_task(save_inference, inference_id, doc)
 
-    return PredictResponse(
-        inference_id=inference_id,
-        label=label,
-        score=score,
-        model_version=_cfg("app_version", "appversion"),
-        inference_time_ms=inference_time_ms,
+def _round_ms(value: float | None) -> float | None:
+    return None if value is None else round(float(value), 2)
+
+
+async def _run_prediction(payload: PredictRequest) -> dict:
+    """Corpo do PredictResponse como dict: os valores já saem com os tipos do schema."""
+    if payload.chunking:
+        out = await _infer_chunked(payload)
+    else:
+        out = await _infer(payload.text)
+
+    postprocess_start = time.perf_counter()
+    label = out["label"]
+    score = round(float(out["score"]), 5)
+    inference_time_ms = round(float(out["inference_time_ms"]), 2)
+    queue_wait_ms = _round_ms(out["queue_wait_ms"])
+    compute_time_ms = _round_ms(out["compute_time_ms"])
+    cached = out["cached"]
+    chunks = out.get("chunks")
+    chunk_fields = {}
+    if chunks is not None:
+        chunk_fields = {"num_chunks": len(chunks), "aggregation": out["aggregation"]}
+
+    # cache hit também ganha inference_id próprio e é persistido
+    inference_id = str(uuid.uuid4())
+
+    doc = build_inference_doc(
+        inference_id,
+        payload.text,
+        payload.lang,
+        label,
+        score,
+        inference_time_ms,
+        _cfg("app_version", "appversion"),
+        queue_wait_ms=queue_wait_ms,
+        compute_time_ms=compute_time_ms,
+        cached=cached,
+        **chunk_fields,
     )
+    observe_stage("postprocess", time.perf_counter() - postprocess_start)
+
+    # não bloqueia: a thread de persistência grava em lote
+    with stage_timer("persist_enqueue"):
+        enqueue_inference(inference_id, doc)
+
+    return {
+        "inference_id": inference_id,
+        "label": label,
+        "score": score,
+        "model_version": _cfg("app_version", "appversion"),
+        "inference_time_ms": inference_time_ms,
+        "queue_wait_ms": queue_wait_ms,
+        "compute_time_ms": compute_time_ms,
+        "cached": cached,
+        "num_chunks": chunk_fields.get("num_chunks"),
+        "aggregation": chunk_fields.get("aggregation"),
+        "chunks": chunks if chunks is not None and payload.return_chunks else None,
+    }
 
 
 # API "puro" (COM senha)
 @app.post("/predict", response_model=PredictResponse, tags=["Prediction"])
 async def predict_sentiment(
     payload: PredictRequest,
-    background_tasks: BackgroundTasks,
     _auth: bool = Depends(require_predict_api_key),
 ):
-    try:
-        logger.info(f"Predição(API): text_len={len(payload.text)}, lang={payload.lang}")
-        return _run_prediction(payload, background_tasks)
-    except ValueError as e:
-        logger.warning(f"Validação: {e}")
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
-    except Exception as e:
-        logger.error(f"Erro: {e}", exc_info=True)
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Erro interno",
-        )
+    # sob sobrecarga: 503 + Retry-After antes de entrar na fila de inferência
+    async with admit(PRIORITY_API):
+        try:
+            logger.info(f"Predição(API): text_len={len(payload.text)}, lang={payload.lang}", extra={"sampled": True})
+            return respond(await _run_prediction(payload))
+        except ValueError as e:
+            logger.warning(f"Validação: {e}")
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        except Exception as e:
+            logger.error(f"Erro: {e}", exc_info=True)
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Erro interno",
+            )
 
 
 # UI (SEM senha, mas com quota/bloqueio)
 @app.post("/ui/predict", response_model=PredictResponse, tags=["UI"])
 async def ui_predict_sentiment(
     payload: PredictRequest,
-    background_tasks: BackgroundTasks,
-    _quota_ok: bool = Depends(enforce_ui_quota),
+    request: Request,
 ):
-    try:
-        logger.info(f"Predição(UI): text_len={len(payload.text)}, lang={payload.lang}")
-        return _run_prediction(payload, background_tasks)
-    except ValueError as e:
-        logger.warning(f"Validação UI: {e}")
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
-    except Exception as e:
-        logger.error(f"Erro UI: {e}", exc_info=True)
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Erro interno",
+    # anônimo: é descartado antes do tráfego da API
+    async with admit(PRIORITY_UI):
+        # quota só depois da admissão: um 503 não gasta a cota do usuário
+        await run_in_threadpool(enforce_ui_quota, request)
+        try:
+            logger.info(f"Predição(UI): text_len={len(payload.text)}, lang={payload.lang}", extra={"sampled": True})
+            return respond(await _run_prediction(payload))
+        except ValueError as e:
+            logger.warning(f"Validação UI: {e}")
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        except Exception as e:
+            logger.error(f"Erro UI: {e}", exc_info=True)
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Erro interno",
+            )
+
+
+async def _predict_many_cached(texts: list[str]) -> list[tuple[str, float, float, float, bool]]:
+    """predict_many com cache: só os misses vão para o modelo."""
+    if not is_cache_enabled():
+        outputs = await run_inference(predict_many, texts, _cfg("batch_max_size", default=32))
+        return [(*out, False) for out in outputs]
+
+    results = [None] * len(texts)
+    miss_idx, miss_keys = [], []
+    for i, text in enumerate(texts):
+        key, hit = cache_lookup(text)
+        if hit is None:
+            miss_idx.append(i)
+            miss_keys.append(key)
+        else:
+            results[i] = (hit[0], hit[1], 0.0, 0.0, True)
+
+    if miss_idx:
+        outputs = await run_inference(
+            predict_many, [texts[i] for i in miss_idx], _cfg("batch_max_size", default=32)
+        )
+        for i, key, out in zip(miss_idx, miss_keys, outputs):
+            cache_store(key, out[0], out[1])
+            results[i] = (*out, False)
+    return results
+
+
+async def _run_batch_prediction(payload: BatchPredictRequest) -> dict:
+    start = time.perf_counter()
+    texts = [item.text for item in payload.items]
+    outputs = await _predict_many_cached(texts)
+    total_time_ms = (time.perf_counter() - start) * 1000
+
+    model_version = _cfg("app_version", "appversion")
+
+    items = []
+    docs = []
+    # a soma das frações por item é exatamente a soma dos sub-batches
+    compute_time_ms = sum(out[2] for out in outputs)
+    for req, (label, score, item_time_ms, batch_time_ms, cached) in zip(payload.items, outputs):
+        inference_id = str(uuid.uuid4())
+        score = round(float(score), 5)
+        item_time_ms = round(float(item_time_ms), 2)
+
+        docs.append(
+            (
+                inference_id,
+                build_inference_doc(
+                    inference_id, req.text, req.lang, label, score, item_time_ms, model_version, cached=cached
+                ),
+            )
         )
+        items.append(
+            {
+                "inference_id": inference_id,
+                "label": label,
+                "score": score,
+                "inference_time_ms": item_time_ms,
+                "batch_time_ms": round(float(batch_time_ms), 2),
+                "cached": cached,
+            }
+        )
+
+    # entra na fila de persistência (batched writes)
+    with stage_timer("persist_enqueue"):
+        enqueue_inferences(docs)
+
+    return {
+        "model_version": model_version,
+        "count": len(items),
+        "total_time_ms": round(total_time_ms, 2),
+        "compute_time_ms": round(compute_time_ms, 2),
+        "items": items,
+    }
+
+
+# API "puro" em lote (COM senha)
+@app.post("/predict/batch", response_model=BatchPredictResponse, tags=["Prediction"])
+async def predict_sentiment_batch(
+    payload: BatchPredictRequest,
+    _auth: bool = Depends(require_predict_api_key),
+):
+    # o lote paga um slot por texto: 256 itens não passam como se fossem 1
+    async with admit(PRIORITY_API, cost=len(payload.items)):
+        try:
+            logger.info(f"Predição(API batch): items={len(payload.items)}", extra={"sampled": True})
+            return respond(await _run_batch_prediction(payload))
+        except ValueError as e:
+            logger.warning(f"Validação batch: {e}")
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        except Exception as e:
+            logger.error(f"Erro batch: {e}", exc_info=True)
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Erro interno",
+            )
 
 
 @app.exception_handler(Exception)
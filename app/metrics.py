@@ -0,0 +1,200 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+# etapas de uma requisição de predição (label "stage" do histograma)
+STAGES = ("auth", "quota", "tokenize", "queue_wait", "forward", "postprocess", "persist_enqueue")
+
+# segundos: de 0.1 ms (auth/enqueue) até 10 s (forward pass de 512 tokens sob carga)
+LATENCY_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _format_value(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, int):
+        return str(value)
+    return repr(float(value))
+
+
+def _format_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    parts = []
+    for k, v in labels.items():
+        v = str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        parts.append(f'{k}="{v}"')
+    return "{" + ",".join(parts) + "}"
+
+
+class Histogram:
+    """
+    Histograma cumulativo no formato do Prometheus, uma série por combinação
+    de labels. observe() é thread-safe (event loop, batcher e executor).
+    """
+
+    def __init__(self, name: str, help_text: str, buckets, label_names: tuple[str, ...] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(sorted(float(b) for b in buckets))
+        self.label_names = tuple(label_names)
+        # labels -> [contagem por bucket (não cumulativa) + overflow, soma, total]
+        self._series: dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def snapshot(self, *label_values: str) -> dict:
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                return {"count": 0, "sum": 0.0}
+            return {"count": series[2], "sum": series[1]}
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {k: ([*v[0]], v[1], v[2]) for k, v in self._series.items()}
+        for label_values, (counts, total, count) in sorted(series.items()):
+            labels = dict(zip(self.label_names, label_values))
+            cumulative = 0
+            for bound, n in zip((*self.buckets, float("inf")), counts):
+                cumulative += n
+                le = _format_labels({**labels, "le": _format_value(bound)})
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {count}")
+        return lines
+
+
+stage_seconds = Histogram(
+    "sentiment_stage_duration_seconds",
+    "Tempo por etapa da requisição de predição.",
+    LATENCY_BUCKETS,
+    ("stage",),
+)
+batch_size = Histogram(
+    "sentiment_batch_size",
+    "Textos por forward pass do micro-batcher.",
+    BATCH_SIZE_BUCKETS,
+)
+
+
+def observe_stage(stage: str, seconds: float):
+    stage_seconds.observe(max(0.0, float(seconds)), stage)
+
+
+@contextmanager
+def stage_timer(stage: str):
+    """Mede o bloco com perf_counter (monotônico) e registra em stage_seconds."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(stage, time.perf_counter() - start)
+
+
+def _metric(lines: list[str], name: str, kind: str, help_text: str, samples):
+    samples = [(labels, value) for labels, value in samples if value is not None]
+    if not samples:
+        return
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} {kind}")
+    for labels, value in samples:
+        lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+
+
+def _ms_to_s(value):
+    return None if value is None else float(value) / 1000.0
+
+
+def _runtime_lines(admission: dict | None = None) -> list[str]:
+    """
+    Gauges e contadores lidos dos stats() de cada componente no momento do scrape.
+    admission: snapshot tirado no event loop (o controller não tem lock); sem ele, lê aqui.
+    """
+    # import tardio: os componentes importam este módulo para registrar etapas
+    from app.admission import get_admission
+    from app.batching import batcher_stats
+    from app.cache import get_cache
+    from app.coalescing import get_singleflight
+    from app.logger import logging_stats
+    from app.persistence import writer_stats
+    from app.startup import is_ready, startup_metrics
+
+    startup = startup_metrics()
+    cache = get_cache().stats()
+    # só lê os singletons que já existem: o scrape não cria batcher/writer (nem importa torch)
+    batcher = batcher_stats()
+    persistence = writer_stats()
+    if admission is None:
+        admission = get_admission().stats()
+    coalescing = get_singleflight().stats()
+
+    lines: list[str] = []
+    _metric(lines, "sentiment_ready", "gauge", "1 depois da carga e do warm-up.", [({}, is_ready())])
+    _metric(lines, "sentiment_model_load_seconds", "gauge", "Tempo de carga do modelo.",
+            [({}, _ms_to_s(startup["model_load_ms"]))])
+    _metric(lines, "sentiment_warmup_seconds", "gauge", "Tempo do warm-up.", [({}, _ms_to_s(startup["warmup_ms"]))])
+
+    _metric(lines, "sentiment_cache_hits_total", "counter", "Hits do cache de predições.", [({}, cache["hits"])])
+    _metric(lines, "sentiment_cache_misses_total", "counter", "Misses do cache de predições.", [({}, cache["misses"])])
+    _metric(lines, "sentiment_cache_hit_ratio", "gauge", "hits / (hits + misses).", [({}, cache["hit_rate"])])
+    _metric(lines, "sentiment_cache_entries", "gauge", "Entradas no cache.", [({}, cache["size"])])
+    _metric(lines, "sentiment_coalesced_total", "counter", "Requisições que pegaram carona num forward pass em voo.",
+            [({}, coalescing["coalesced"])])
+
+    _metric(lines, "sentiment_queue_depth", "gauge", "Itens esperando em cada fila de background.", [
+        ({"queue": "batcher"}, batcher.get("queue_depth")),
+        ({"queue": "admission"}, admission["queue_depth"]),
+        ({"queue": "persistence"}, persistence.get("queue_depth")),
+    ])
+    _metric(lines, "sentiment_batcher_batches_total", "counter", "Forward passes do micro-batcher.",
+            [({}, batcher.get("batches_total"))])
+    _metric(lines, "sentiment_batcher_padding_efficiency", "gauge", "Tokens reais / tokens processados.",
+            [({}, batcher.get("padding_efficiency"))])
+
+    _metric(lines, "sentiment_admission_in_flight", "gauge", "Inferências em voo.", [({}, admission["in_flight"])])
+    _metric(lines, "sentiment_admission_shed_total", "counter", "Requisições descartadas (503) por prioridade.",
+            [({"priority": p}, n) for p, n in sorted(admission["shed"].items())])
+
+    _metric(lines, "sentiment_persist_docs_written_total", "counter", "Documentos gravados no Firestore.",
+            [({}, persistence.get("docs_written"))])
+    _metric(lines, "sentiment_persist_docs_dropped_total", "counter", "Documentos descartados com a fila cheia.",
+            [({}, persistence.get("docs_dropped"))])
+    _metric(lines, "sentiment_persist_docs_failed_total", "counter", "Documentos perdidos depois das retentativas.",
+            [({}, persistence.get("docs_failed"))])
+
+    logs = logging_stats()
+    _metric(lines, "sentiment_log_queue_depth", "gauge", "Registros de log esperando a thread de escrita.",
+            [({}, logs.get("queue_depth"))])
+    _metric(lines, "sentiment_log_dropped_total", "counter", "Registros de log descartados com a fila cheia.",
+            [({}, logs.get("records_dropped"))])
+    _metric(lines, "sentiment_log_sampled_out_total", "counter", "Linhas INFO descartadas pela amostragem.",
+            [({}, logs["sampled_out"])])
+    return lines
+
+
+def render_metrics(admission: dict | None = None) -> str:
+    lines = stage_seconds.render() + batch_size.render() + _runtime_lines(admission)
+    return "\n".join(lines) + "\n"
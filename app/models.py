@@ -1,9 +1,29 @@
-from pydantic import BaseModel, Field
+from typing import Literal
+
+from pydantic import BaseModel, Field, model_validator
+
+from app.config import settings
 
 
 class PredictRequest(BaseModel):
     text: str = Field(..., min_length=1, max_length=5000, description="Texto para análise")
     lang: str | None = Field("en", description="Idioma (en apenas)")
+    chunking: bool = Field(
+        False, description="Textos longos: pontua janelas sobrepostas de tokens em vez de truncar em 512"
+    )
+    aggregation: Literal["mean_logits", "length_weighted"] | None = Field(
+        None, description="Como combinar as janelas (default: CHUNK_AGGREGATION)"
+    )
+    return_chunks: bool = Field(False, description="Inclui o resultado de cada janela na resposta")
+
+
+class ChunkDetail(BaseModel):
+    index: int
+    start_char: int = Field(..., description="Início da janela no texto (caracteres)")
+    end_char: int = Field(..., description="Fim da janela no texto (caracteres)")
+    tokens: int = Field(..., description="Tokens da janela (com especiais)")
+    label: str
+    score: float
 
 
 class PredictResponse(BaseModel):
@@ -12,6 +32,58 @@ class PredictResponse(BaseModel):
     score: float = Field(..., description="Confiança 0-1")
     model_version: str = Field(..., description="Versão do modelo/serviço")
     inference_time_ms: float = Field(..., description="Tempo de inferência (ms)")
+    queue_wait_ms: float | None = Field(None, description="Espera na fila do micro-batching (ms)")
+    compute_time_ms: float | None = Field(None, description="Tempo do forward pass (ms)")
+    cached: bool = Field(False, description="Resultado veio do cache (sem forward pass)")
+    num_chunks: int | None = Field(None, description="Janelas pontuadas (só com chunking)")
+    aggregation: str | None = Field(None, description="Agregação usada (só com chunking)")
+    chunks: list[ChunkDetail] | None = Field(None, description="Resultado por janela (return_chunks)")
+
+
+_CHUNKING_FIELDS = ("chunking", "aggregation", "return_chunks")
+
+
+class BatchPredictItemRequest(BaseModel):
+    """Item do /predict/batch e linha do /predict/stream: sem as opções de chunking do /predict."""
+
+    text: str = Field(..., min_length=1, max_length=5000, description="Texto para análise")
+    lang: str | None = Field("en", description="Idioma (en apenas)")
+
+    @model_validator(mode="before")
+    @classmethod
+    def _reject_chunking(cls, data):
+        # antes eram aceitas e ignoradas em silêncio: melhor um 422 do que um resultado truncado
+        if isinstance(data, dict):
+            used = [f for f in _CHUNKING_FIELDS if f in data]
+            if used:
+                raise ValueError(f"{', '.join(used)}: chunking só é suportado no /predict")
+        return data
+
+
+class BatchPredictRequest(BaseModel):
+    items: list[BatchPredictItemRequest] = Field(
+        ...,
+        min_length=1,
+        max_length=settings.predict_batch_max_items,
+        description="Textos para análise (em lote)",
+    )
+
+
+class BatchPredictItem(BaseModel):
+    inference_id: str
+    label: str = Field(..., description="Sentimento: positive, neutral, negative")
+    score: float = Field(..., description="Confiança 0-1")
+    inference_time_ms: float = Field(..., description="Tempo do sub-batch dividido pelos seus itens (ms)")
+    batch_time_ms: float = Field(..., description="Tempo do sub-batch em que o item rodou (ms)")
+    cached: bool = Field(False, description="Resultado veio do cache (sem forward pass)")
+
+
+class BatchPredictResponse(BaseModel):
+    model_version: str = Field(..., description="Versão do modelo/serviço")
+    count: int
+    total_time_ms: float = Field(..., description="Tempo total do lote, incluindo tokenização (ms)")
+    compute_time_ms: float = Field(..., description="Soma dos forward passes (ms)")
+    items: list[BatchPredictItem]
 
 
 class HealthResponse(BaseModel):
@@ -20,6 +92,16 @@ class HealthResponse(BaseModel):
     model_ready: bool
 
 
+class ReadinessResponse(BaseModel):
+    status: str = Field(..., description="ready | starting")
+    model_ready: bool
+    model_load_ms: float | None = Field(None, description="Tempo de carga do modelo (ms)")
+    warmup_ms: float | None = Field(None, description="Tempo do warm-up (ms)")
+    startup_ms: float | None = Field(None, description="Carga + warm-up (ms)")
+    firestore_import_ms: float | None = Field(None, description="Import do client Firestore (ms)")
+    error: str | None = None
+
+
 class ErrorResponse(BaseModel):
     error: str
     detail: str
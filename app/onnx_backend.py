@@ -0,0 +1,70 @@
+import os
+
+import numpy as np
+
+ONNX_SUBDIR = "onnx"
+ONNX_FILE = "model.onnx"
+ONNX_INT8_FILE = "model.int8.onnx"
+
+
+def onnx_model_path(model_dir: str, quantized: bool = False) -> str:
+    return os.path.join(model_dir, ONNX_SUBDIR, ONNX_INT8_FILE if quantized else ONNX_FILE)
+
+
+def softmax(logits: np.ndarray) -> np.ndarray:
+    shifted = logits - logits.max(axis=-1, keepdims=True)
+    exp = np.exp(shifted)
+    return exp / exp.sum(axis=-1, keepdims=True)
+
+
+class OnnxSentimentPipeline:
+    """
+    Substituto do pipeline("sentiment-analysis") rodando num grafo ONNX.
+
+    Mesma interface usada em app/utils.py: pipe(texts, truncation=..., max_length=...,
+    batch_size=...) -> [{"label", "score"}, ...], além de .tokenizer e .config.
+    """
+
+    def __init__(self, model_path: str, tokenizer_dir: str, intra_op_threads: int | None = None):
+        import onnxruntime as ort
+        from transformers import AutoConfig, AutoTokenizer
+
+        if not os.path.exists(model_path):
+            raise RuntimeError(
+                f"Modelo ONNX não encontrado em {model_path}. "
+                "Gere com: python training/export_onnx.py"
+            )
+
+        self.model_path = model_path
+        self.tokenizer = AutoTokenizer.from_pretrained(tokenizer_dir)
+        self.config = AutoConfig.from_pretrained(tokenizer_dir)
+
+        opts = ort.SessionOptions()
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if intra_op_threads:
+            opts.intra_op_num_threads = int(intra_op_threads)
+        self.session = ort.InferenceSession(model_path, opts, providers=["CPUExecutionProvider"])
+        self._input_names = [i.name for i in self.session.get_inputs()]
+
+    def logits(self, features: list[dict]) -> np.ndarray:
+        batch = self.tokenizer.pad(features, padding=True, return_tensors="np")
+        feed = {name: np.asarray(batch[name], dtype=np.int64) for name in self._input_names}
+        return self.session.run(["logits"], feed)[0]
+
+    def __call__(self, inputs, truncation: bool = True, max_length: int = 512, batch_size: int | None = None, **_):
+        texts = [inputs] if isinstance(inputs, str) else list(inputs)
+        enc = self.tokenizer(texts, truncation=truncation, max_length=max_length)
+        features = [
+            {name: enc[name][i] for name in self._input_names if name in enc}
+            for i in range(len(texts))
+        ]
+
+        step = max(1, int(batch_size or len(features) or 1))
+        id2label = self.config.id2label
+        outputs = []
+        for start in range(0, len(features), step):
+            probs = softmax(self.logits(features[start:start + step]))
+            for row in probs:
+                i = int(row.argmax())
+                outputs.append({"label": id2label[i], "score": float(row[i])})
+        return outputs
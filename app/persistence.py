@@ -0,0 +1,314 @@
+import os
+import queue
+import random
+import threading
+import time
+from datetime import datetime, timezone
+
+from app.config import settings
+from app.firestore_client import FIRESTORE_BATCH_LIMIT, get_db
+from app.logger import get_logger
+from app.rollups import GRANULARITIES, rollup_collection, rollup_ids, rollup_writes
+
+logger = get_logger(__name__)
+
+# com rollups, cada lote ainda precisa de espaço para os incrementos (um por granularidade e model_version)
+ROLLUP_RESERVED_OPS = len(GRANULARITIES) * 4
+
+
+def _firestore_enabled() -> bool:
+    return os.getenv("FIRESTORE_ENABLED", "true").strip().lower() == "true"
+
+
+def _collection_name() -> str:
+    return os.getenv("FIRESTORE_COLLECTION", "inferences").strip() or "inferences"
+
+
+class FirestoreWriter:
+    """
+    Fila limitada de documentos na frente do Firestore.
+
+    Uma thread junta documentos até max_batch_size ou até flush_interval_ms
+    desde o primeiro da fila e grava tudo num único batched write (até 500
+    operações). Falha no commit é re-tentada com backoff exponencial; depois
+    de max_retries o lote é descartado e contado em docs_failed.
+
+    Fila cheia não bloqueia o request: o documento é descartado (docs_dropped),
+    a não ser que o chamador peça block=True.
+
+    Com rollups=True, o mesmo batched write incrementa os contadores por
+    minuto/hora/dia (app/rollups.py): os agregados só contam o que foi gravado.
+    Se documentos + incrementos passam de 500 operações, o lote é dividido em
+    grupos que cabem num commit cada; cada grupo é atômico e re-tentado
+    sozinho. Increment não é idempotente e um erro (ex.: deadline no cliente)
+    não garante que o servidor não aplicou o commit: antes de re-tentar, o
+    writer lê o primeiro documento do grupo, que vai no mesmo batch e serve
+    de marcador. Se ele existe, o grupo já foi gravado e não é re-enviado.
+    """
+
+    def __init__(
+        self,
+        db_factory=None,
+        collection: str | None = None,
+        max_queue: int = 10000,
+        max_batch_size: int = FIRESTORE_BATCH_LIMIT,
+        flush_interval_ms: float = 1000.0,
+        max_retries: int = 3,
+        retry_backoff_ms: float = 200.0,
+        rollups: bool = False,
+    ):
+        self._db_factory = db_factory or get_db
+        self._collection = collection
+        self.rollups = bool(rollups)
+        limit = FIRESTORE_BATCH_LIMIT - (ROLLUP_RESERVED_OPS if self.rollups else 0)
+        self.max_batch_size = max(1, min(int(max_batch_size), limit))
+        self.flush_interval_s = max(0.0, float(flush_interval_ms)) / 1000.0
+        self.max_retries = max(0, int(max_retries))
+        self.retry_backoff_s = max(0.0, float(retry_backoff_ms)) / 1000.0
+
+        self._queue: queue.Queue = queue.Queue(maxsize=max(1, int(max_queue)))
+        self._stopping = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+
+        self.docs_enqueued = 0
+        self.docs_written = 0
+        self.docs_dropped = 0
+        self.docs_failed = 0
+        self.flushes_total = 0
+        self.retries_total = 0
+        self.commits_recovered = 0
+        self.last_flush_size = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self._flush_ms_total = 0.0
+        self.last_lag_ms = 0.0
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopping.clear()
+                self._thread = threading.Thread(target=self._run, name="firestore-writer", daemon=True)
+                self._thread.start()
+
+    def enqueue(self, doc_id: str, data: dict, block: bool = False, timeout: float | None = None) -> bool:
+        if not doc_id or not str(doc_id).strip():
+            logger.error("doc_id vazio em enqueue")
+            return False
+
+        self._ensure_started()
+        try:
+            self._queue.put((str(doc_id), data, time.perf_counter()), block=block, timeout=timeout)
+        except queue.Full:
+            with self._stats_lock:
+                self.docs_dropped += 1
+            logger.warning("Fila de persistência cheia: documento descartado")
+            return False
+
+        with self._stats_lock:
+            self.docs_enqueued += 1
+        return True
+
+    def enqueue_many(self, docs: list[tuple[str, dict]], block: bool = False, timeout: float | None = None) -> int:
+        return sum(1 for doc_id, data in docs if self.enqueue(doc_id, data, block=block, timeout=timeout))
+
+    def drain(self, timeout: float | None = 10.0):
+        """Grava o que ainda está na fila e para a thread."""
+        if self._thread is None:
+            return
+        self._stopping.set()
+        try:
+            # acorda a thread se ela estiver parada no get()
+            self._queue.put_nowait(None)
+        except queue.Full:
+            pass
+        self._thread.join(timeout=timeout)
+        if self._thread.is_alive():
+            logger.warning(f"Persistência não drenou a tempo ({self._queue.qsize()} docs na fila)")
+        self._thread = None
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            flushes = self.flushes_total
+            return {
+                "queue_depth": self._queue.qsize(),
+                "queue_max": self._queue.maxsize,
+                "docs_enqueued": self.docs_enqueued,
+                "docs_written": self.docs_written,
+                "docs_dropped": self.docs_dropped,
+                "docs_failed": self.docs_failed,
+                "flushes_total": flushes,
+                "retries_total": self.retries_total,
+                "commits_recovered": self.commits_recovered,
+                "last_flush_size": self.last_flush_size,
+                "last_flush_ms": self.last_flush_ms,
+                "avg_flush_ms": (self._flush_ms_total / flushes) if flushes else 0.0,
+                "max_flush_ms": self.max_flush_ms,
+                "last_lag_ms": self.last_lag_ms,
+            }
+
+    def _collect(self, first) -> list:
+        batch = [first]
+        deadline = first[2] + self.flush_interval_s
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                if remaining > 0 and not self._stopping.is_set():
+                    item = self._queue.get(timeout=remaining)
+                else:
+                    # prazo estourado (ou drenando): só pega o que já está na fila
+                    item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                batch.append(item)
+
+        return batch
+
+    def _run(self):
+        while True:
+            try:
+                first = self._queue.get(timeout=0.5)
+            except queue.Empty:
+                if self._stopping.is_set():
+                    return
+                continue
+            if first is None:
+                if self._stopping.is_set() and self._queue.empty():
+                    return
+                continue
+            self._flush(self._collect(first))
+
+    def _atomic_groups(self, batch: list) -> list[list]:
+        """Divide o lote em grupos cujos docs + incrementos cabem num batched write."""
+        if not self.rollups:
+            return [batch]
+        now = datetime.now(timezone.utc)
+        groups, current, keys = [], [], set()
+        for item in batch:
+            item_keys = set(rollup_ids(item[1], now))
+            if current and len(current) + 1 + len(keys | item_keys) > FIRESTORE_BATCH_LIMIT:
+                groups.append(current)
+                current, keys = [], set()
+            current.append(item)
+            keys |= item_keys
+        if current:
+            groups.append(current)
+        return groups
+
+    def _commit(self, group: list):
+        db = self._db_factory()
+        col = db.collection(self._collection or _collection_name())
+        wb = db.batch()
+        for doc_id, data, _ in group:
+            wb.set(col.document(doc_id), data)
+        if self.rollups:
+            rollups = db.collection(rollup_collection())
+            for rollup_id, data in rollup_writes([data for _, data, _ in group], datetime.now(timezone.utc)):
+                wb.set(rollups.document(rollup_id), data, merge=True)
+        wb.commit()
+
+    def _already_applied(self, group: list) -> bool:
+        # batched write é atômico: o primeiro documento existe só se o grupo inteiro foi aplicado
+        db = self._db_factory()
+        doc_id = group[0][0]
+        return db.collection(self._collection or _collection_name()).document(doc_id).get().exists
+
+    def _commit_with_retries(self, group: list) -> bool:
+        attempt = 0
+        while True:
+            try:
+                if attempt and self.rollups and self._already_applied(group):
+                    # a falha anterior veio depois do servidor aplicar: re-enviar somaria os Increment de novo
+                    logger.warning(f"Lote de {len(group)} docs já estava gravado: retentativa descartada")
+                    with self._stats_lock:
+                        self.commits_recovered += 1
+                    return True
+                self._commit(group)
+                return True
+            except Exception as e:
+                if attempt >= self.max_retries:
+                    logger.error(
+                        f"Falha ao gravar lote no Firestore após {attempt + 1} tentativas "
+                        f"({len(group)} docs descartados): {e}",
+                        exc_info=True,
+                    )
+                    return False
+                # backoff exponencial com jitter
+                delay = self.retry_backoff_s * (2 ** attempt) * (0.5 + random.random())
+                logger.warning(f"Falha no batched write (tentativa {attempt + 1}), nova tentativa em {delay:.2f}s: {e}")
+                with self._stats_lock:
+                    self.retries_total += 1
+                attempt += 1
+                time.sleep(delay)
+
+    def _flush(self, batch: list):
+        started = time.perf_counter()
+        written = failed = 0
+        for group in self._atomic_groups(batch):
+            if self._commit_with_retries(group):
+                written += len(group)
+            else:
+                failed += len(group)
+
+        finished = time.perf_counter()
+        flush_ms = (finished - started) * 1000.0
+        with self._stats_lock:
+            self.flushes_total += 1
+            self.last_flush_size = len(batch)
+            self.last_flush_ms = flush_ms
+            self.max_flush_ms = max(self.max_flush_ms, flush_ms)
+            self._flush_ms_total += flush_ms
+            # do enfileiramento do doc mais antigo até o fim do commit
+            self.last_lag_ms = (finished - batch[0][2]) * 1000.0
+            self.docs_written += written
+            self.docs_failed += failed
+
+
+_writer: FirestoreWriter | None = None
+_writer_lock = threading.Lock()
+
+
+def get_writer() -> FirestoreWriter:
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = FirestoreWriter(
+                    max_queue=settings.persist_queue_max,
+                    max_batch_size=settings.persist_batch_size,
+                    flush_interval_ms=settings.persist_flush_ms,
+                    max_retries=settings.persist_max_retries,
+                    retry_backoff_ms=settings.persist_retry_backoff_ms,
+                    rollups=settings.rollups_enabled,
+                )
+    return _writer
+
+
+def writer_stats() -> dict:
+    """stats() do writer, se já existir (não cria o singleton)."""
+    writer = _writer
+    return writer.stats() if writer is not None else {}
+
+
+def shutdown_writer(timeout: float | None = None):
+    global _writer
+    if _writer is not None:
+        _writer.drain(timeout=settings.persist_drain_seconds if timeout is None else timeout)
+        _writer = None
+
+
+def enqueue_inference(doc_id: str, data: dict) -> bool:
+    if not _firestore_enabled():
+        return False
+    return get_writer().enqueue(doc_id, data)
+
+
+def enqueue_inferences(docs: list[tuple[str, dict]], block: bool = False) -> int:
+    if not _firestore_enabled() or not docs:
+        return 0
+    return get_writer().enqueue_many(docs, block=block)
@@ -0,0 +1,184 @@
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from app.config import settings
+from app.logger import get_logger
+
+logger = get_logger(__name__)
+
+_pool: ProcessPoolExecutor | None = None
+_pids: list[int] = []
+_lock = threading.Lock()
+_restarts = 0
+# parâmetros explícitos do último start (recriação após worker morto usa os mesmos)
+_options: dict = {}
+
+
+def available_cores() -> int:
+    try:
+        # respeita taskset/cpuset do container
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def is_process_mode() -> bool:
+    return settings.serving_mode == "process"
+
+
+def process_workers() -> int:
+    if settings.process_workers > 0:
+        return int(settings.process_workers)
+    return available_cores()
+
+
+def _init_worker(threads: int, warmup: bool, ready):
+    """Roda em cada processo logo após o fork: o modelo já está na memória herdada."""
+    start = time.perf_counter()
+    from app import utils
+
+    try:
+        import torch
+
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+
+    if utils.MODEL_BACKEND != "torch":
+        # sessões do onnxruntime não sobrevivem ao fork (thread pool interno): recria aqui
+        utils._pipe = None
+    utils.load_model()
+    if warmup:
+        utils.warm_up(settings.warmup_lengths, settings.warmup_batch_sizes)
+    ready.put((os.getpid(), (time.perf_counter() - start) * 1000))
+
+
+def _wait_ready(ready, probe, n: int, timeout: float) -> list[int]:
+    """PIDs dos n workers prontos; desiste assim que o pool quebra, sem esperar o timeout."""
+    deadline = time.monotonic() + timeout
+    pids = []
+    while len(pids) < n:
+        try:
+            pid, _ms = ready.get(timeout=0.2)
+        except queue.Empty:
+            if probe.done() and probe.exception() is not None:
+                raise probe.exception()
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"Pool de inferência: {len(pids)}/{n} processos prontos em {timeout:.0f} s")
+            continue
+        pids.append(pid)
+    return pids
+
+
+def start_process_pool(timeout: float = 300.0, workers: int | None = None, warmup: bool | None = None) -> float:
+    """
+    Sobe o pool de inferência com fork depois da carga do modelo: os workers
+    herdam os pesos (copy-on-write; com MODEL_MMAP, páginas do próprio arquivo)
+    em vez de cada um carregar o seu. Bloqueia até todos terminarem o warm-up.
+    workers/warmup sobrepõem PROCESS_WORKERS/WARMUP_ENABLED sem mexer em settings.
+    Retorna o tempo (ms) até o pool ficar pronto.
+    """
+    global _pool
+    from app import utils
+    from app.executor import torch_threads_per_worker
+
+    with _lock:
+        if _pool is not None:
+            return 0.0
+
+        start = time.perf_counter()
+        utils.load_model()
+
+        if workers is not None or warmup is not None:
+            _options.update(workers=workers, warmup=warmup)
+        n = max(1, int(_options.get("workers") or process_workers()))
+        warmup = _options.get("warmup")
+        ctx = multiprocessing.get_context("fork")
+        ready = ctx.Queue()
+        pool = ProcessPoolExecutor(
+            max_workers=n,
+            mp_context=ctx,
+            initializer=_init_worker,
+            initargs=(
+                torch_threads_per_worker(n),
+                settings.warmup_enabled if warmup is None else warmup,
+                ready,
+            ),
+        )
+        try:
+            # com fork, o primeiro submit cria todos os processos de uma vez
+            probe = pool.submit(os.getpid)
+            _pids[:] = _wait_ready(ready, probe, n, timeout)
+        except BaseException:
+            # worker que falhou no initializer (modelo, sessão ONNX) quebra o pool:
+            # não deixa processos nem o executor para trás
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+        _pool = pool
+
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    logger.info(f"✅ Pool de inferência: {n} processos (fork após a carga) em {elapsed_ms:.0f} ms")
+    return elapsed_ms
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    if _pool is None:
+        start_process_pool()
+    return _pool
+
+
+def _discard_broken(pool: ProcessPoolExecutor):
+    """
+    Um worker morreu (OOM killer, segfault): o ProcessPoolExecutor inteiro fica
+    inutilizável. Descarta o pool para o próximo uso recriá-lo (fork + warm-up).
+    """
+    global _pool, _restarts
+    with _lock:
+        if _pool is not pool:
+            return  # outra thread já descartou
+        _pool = None
+        _pids.clear()
+        _restarts += 1
+    pool.shutdown(wait=False, cancel_futures=True)
+    logger.error("❌ Pool de inferência quebrado (worker morreu): recriando")
+
+
+def run_in_pool(fn, *args, **kwargs):
+    """
+    Chamada bloqueante de fn num worker do pool (fn precisa ser importável).
+    Se o pool quebrar, recria e tenta de novo uma vez; se quebrar de novo
+    (ex.: a própria chamada derruba o worker), propaga o BrokenProcessPool.
+    """
+    for attempt in range(2):
+        pool = get_process_pool()
+        try:
+            return pool.submit(fn, *args, **kwargs).result()
+        except BrokenProcessPool:
+            _discard_broken(pool)
+            if attempt:
+                raise
+
+
+def shutdown_process_pool(wait: bool = True):
+    global _pool
+    with _lock:
+        if _pool is not None:
+            _pool.shutdown(wait=wait, cancel_futures=True)
+            _pool = None
+            _pids.clear()
+        _options.clear()
+
+
+def stats() -> dict:
+    return {
+        "serving_mode": settings.serving_mode,
+        "process_workers": process_workers() if is_process_mode() else 0,
+        "pids": list(_pids),
+        "restarts": _restarts,
+        "available_cores": available_cores(),
+    }
@@ -0,0 +1,418 @@
+import os
+import threading
+from abc import ABC, abstractmethod
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+
+from app.config import settings
+from app.firestore_client import (
+    FIRESTORE_BATCH_LIMIT,
+    consume_ui_quota as consume_ui_quota_firestore,
+    get_db,
+    get_firestore,
+    ui_quota_collection,
+)
+from app.logger import get_logger
+from app.quota_rules import QuotaRules, apply_quota_rules, ip_hash, to_utc
+
+logger = get_logger(__name__)
+
+_TIMESTAMP_FIELDS = ("cooldown_until", "burst_block_until", "last_request_at")
+
+
+def _firestore_enabled() -> bool:
+    return os.getenv("FIRESTORE_ENABLED", "true").strip().lower() == "true"
+
+
+@dataclass
+class _QuotaEntry:
+    state: dict = field(default_factory=dict)
+    # consumo local ainda não sincronizado (no dia de state["day"] / state["cooldown_day"])
+    pending_count: int = 0
+    pending_cooldown_count: int = 0
+
+
+def _bump(pending: int, before: dict, after: dict, day_key: str, count_key: str) -> int:
+    if after.get(day_key) != before.get(day_key):
+        return int(after.get(count_key) or 0)
+    return pending + int(after.get(count_key) or 0) - int(before.get(count_key) or 0)
+
+
+def _later(a, b):
+    a, b = to_utc(a), to_utc(b)
+    if not isinstance(a, datetime):
+        return b if isinstance(b, datetime) else a
+    if not isinstance(b, datetime):
+        return a
+    return max(a, b)
+
+
+def _merge_counter(merged: dict, local: dict, remote: dict, pending: int, day_key: str, count_key: str):
+    local_day, remote_day = local.get(day_key), remote.get(day_key)
+    remote_count = int(remote.get(count_key) or 0)
+    if remote_day is None or (local_day is not None and local_day > remote_day):
+        return
+    if remote_day == local_day:
+        # outras instâncias também consomem: remoto + o que só esta instância viu
+        merged[count_key] = max(int(local.get(count_key) or 0), remote_count + pending)
+    else:
+        merged[day_key] = remote_day
+        merged[count_key] = remote_count
+
+
+def reconcile_state(local: dict, remote: dict, pending_count: int = 0, pending_cooldown_count: int = 0) -> dict:
+    """
+    Junta o estado local com o do Firestore escolhendo sempre o mais restritivo:
+    contadores do mesmo dia somam o consumo local pendente e bloqueios/cooldowns
+    ficam com o prazo mais distante.
+    """
+    merged = dict(local)
+    _merge_counter(merged, local, remote, pending_count, "day", "count_today")
+    _merge_counter(merged, local, remote, pending_cooldown_count, "cooldown_day", "cooldown_count_today")
+    for key in _TIMESTAMP_FIELDS:
+        merged[key] = _later(local.get(key), remote.get(key))
+    return merged
+
+
+class QuotaStore(ABC):
+    """
+    Backend da quota do /ui/predict.
+
+    consume() decide e registra a requisição de forma atômica por IP, com as
+    regras de app/quota_rules.py. Retorna (allowed, reason).
+    """
+
+    backend = "base"
+
+    @abstractmethod
+    def consume(self, ip: str, now: datetime | None = None) -> tuple[bool, str]:
+        ...
+
+    def stats(self) -> dict:
+        return {"backend": self.backend}
+
+    def close(self):
+        pass
+
+
+class LocalQuotaEngine(QuotaStore):
+    """
+    Quota do /ui/predict em memória, com as mesmas regras da transação do Firestore.
+
+    A decisão é um lookup num dict + apply_quota_rules (O(1), sem I/O). O estado
+    de um IP é lido do Firestore só na primeira vez que ele aparece (hydrate) e
+    as mudanças são gravadas em lote por uma thread a cada sync_interval_ms,
+    reconciliando com o que outras instâncias gravaram.
+    """
+
+    def __init__(
+        self,
+        rules: QuotaRules | None = None,
+        db_factory=None,
+        collection: str | None = None,
+        max_entries: int = 100_000,
+        sync_interval_ms: float = 1000.0,
+    ):
+        self.rules = rules or QuotaRules.from_env()
+        self._db_factory = db_factory
+        self._collection = collection
+        self.backend = "local" if db_factory is not None else "memory"
+        self.max_entries = max(1, int(max_entries))
+        self.sync_interval_s = max(0.01, float(sync_interval_ms) / 1000.0)
+
+        self._entries: OrderedDict[str, _QuotaEntry] = OrderedDict()
+        self._dirty: set[str] = set()
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+        self.allowed_total = 0
+        self.denied_total = 0
+        self.hydrations = 0
+        self.hydrate_failures = 0
+        self.syncs_total = 0
+        self.sync_failures = 0
+        self.docs_synced = 0
+        self.last_sync_ms = 0.0
+
+    # ---- Firestore ----
+
+    def _doc_ref(self, db, doc_id: str):
+        return db.collection(self._collection or ui_quota_collection()).document(doc_id)
+
+    def _load(self, doc_id: str) -> dict:
+        if self._db_factory is None:
+            return {}
+        try:
+            snap = self._doc_ref(self._db_factory(), doc_id).get()
+            self.hydrations += 1
+            return (snap.to_dict() or {}) if snap.exists else {}
+        except Exception as e:
+            self.hydrate_failures += 1
+            logger.warning(f"Falha ao ler quota do Firestore (segue com estado local): {e}")
+            return {}
+
+    # ---- decisão ----
+
+    def consume(self, ip: str, now: datetime | None = None) -> tuple[bool, str]:
+        if now is None:
+            now = datetime.now(timezone.utc)
+        if now.tzinfo is None:
+            now = now.replace(tzinfo=timezone.utc)
+
+        doc_id = ip_hash(ip)
+        remote = None
+        if doc_id not in self._entries:
+            # fora do lock: é a única leitura remota, e só na primeira vez do IP
+            remote = self._load(doc_id)
+
+        with self._lock:
+            entry = self._entries.get(doc_id)
+            added = entry is None
+            if added:
+                entry = _QuotaEntry(state=dict(remote or {}))
+                self._entries[doc_id] = entry
+            else:
+                self._entries.move_to_end(doc_id)
+
+            allowed, reason, updates = apply_quota_rules(entry.state, now, self.rules)
+            if updates is not None:
+                before = dict(entry.state)
+                entry.state.update(updates)
+                entry.pending_count = _bump(entry.pending_count, before, entry.state, "day", "count_today")
+                entry.pending_cooldown_count = _bump(
+                    entry.pending_cooldown_count, before, entry.state, "cooldown_day", "cooldown_count_today"
+                )
+                if self._db_factory is not None:
+                    self._dirty.add(doc_id)
+            if added:
+                # depois de marcar o IP novo como pendente: nunca é ele o descartado
+                self._evict()
+
+            if allowed:
+                self.allowed_total += 1
+            else:
+                self.denied_total += 1
+
+        if self._db_factory is not None:
+            self._ensure_started()
+        return allowed, reason
+
+    def _evict(self):
+        # só descarta quem já foi sincronizado (volta do Firestore se aparecer de novo),
+        # a partir da ponta menos usada do LRU; abaixo da capacidade não faz nada
+        while len(self._entries) > self.max_entries:
+            oldest = next(iter(self._entries))
+            if oldest not in self._dirty:
+                self._entries.popitem(last=False)
+                continue
+            victim = next((doc_id for doc_id in self._entries if doc_id not in self._dirty), None)
+            if victim is None:
+                return  # tudo pendente de sync: passa do limite até o próximo sync
+            del self._entries[victim]
+
+    # ---- sync ----
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._sync_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="ui-quota-sync", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.sync_interval_s):
+            self.sync()
+
+    def sync(self) -> int:
+        """Grava os IPs alterados desde o último sync. Retorna quantos docs foram gravados."""
+        if self._db_factory is None:
+            return 0
+
+        with self._sync_lock:
+            with self._lock:
+                if not self._dirty:
+                    return 0
+                snapshot = {
+                    doc_id: (dict(e.state), e.pending_count, e.pending_cooldown_count)
+                    for doc_id in self._dirty
+                    if (e := self._entries.get(doc_id)) is not None
+                }
+                self._dirty.clear()
+
+            started = time.perf_counter()
+            try:
+                merged = self._write(snapshot)
+            except Exception as e:
+                with self._lock:
+                    self._dirty.update(snapshot)
+                    self.sync_failures += 1
+                logger.warning(f"Falha ao sincronizar quota com o Firestore ({len(snapshot)} IPs): {e}")
+                return 0
+
+            with self._lock:
+                for doc_id, state in merged.items():
+                    entry = self._entries.get(doc_id)
+                    if entry is None:
+                        continue
+                    _, sent_count, sent_cooldown = snapshot[doc_id]
+                    # o que chegou durante o sync continua pendente
+                    entry.pending_count = max(0, entry.pending_count - sent_count)
+                    entry.pending_cooldown_count = max(0, entry.pending_cooldown_count - sent_cooldown)
+                    entry.state = reconcile_state(
+                        entry.state, state, entry.pending_count, entry.pending_cooldown_count
+                    )
+                self.syncs_total += 1
+                self.docs_synced += len(merged)
+                self.last_sync_ms = (time.perf_counter() - started) * 1000.0
+            return len(merged)
+
+    def _write(self, snapshot: dict) -> dict:
+        firestore = get_firestore()
+        db = self._db_factory()
+        doc_ids = list(snapshot)
+        merged = {}
+
+        for start in range(0, len(doc_ids), FIRESTORE_BATCH_LIMIT):
+            chunk = doc_ids[start:start + FIRESTORE_BATCH_LIMIT]
+            refs = [self._doc_ref(db, doc_id) for doc_id in chunk]
+            remote = {snap.id: (snap.to_dict() or {}) for snap in db.get_all(refs) if snap.exists}
+
+            batch = db.batch()
+            for doc_id, ref in zip(chunk, refs):
+                local, pending, pending_cooldown = snapshot[doc_id]
+                state = reconcile_state(local, remote.get(doc_id, {}), pending, pending_cooldown)
+                merged[doc_id] = state
+                batch.set(
+                    ref,
+                    {
+                        "ip_hash": doc_id,
+                        **{k: v for k, v in state.items() if k not in ("ip_hash", "created_at", "updated_at")},
+                        "updated_at": firestore.SERVER_TIMESTAMP,
+                        **({} if doc_id in remote else {"created_at": firestore.SERVER_TIMESTAMP}),
+                    },
+                    merge=True,
+                )
+            batch.commit()
+        return merged
+
+    def stop(self, timeout: float | None = 5.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+        # último sync: não perde o que foi decidido desde o anterior
+        self.sync()
+
+    def close(self):
+        self.stop()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "backend": self.backend,
+                "entries": len(self._entries),
+                "dirty": len(self._dirty),
+                "allowed_total": self.allowed_total,
+                "denied_total": self.denied_total,
+                "hydrations": self.hydrations,
+                "hydrate_failures": self.hydrate_failures,
+                "syncs_total": self.syncs_total,
+                "sync_failures": self.sync_failures,
+                "docs_synced": self.docs_synced,
+                "last_sync_ms": self.last_sync_ms,
+            }
+
+
+class FirestoreQuotaStore(QuotaStore):
+    """Uma transação do Firestore por requisição (comportamento original)."""
+
+    backend = "firestore"
+
+    def __init__(self):
+        self._stats_lock = threading.Lock()
+        self.allowed_total = 0
+        self.denied_total = 0
+
+    def consume(self, ip: str, now: datetime | None = None) -> tuple[bool, str]:
+        allowed, reason = consume_ui_quota_firestore(ip, now)
+        with self._stats_lock:
+            if allowed:
+                self.allowed_total += 1
+            else:
+                self.denied_total += 1
+        return allowed, reason
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            return {"backend": self.backend, "allowed_total": self.allowed_total, "denied_total": self.denied_total}
+
+
+class DisabledQuotaStore(QuotaStore):
+    """Sem Firestore não há onde contar a quota do backend local: deixa passar (comportamento original)."""
+
+    backend = "disabled"
+
+    def __init__(self):
+        logger.warning("FIRESTORE_ENABLED=false: UI quota não está sendo aplicada (use UI_QUOTA_BACKEND=memory).")
+
+    def consume(self, ip: str, now: datetime | None = None) -> tuple[bool, str]:
+        return True, ""
+
+
+QUOTA_BACKENDS = ("memory", "local", "firestore", "redis")
+
+
+def create_quota_store(backend: str | None = None) -> QuotaStore:
+    backend = (backend or settings.ui_quota_backend).strip().lower()
+    if backend == "firestore":
+        return FirestoreQuotaStore()
+    if backend == "redis":
+        from app.quota_redis import RedisQuotaStore
+
+        return RedisQuotaStore(url=settings.redis_url, prefix=settings.ui_quota_redis_prefix)
+    if backend not in ("memory", "local"):
+        raise ValueError(f"UI_QUOTA_BACKEND inválido: {backend!r} (use: {', '.join(QUOTA_BACKENDS)})")
+    if backend == "local" and not _firestore_enabled():
+        return DisabledQuotaStore()
+    return LocalQuotaEngine(
+        # memory: só esta instância, nada persiste
+        db_factory=get_db if backend == "local" else None,
+        max_entries=settings.ui_quota_max_entries,
+        sync_interval_ms=settings.ui_quota_sync_ms,
+    )
+
+
+_store: QuotaStore | None = None
+_store_lock = threading.Lock()
+
+
+def get_quota_store() -> QuotaStore:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = create_quota_store()
+    return _store
+
+
+def quota_store_stats() -> dict:
+    """stats() do store, se já existir (não abre conexão com Redis/Firestore)."""
+    store = _store
+    return store.stats() if store is not None else {}
+
+
+def shutdown_quota_store():
+    global _store
+    if _store is not None:
+        _store.close()
+        _store = None
+
+
+def check_ui_quota(ip: str, now: datetime | None = None) -> tuple[bool, str]:
+    return get_quota_store().consume(ip, now)
@@ -0,0 +1,203 @@
+import threading
+from datetime import datetime, timedelta, timezone
+
+from app.logger import get_logger
+from app.quota import QuotaStore
+from app.quota_rules import (
+    REASON_BURST,
+    REASON_BURST_BLOCKED,
+    REASON_COOLDOWN_LIMIT,
+    REASON_DAILY_LIMIT,
+    QuotaRules,
+    ip_hash,
+)
+
+logger = get_logger(__name__)
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_US = 1_000_000
+_ONE_US = timedelta(microseconds=1)
+
+# Mesmas regras de app/quota_rules.apply_quota_rules, rodando dentro do Redis:
+# leitura + decisão + escrita num único round-trip, atômico por IP.
+# Timestamps em microssegundos desde a epoch (cabem exatos num double do Lua).
+# Retorno: {allowed, código do motivo, segundos restantes}
+QUOTA_SCRIPT = """
+local key = KEYS[1]
+local now = tonumber(ARGV[1])
+local today = ARGV[2]
+local daily_limit = tonumber(ARGV[3])
+local cooldown_us = tonumber(ARGV[4])
+local cooldown_daily_limit = tonumber(ARGV[5])
+local burst_min_us = tonumber(ARGV[6])
+local burst_block_us = tonumber(ARGV[7])
+local ttl_ms = tonumber(ARGV[8])
+
+local s = redis.call('HMGET', key, 'day', 'count_today', 'cooldown_until', 'cooldown_day',
+                     'cooldown_count_today', 'last_request_at', 'burst_block_until')
+local day = s[1]
+local count = tonumber(s[2]) or 0
+local cooldown_until = tonumber(s[3])
+local cooldown_day = s[4]
+local cooldown_count = tonumber(s[5]) or 0
+local last = tonumber(s[6])
+local block_until = tonumber(s[7])
+
+-- números do Lua viram string com %.14g: timestamps vão formatados como inteiro
+local function int(x)
+  return string.format('%d', x)
+end
+
+local function save(...)
+  redis.call('HSET', key, ...)
+  redis.call('PEXPIRE', key, ttl_ms)
+end
+
+if day ~= today then
+  day = today
+  count = 0
+end
+
+if block_until and now < block_until then
+  return {0, 1, math.floor((block_until - now) / 1000000)}
+end
+
+if last then
+  local delta = now - last
+  if delta >= 0 and delta < burst_min_us then
+    save('day', day, 'count_today', count, 'burst_block_until', int(now + burst_block_us),
+         'last_request_at', int(now))
+    return {0, 2, 0}
+  end
+end
+
+local in_cooldown = cooldown_until ~= nil and now < cooldown_until
+
+if in_cooldown then
+  if cooldown_day ~= today then
+    cooldown_day = today
+    cooldown_count = 0
+  end
+  if cooldown_count >= cooldown_daily_limit then
+    return {0, 3, 0}
+  end
+  save('day', day, 'count_today', count, 'cooldown_until', int(cooldown_until), 'cooldown_day', cooldown_day,
+       'cooldown_count_today', cooldown_count + 1, 'last_request_at', int(now))
+  return {1, 0, 0}
+end
+
+if count >= daily_limit then
+  save('day', day, 'count_today', count, 'cooldown_until', int(now + cooldown_us), 'cooldown_day', today,
+       'cooldown_count_today', 0)
+  return {0, 4, 0}
+end
+
+redis.call('HDEL', key, 'cooldown_until', 'cooldown_day', 'burst_block_until')
+save('day', day, 'count_today', count + 1, 'cooldown_count_today', 0, 'last_request_at', int(now))
+return {1, 0, 0}
+"""
+
+_REASONS = {
+    0: "",
+    2: REASON_BURST,
+    3: REASON_COOLDOWN_LIMIT,
+    4: REASON_DAILY_LIMIT,
+}
+
+
+def _epoch_us(now: datetime) -> int:
+    # inteiro exato (datetime.timestamp() passa por float)
+    return (now - _EPOCH) // _ONE_US
+
+
+class RedisQuotaStore(QuotaStore):
+    """
+    Quota num servidor Redis (ou compatível: Valkey, Memorystore, KeyDB...).
+
+    Cada decisão é um EVALSHA do QUOTA_SCRIPT: um round-trip, atômico por IP
+    e compartilhado por todas as instâncias. O estado expira sozinho (TTL)
+    depois do cooldown.
+    """
+
+    backend = "redis"
+
+    def __init__(
+        self,
+        client=None,
+        url: str = "redis://localhost:6379/0",
+        prefix: str = "ui_quota:",
+        rules: QuotaRules | None = None,
+    ):
+        if client is None:
+            import redis  # dependência opcional: só para UI_QUOTA_BACKEND=redis
+
+            client = redis.Redis.from_url(url, socket_timeout=1.0, socket_connect_timeout=1.0)
+        self._client = client
+        self.prefix = prefix
+        self.rules = rules or QuotaRules.from_env()
+        # register_script: EVALSHA, com fallback para EVAL se o servidor não tiver o script
+        self._script = client.register_script(QUOTA_SCRIPT)
+        try:
+            # carrega já: a primeira requisição não paga NOSCRIPT + SCRIPT LOAD
+            client.script_load(QUOTA_SCRIPT)
+        except Exception as e:
+            logger.warning(f"Redis indisponível ao carregar o script da quota: {e}")
+
+        self._stats_lock = threading.Lock()
+        self.allowed_total = 0
+        self.denied_total = 0
+        self.errors_total = 0
+
+    def _args(self, now: datetime) -> list:
+        rules = self.rules
+        ttl_s = max(rules.cooldown_days * 86400, rules.burst_block_seconds) + 86400
+        return [
+            _epoch_us(now),
+            now.date().isoformat(),
+            rules.daily_limit,
+            rules.cooldown_days * 86400 * _US,
+            rules.cooldown_daily_limit,
+            rules.burst_min_interval_ms * 1000,
+            rules.burst_block_seconds * _US,
+            ttl_s * 1000,
+        ]
+
+    def consume(self, ip: str, now: datetime | None = None) -> tuple[bool, str]:
+        if now is None:
+            now = datetime.now(timezone.utc)
+        if now.tzinfo is None:
+            now = now.replace(tzinfo=timezone.utc)
+
+        try:
+            allowed, code, remaining = self._script(keys=[self.prefix + ip_hash(ip)], args=self._args(now))
+        except Exception as e:
+            with self._stats_lock:
+                self.errors_total += 1
+            logger.error(f"Falha ao aplicar UI quota no Redis: {e}", exc_info=True)
+            # mesmo critério do Firestore: PoC deixa passar
+            return True, ""
+
+        allowed = bool(int(allowed))
+        code = int(code)
+        reason = REASON_BURST_BLOCKED.format(remaining=int(remaining)) if code == 1 else _REASONS.get(code, "")
+        with self._stats_lock:
+            if allowed:
+                self.allowed_total += 1
+            else:
+                self.denied_total += 1
+        return allowed, reason
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            return {
+                "backend": self.backend,
+                "allowed_total": self.allowed_total,
+                "denied_total": self.denied_total,
+                "errors_total": self.errors_total,
+            }
+
+    def close(self):
+        try:
+            self._client.close()
+        except Exception:
+            pass
@@ -0,0 +1,149 @@
+import hashlib
+import os
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+
+def _int_env(name: str, default: int) -> int:
+    raw = os.getenv(name, str(default)).strip()
+    try:
+        return int(raw)
+    except Exception:
+        return default
+
+
+# Mensagens de bloqueio (iguais em todos os backends)
+REASON_BURST_BLOCKED = "IP temporariamente bloqueado (burst). Tente em {remaining}s."
+REASON_BURST = "Muitas requisições muito rápidas. IP bloqueado temporariamente."
+REASON_COOLDOWN_LIMIT = "Em cooldown: limite diário atingido. Tente amanhã."
+REASON_DAILY_LIMIT = "Limite diário atingido. Cooldown ativado."
+
+
+def ip_hash(ip: str) -> str:
+    ip = (ip or "").strip() or "unknown"
+    return hashlib.sha256(ip.encode("utf-8")).hexdigest()
+
+
+@dataclass(frozen=True)
+class QuotaRules:
+    """
+    Regras da quota do /ui/predict (via env vars):
+    - UI_DAILY_LIMIT (default 10)
+    - UI_COOLDOWN_DAYS (default 30)
+    - UI_COOLDOWN_DAILY_LIMIT (default 1)
+    - UI_BURST_MIN_INTERVAL_MS (default 800)  -> se reqs muito rápidas, bloqueia
+    - UI_BURST_BLOCK_SECONDS (default 3600)   -> 1h de block por burst
+    """
+
+    daily_limit: int = 10
+    cooldown_days: int = 30
+    cooldown_daily_limit: int = 1
+    burst_min_interval_ms: int = 800
+    burst_block_seconds: int = 3600
+
+    @classmethod
+    def from_env(cls) -> "QuotaRules":
+        return cls(
+            daily_limit=_int_env("UI_DAILY_LIMIT", 10),
+            cooldown_days=_int_env("UI_COOLDOWN_DAYS", 30),
+            cooldown_daily_limit=_int_env("UI_COOLDOWN_DAILY_LIMIT", 1),
+            burst_min_interval_ms=_int_env("UI_BURST_MIN_INTERVAL_MS", 800),
+            burst_block_seconds=_int_env("UI_BURST_BLOCK_SECONDS", 3600),
+        )
+
+
+def to_utc(value):
+    if isinstance(value, datetime) and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def apply_quota_rules(data: dict, now: datetime, rules: QuotaRules) -> tuple[bool, str, dict | None]:
+    """
+    Decide uma requisição a partir do estado salvo do IP.
+
+    Função pura (sem I/O): a transação do Firestore e o engine em memória usam
+    a mesma. Retorna (allowed, reason, updates); updates são os campos a gravar
+    com merge (None = nada muda).
+    """
+    today = now.date().isoformat()
+
+    # Fields
+    stored_day = data.get("day")
+    count_today = int(data.get("count_today") or 0)
+
+    cooldown_until = to_utc(data.get("cooldown_until"))  # datetime | None
+    cooldown_day = data.get("cooldown_day")
+    cooldown_count_today = int(data.get("cooldown_count_today") or 0)
+
+    last_request_at = to_utc(data.get("last_request_at"))  # datetime | None
+    burst_block_until = to_utc(data.get("burst_block_until"))  # datetime | None
+
+    # Se mudou o dia, zera contadores diários
+    if stored_day != today:
+        stored_day = today
+        count_today = 0
+
+    # Se tá bloqueado por burst
+    if isinstance(burst_block_until, datetime) and now < burst_block_until:
+        remaining = int((burst_block_until - now).total_seconds())
+        return False, REASON_BURST_BLOCKED.format(remaining=remaining), None
+
+    # Detecta burst (muito rápido) e bloqueia na hora
+    if isinstance(last_request_at, datetime):
+        delta_ms = (now - last_request_at).total_seconds() * 1000.0
+        if delta_ms >= 0 and delta_ms < rules.burst_min_interval_ms:
+            return False, REASON_BURST, {
+                "day": stored_day,
+                "count_today": count_today,
+                "burst_block_until": now + timedelta(seconds=rules.burst_block_seconds),
+                "last_request_at": now,
+            }
+
+    # Em cooldown?
+    in_cooldown = isinstance(cooldown_until, datetime) and now < cooldown_until
+
+    # Se cooldown expirou, limpa estado
+    if not in_cooldown and cooldown_until is not None:
+        cooldown_until = None
+        cooldown_day = None
+        cooldown_count_today = 0
+
+    # Se está em cooldown, aplica limite diário menor
+    if in_cooldown:
+        if cooldown_day != today:
+            cooldown_day = today
+            cooldown_count_today = 0
+
+        if cooldown_count_today >= rules.cooldown_daily_limit:
+            return False, REASON_COOLDOWN_LIMIT, None
+
+        return True, "", {
+            "day": stored_day,
+            "count_today": count_today,
+            "cooldown_until": cooldown_until,
+            "cooldown_day": cooldown_day,
+            "cooldown_count_today": cooldown_count_today + 1,
+            "last_request_at": now,
+        }
+
+    # Fora de cooldown: aplica limite normal
+    if count_today >= rules.daily_limit:
+        return False, REASON_DAILY_LIMIT, {
+            "day": stored_day,
+            "count_today": count_today,
+            "cooldown_until": now + timedelta(days=rules.cooldown_days),
+            "cooldown_day": today,
+            "cooldown_count_today": 0,
+        }
+
+    # Consome 1 do dia
+    return True, "", {
+        "day": stored_day,
+        "count_today": count_today + 1,
+        "cooldown_until": None,
+        "cooldown_day": None,
+        "cooldown_count_today": 0,
+        "burst_block_until": None,
+        "last_request_at": now,
+    }
@@ -0,0 +1,57 @@
+import json
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+from app.config import settings
+from app.logger import get_logger
+
+logger = get_logger(__name__)
+
+try:
+    import orjson
+except ImportError:  # dependência opcional: sem ela, JSON_RESPONSE=orjson cai no json da stdlib
+    orjson = None
+
+_warned = False
+
+
+def is_fast_json_enabled() -> bool:
+    global _warned
+    if settings.json_response != "orjson":
+        return False
+    if orjson is None:
+        if not _warned:
+            logger.warning("JSON_RESPONSE=orjson, mas orjson não está instalado: usando json da stdlib")
+            _warned = True
+        return False
+    return True
+
+
+def dumps(obj: Any) -> str:
+    """Serialização usada no streaming (/inferences, export): orjson quando disponível."""
+    if orjson is not None and settings.json_response == "orjson":
+        return orjson.dumps(obj, default=str).decode("utf-8")
+    return json.dumps(obj, ensure_ascii=False, default=str)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse serializado com orjson (bytes direto, sem passar por str)."""
+
+    def render(self, content: Any) -> bytes:
+        if orjson is None:
+            return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY)
+
+
+def respond(body: dict):
+    """
+    Resposta de um endpoint quente a partir do dict já montado.
+
+    Modo orjson: devolve a Response pronta, o FastAPI não valida nem
+    re-serializa pelo response_model (que continua documentando o schema).
+    Modo stdlib: devolve o dict, validado uma única vez pelo response_model.
+    """
+    if is_fast_json_enabled():
+        return FastJSONResponse(body)
+    return body
@@ -0,0 +1,228 @@
+import bisect
+import os
+from datetime import datetime, timedelta, timezone
+
+from app.firestore_client import get_db, get_firestore
+
+LABELS = ("positive", "neutral", "negative")
+
+# granularidade -> tamanho do bucket
+GRANULARITIES = {
+    "minute": timedelta(minutes=1),
+    "hour": timedelta(hours=1),
+    "day": timedelta(days=1),
+}
+
+SCORE_BINS = 10  # [0, 0.1), [0.1, 0.2), ..., [0.9, 1.0]
+# limites superiores (ms) do histograma de latência; o último bin pega o resto
+LATENCY_BOUNDS_MS = (5, 10, 20, 30, 50, 75, 100, 150, 200, 300, 500, 750, 1000, 2000, 5000)
+
+
+def rollup_collection() -> str:
+    return os.getenv("ROLLUP_COLLECTION", "inference_rollups").strip() or "inference_rollups"
+
+
+def minute_ttl() -> timedelta:
+    # buckets por minuto crescem rápido: expire_at alimenta a política de TTL do Firestore
+    return timedelta(days=float(os.getenv("ROLLUP_MINUTE_TTL_DAYS", 7)))
+
+
+def bucket_start(ts: datetime, granularity: str) -> datetime:
+    ts = ts.astimezone(timezone.utc)
+    if granularity == "minute":
+        return ts.replace(second=0, microsecond=0)
+    if granularity == "hour":
+        return ts.replace(minute=0, second=0, microsecond=0)
+    return ts.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def rollup_id(granularity: str, start: datetime, model_version: str) -> str:
+    # "/" não pode aparecer no id de documento
+    return f"{granularity}_{start.strftime('%Y%m%dT%H%M')}_{str(model_version).replace('/', '_')}"
+
+
+def _score_bin(score: float) -> int:
+    return min(SCORE_BINS - 1, max(0, int(float(score) * SCORE_BINS)))
+
+
+def _latency_bin(ms: float) -> int:
+    return bisect.bisect_left(LATENCY_BOUNDS_MS, float(ms))
+
+
+def _doc_time(doc: dict, now: datetime | None) -> datetime:
+    created_at = doc.get("created_at")
+    if isinstance(created_at, datetime):
+        return created_at if created_at.tzinfo else created_at.replace(tzinfo=timezone.utc)
+    # documento sem timestamp do cliente (ex.: SERVER_TIMESTAMP): usa o instante do commit
+    return now or datetime.now(timezone.utc)
+
+
+def rollup_ids(doc: dict, now: datetime | None = None) -> list[str]:
+    """Rollups que um documento incrementa (um por granularidade)."""
+    if doc.get("label") is None or doc.get("score") is None:
+        return []
+    version = str(doc.get("model_version") or "unknown")
+    ts = _doc_time(doc, now)
+    return [rollup_id(g, bucket_start(ts, g), version) for g in GRANULARITIES]
+
+
+def rollup_deltas(docs: list[dict], now: datetime | None = None) -> dict[str, dict]:
+    """
+    Contadores a somar em cada rollup por um lote de documentos gravados juntos.
+
+    Cada documento cai no bucket do seu created_at (o instante da predição),
+    não no do commit: fila, retentativas e o drain no shutdown não mudam o
+    bucket. Os valores são deltas numéricos; o writer converte em Increment.
+    """
+    out: dict[str, dict] = {}
+    for doc in docs:
+        label = doc.get("label")
+        score = doc.get("score")
+        if label is None or score is None:
+            continue
+        version = str(doc.get("model_version") or "unknown")
+        latency = doc.get("inference_time_ms")
+
+        ts = _doc_time(doc, now)
+        for granularity in GRANULARITIES:
+            start = bucket_start(ts, granularity)
+            key = rollup_id(granularity, start, version)
+            entry = out.get(key)
+            if entry is None:
+                entry = out[key] = {
+                    "fields": {"granularity": granularity, "bucket_start": start, "model_version": version},
+                    "count": 0,
+                    "cached": 0,
+                    "labels": {},
+                    "score_hist": {},
+                    "latency_hist": {},
+                    "latency_sum_ms": 0.0,
+                    "latency_count": 0,
+                }
+                if granularity == "minute":
+                    entry["fields"]["expire_at"] = start + minute_ttl()
+            entry["count"] += 1
+            entry["cached"] += 1 if doc.get("cached") else 0
+            entry["labels"][label] = entry["labels"].get(label, 0) + 1
+            b = str(_score_bin(score))
+            entry["score_hist"][b] = entry["score_hist"].get(b, 0) + 1
+            if isinstance(latency, (int, float)):
+                b = str(_latency_bin(latency))
+                entry["latency_hist"][b] = entry["latency_hist"].get(b, 0) + 1
+                entry["latency_sum_ms"] += float(latency)
+                entry["latency_count"] += 1
+    return out
+
+
+def _increments(value, increment):
+    if isinstance(value, dict):
+        return {k: _increments(v, increment) for k, v in value.items() if v}
+    return increment(value)
+
+
+def rollup_writes(docs: list[dict], now: datetime | None = None) -> list[tuple[str, dict]]:
+    """(id, dados para set(..., merge=True)) de cada rollup afetado pelo lote."""
+    firestore = get_firestore()
+    writes = []
+    for key, entry in rollup_deltas(docs, now).items():
+        fields = entry.pop("fields")
+        data = {**fields, **_increments(entry, firestore.Increment), "updated_at": firestore.SERVER_TIMESTAMP}
+        writes.append((key, data))
+    return writes
+
+
+# ---------------------------------------------------------------- leitura
+
+def _percentile_from_hist(hist: dict, total: int, p: float) -> float | None:
+    """Limite superior do bin que contém o percentil p (o último bin não tem teto: usa o maior limite)."""
+    if not total:
+        return None
+    rank = p / 100.0 * total
+    seen = 0
+    for i in range(len(LATENCY_BOUNDS_MS) + 1):
+        seen += int(hist.get(str(i), 0))
+        if seen >= rank:
+            return float(LATENCY_BOUNDS_MS[min(i, len(LATENCY_BOUNDS_MS) - 1)])
+    return float(LATENCY_BOUNDS_MS[-1])
+
+
+def summarize(entries: list[dict]) -> dict:
+    """Soma rollups (mesmo formato dos documentos) e calcula os derivados."""
+    count = sum(int(e.get("count", 0)) for e in entries)
+    labels = {label: 0 for label in LABELS}
+    score_hist = [0] * SCORE_BINS
+    latency_hist: dict[str, int] = {}
+    latency_sum = 0.0
+    latency_count = 0
+    cached = 0
+    for e in entries:
+        cached += int(e.get("cached", 0))
+        for label, n in (e.get("labels") or {}).items():
+            labels[label] = labels.get(label, 0) + int(n)
+        for b, n in (e.get("score_hist") or {}).items():
+            score_hist[int(b)] += int(n)
+        for b, n in (e.get("latency_hist") or {}).items():
+            latency_hist[b] = latency_hist.get(b, 0) + int(n)
+        latency_sum += float(e.get("latency_sum_ms", 0.0))
+        latency_count += int(e.get("latency_count", 0))
+
+    return {
+        "count": count,
+        "cached": cached,
+        "labels": labels,
+        "score_histogram": score_hist,
+        "latency_ms": {
+            "mean": latency_sum / latency_count if latency_count else None,
+            "p50": _percentile_from_hist(latency_hist, latency_count, 50),
+            "p90": _percentile_from_hist(latency_hist, latency_count, 90),
+            "p99": _percentile_from_hist(latency_hist, latency_count, 99),
+        },
+    }
+
+
+def read_rollups(granularity: str, since: datetime, until: datetime, model_version: str | None = None, db=None):
+    """
+    Documentos de rollup da faixa [since, until), em ordem. O custo depende só
+    do número de buckets (faixa / granularidade), não de quantas inferências existem.
+    """
+    firestore = get_firestore()
+    db = db or get_db()
+    field_filter = firestore.FieldFilter
+    query = db.collection(rollup_collection()).where(filter=field_filter("granularity", "==", granularity))
+    if model_version:
+        query = query.where(filter=field_filter("model_version", "==", model_version))
+    query = query.where(filter=field_filter("bucket_start", ">=", since))
+    query = query.where(filter=field_filter("bucket_start", "<", until))
+    query = query.order_by("bucket_start")
+    return [doc.to_dict() or {} for doc in query.stream()]
+
+
+def build_summary(granularity: str, since: datetime, until: datetime, model_version: str | None = None, db=None) -> dict:
+    since = bucket_start(since, granularity)
+    docs = read_rollups(granularity, since, until, model_version=model_version, db=db)
+
+    series = []
+    by_version: dict[str, list[dict]] = {}
+    for doc in docs:
+        start = doc.get("bucket_start")
+        version = doc.get("model_version") or "unknown"
+        by_version.setdefault(version, []).append(doc)
+        series.append(
+            {
+                "bucket_start": start.astimezone(timezone.utc).isoformat() if isinstance(start, datetime) else start,
+                "model_version": version,
+                **summarize([doc]),
+            }
+        )
+
+    return {
+        "granularity": granularity,
+        "since": since.isoformat(),
+        "until": until.astimezone(timezone.utc).isoformat(),
+        "buckets": len(series),
+        "totals": summarize(docs),
+        "by_model_version": {v: summarize(entries) for v, entries in sorted(by_version.items())},
+        "series": series,
+        "score_bins": SCORE_BINS,
+        "latency_bounds_ms": list(LATENCY_BOUNDS_MS),
+    }
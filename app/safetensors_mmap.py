@@ -0,0 +1,114 @@
+import json
+import mmap
+import os
+import re
+import struct
+
+SAFETENSORS_FILE = "model.safetensors"
+SAFETENSORS_INDEX_FILE = "model.safetensors.index.json"
+
+_DTYPES = {
+    "F64": "float64",
+    "F32": "float32",
+    "F16": "float16",
+    "BF16": "bfloat16",
+    "I64": "int64",
+    "I32": "int32",
+    "I16": "int16",
+    "I8": "int8",
+    "U8": "uint8",
+    "BOOL": "bool",
+}
+
+
+def has_safetensors(model_dir: str) -> bool:
+    return os.path.exists(os.path.join(model_dir, SAFETENSORS_FILE)) or os.path.exists(
+        os.path.join(model_dir, SAFETENSORS_INDEX_FILE)
+    )
+
+
+def _shard_files(model_dir: str) -> list[str]:
+    index_path = os.path.join(model_dir, SAFETENSORS_INDEX_FILE)
+    if os.path.exists(index_path):
+        with open(index_path, encoding="utf-8") as f:
+            weight_map = json.load(f)["weight_map"]
+        return [os.path.join(model_dir, name) for name in sorted(set(weight_map.values()))]
+    return [os.path.join(model_dir, SAFETENSORS_FILE)]
+
+
+def _load_file_mmap(path: str) -> dict:
+    import torch
+
+    with open(path, "rb") as f:
+        # MAP_PRIVATE (copy-on-write): páginas vêm do page cache e são
+        # compartilhadas entre processos enquanto ninguém escreve nelas
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+
+    (header_len,) = struct.unpack("<Q", mm[:8])
+    header = json.loads(mm[8:8 + header_len])
+    base = 8 + header_len
+
+    tensors = {}
+    for name, info in header.items():
+        if name == "__metadata__":
+            continue
+        dtype = getattr(torch, _DTYPES[info["dtype"]])
+        start, end = info["data_offsets"]
+        shape = info["shape"]
+        if end == start:
+            tensors[name] = torch.empty(shape, dtype=dtype)
+            continue
+        itemsize = torch.empty((), dtype=dtype).element_size()
+        # zero-copy: o tensor aponta direto para o mapeamento do arquivo
+        flat = torch.frombuffer(mm, dtype=dtype, count=(end - start) // itemsize, offset=base + start)
+        tensors[name] = flat.view(shape)
+    return tensors
+
+
+def load_state_dict_mmap(model_dir: str) -> dict:
+    state = {}
+    for path in _shard_files(model_dir):
+        state.update(_load_file_mmap(path))
+    return state
+
+
+def _empty_model(config):
+    from transformers import AutoModelForSequenceClassification
+
+    try:
+        # pula a inicialização aleatória (os pesos vão ser substituídos)
+        from transformers.modeling_utils import no_init_weights
+    except ImportError:
+        try:
+            from transformers.initialization import no_init_weights  # transformers >= 5
+        except ImportError:
+            return AutoModelForSequenceClassification.from_config(config)
+
+    with no_init_weights():
+        return AutoModelForSequenceClassification.from_config(config)
+
+
+def load_model_mmap(model_dir: str):
+    """
+    Monta o modelo com os parâmetros apontando para o safetensors mapeado em memória.
+    Vários workers no mesmo host compartilham as mesmas páginas (page cache).
+    """
+    from transformers import AutoConfig
+
+    config = AutoConfig.from_pretrained(model_dir)
+    model = _empty_model(config)
+
+    state = load_state_dict_mmap(model_dir)
+    result = model.load_state_dict(state, strict=False, assign=True)
+    # strict=False só para tolerar o que o próprio modelo declara ignorável
+    # (ex.: buffers de checkpoints antigos); o resto é checkpoint incompatível
+    ignore = getattr(model, "_keys_to_ignore_on_load_unexpected", None) or []
+    unexpected = [k for k in result.unexpected_keys if not any(re.search(p, k) for p in ignore)]
+    if result.missing_keys or unexpected:
+        raise RuntimeError(
+            f"safetensors incompatível com o config em {model_dir}: "
+            f"faltando={result.missing_keys[:5]} inesperados={unexpected[:5]}"
+        )
+
+    model.eval()
+    return model
@@ -5,7 +5,8 @@ from datetime import datetime, timezone
 from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import APIKeyHeader
 
-from app.firestore_client import consume_ui_quota
+from app.metrics import stage_timer
+from app.quota import check_ui_quota
 
 # Header padrão para API Key [web:1]
 api_key_header = APIKeyHeader(name="X-API-Key", auto_error=False)
@@ -55,15 +56,16 @@ requireapikey = require_api_key
 
 # Protege /predict (API “puro”) com API_KEY
 def require_predict_api_key(api_key: str | None = Depends(api_key_header)) -> bool:
-    expected = _require_env_key("API_KEY")
-    provided = _require_header_key(api_key)
-
-    if not _timing_safe_equal(provided, expected):
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Unauthorized",
-            headers={"WWW-Authenticate": "APIKey"},
-        )
+    with stage_timer("auth"):
+        expected = _require_env_key("API_KEY")
+        provided = _require_header_key(api_key)
+
+        if not _timing_safe_equal(provided, expected):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Unauthorized",
+                headers={"WWW-Authenticate": "APIKey"},
+            )
     return True
 
 
@@ -84,7 +86,8 @@ def enforce_ui_quota(request: Request) -> bool:
         return True
 
     ip = _get_client_ip(request)
-    allowed, reason = consume_ui_quota(ip=ip, now=datetime.now(timezone.utc))
+    with stage_timer("quota"):
+        allowed, reason = check_ui_quota(ip=ip, now=datetime.now(timezone.utc))
 
     if not allowed:
         raise HTTPException(
@@ -0,0 +1,73 @@
+import time
+
+from app.config import settings
+from app.logger import get_logger
+from app import utils
+from app.process_pool import is_process_mode, start_process_pool
+
+logger = get_logger(__name__)
+
+_state = {
+    "ready": False,
+    "model_load_ms": None,
+    "warmup_ms": None,
+    "startup_ms": None,
+    "firestore_import_ms": None,
+    "error": None,
+}
+
+
+def prepare_model() -> bool:
+    """
+    Carrega o modelo e roda o warm-up (bloqueante: chamar fora do event loop).
+    Só marca "ready" se tudo der certo.
+    """
+    start = time.perf_counter()
+    try:
+        utils.load_model()
+        _state["model_load_ms"] = utils.model_load_time_ms()
+
+        if is_process_mode():
+            # fork depois da carga; o warm-up roda em cada processo do pool
+            _state["warmup_ms"] = start_process_pool()
+        elif settings.warmup_enabled:
+            _state["warmup_ms"] = utils.warm_up(settings.warmup_lengths, settings.warmup_batch_sizes)
+            logger.info(
+                f"Warm-up concluído em {_state['warmup_ms']:.0f} ms "
+                f"(lengths={settings.warmup_lengths}, batch_sizes={settings.warmup_batch_sizes})"
+            )
+
+        _state["error"] = None
+        _state["ready"] = True
+    except Exception as e:
+        _state["error"] = str(e)
+        logger.error(f"Falha ao preparar o modelo: {e}", exc_info=True)
+    finally:
+        _state["startup_ms"] = (time.perf_counter() - start) * 1000
+    return _state["ready"]
+
+
+def preload_firestore():
+    """Importa o client do Firestore fora do caminho do request (grpc/protobuf são pesados)."""
+    from app.firestore_client import get_firestore
+
+    start = time.perf_counter()
+    try:
+        get_firestore()
+    except Exception as e:
+        logger.warning(f"Não foi possível pré-carregar google.cloud.firestore: {e}")
+        return
+    _state["firestore_import_ms"] = (time.perf_counter() - start) * 1000
+
+
+def mark_ready():
+    # carga preguiçosa (EAGER_LOAD=false): pronto desde o início, como antes
+    _state["ready"] = True
+
+
+def is_ready() -> bool:
+    return bool(_state["ready"])
+
+
+def startup_metrics() -> dict:
+    return dict(_state)
@@ -1,35 +1,80 @@
+import hashlib
 import logging
 import os
+import threading
 import time
-from transformers import pipeline
 
 logger = logging.getLogger(__name__)
 _pipe = None
+_load_time_ms = None
+_load_lock = threading.Lock()
 
 # Local: ./models (Windows)
 # Cloud Run: /app/models (WORKDIR=/app + COPY models/ ./models/)
 LOCAL_DIR = os.getenv("MODEL_LOCAL_PATH", "./models")
 
+# torch | onnx | onnx-int8 (ONNX gerado por training/export_onnx.py)
+MODEL_BACKEND = os.getenv("MODEL_BACKEND", "torch").strip().lower()
+MODEL_BACKENDS = ("torch", "onnx", "onnx-int8")
+
+# torch: carrega model.safetensors via mmap (páginas compartilhadas entre workers)
+MODEL_MMAP = os.getenv("MODEL_MMAP", "true").strip().lower() == "true"
+
 
 def load_model():
-    global _pipe
     if _pipe is not None:
         return _pipe
+    # startup em background + primeira requisição podem chegar juntos
+    with _load_lock:
+        if _pipe is not None:
+            return _pipe
+        return _load_model_locked()
+
+
+def _load_model_locked():
+    global _pipe, _load_time_ms
 
     if (not os.path.exists(LOCAL_DIR)) or (len(os.listdir(LOCAL_DIR)) == 0):
         raise RuntimeError(
             f"Modelo não encontrado em {LOCAL_DIR}. "
-            "Verifique se a pasta models/ contém (pytorch_model.bin, config.json, merges.txt, vocab.json...)."
+            "Verifique se a pasta models/ contém (model.safetensors ou pytorch_model.bin, config.json, merges.txt, vocab.json...)."
         )
 
-    logger.info(f"Carregando pipeline de {LOCAL_DIR}...")
-    _pipe = pipeline(
-        "sentiment-analysis",
-        model=LOCAL_DIR,
-        tokenizer=LOCAL_DIR,
-        device=-1
-    )
-    logger.info("✅ Pipeline carregado!")
+    if MODEL_BACKEND not in MODEL_BACKENDS:
+        raise RuntimeError(f"MODEL_BACKEND inválido: {MODEL_BACKEND} (use {', '.join(MODEL_BACKENDS)})")
+
+    logger.info(f"Carregando pipeline ({MODEL_BACKEND}) de {LOCAL_DIR}...")
+    start = time.perf_counter()
+    if MODEL_BACKEND == "torch":
+        # import tardio: transformers/torch dominam o tempo de import do app
+        from transformers import pipeline
+        from app.safetensors_mmap import has_safetensors, load_model_mmap
+
+        if MODEL_MMAP and has_safetensors(LOCAL_DIR):
+            from transformers import AutoTokenizer
+
+            model = load_model_mmap(LOCAL_DIR)
+            tokenizer = AutoTokenizer.from_pretrained(LOCAL_DIR)
+        else:
+            model, tokenizer = LOCAL_DIR, LOCAL_DIR
+
+        _pipe = pipeline(
+            "sentiment-analysis",
+            model=model,
+            tokenizer=tokenizer,
+            device=-1
+        )
+    else:
+        from app.executor import torch_threads_per_worker
+        from app.onnx_backend import OnnxSentimentPipeline, onnx_model_path
+
+        _pipe = OnnxSentimentPipeline(
+            onnx_model_path(LOCAL_DIR, quantized=(MODEL_BACKEND == "onnx-int8")),
+            LOCAL_DIR,
+            intra_op_threads=torch_threads_per_worker(),
+        )
+    _load_time_ms = (time.perf_counter() - start) * 1000
+    logger.info(f"✅ Pipeline carregado! ({_load_time_ms:.0f} ms)")
     return _pipe
 
 
@@ -37,14 +82,163 @@ def is_model_loaded():
     return _pipe is not None
 
 
+def model_load_time_ms() -> float | None:
+    return _load_time_ms
+
+
+_fingerprint = None
+
+
+def model_fingerprint() -> str:
+    """Identifica os arquivos do modelo (nome/tamanho/mtime) sem carregá-lo."""
+    global _fingerprint
+    if _fingerprint is not None:
+        return _fingerprint
+
+    h = hashlib.sha256(f"{MODEL_BACKEND}:{os.path.abspath(LOCAL_DIR)}".encode("utf-8"))
+    if os.path.isdir(LOCAL_DIR):
+        for name in sorted(os.listdir(LOCAL_DIR)):
+            st = os.stat(os.path.join(LOCAL_DIR, name))
+            h.update(f"{name}:{st.st_size}:{int(st.st_mtime)}".encode("utf-8"))
+    _fingerprint = h.hexdigest()[:12]
+    return _fingerprint
+
+
+LABEL_MAP = {"LABEL_0": "negative", "LABEL_1": "neutral", "LABEL_2": "positive"}
+
+
+def _map_label(raw_label: str) -> str:
+    return LABEL_MAP.get(raw_label, raw_label.lower())
+
+
 def predict(text: str):
     pipe = load_model()
-    start = time.time()
+    start = time.perf_counter()
     output = pipe(text, truncation=True, max_length=512)[0]
-    inference_time_ms = (time.time() - start) * 1000
+    inference_time_ms = (time.perf_counter() - start) * 1000
 
-    label_map = {"LABEL_0": "negative", "LABEL_1": "neutral", "LABEL_2": "positive"}
-    label = label_map.get(output["label"], output["label"].lower())
+    label = _map_label(output["label"])
     score = float(output["score"])
 
     return label, score, inference_time_ms
+
+
+def predict_batch(texts: list[str]):
+    """
+    Roda um único forward pass (com padding) para vários textos.
+    Retorna ([(label, score), ...] na ordem de entrada, tempo_total_ms).
+    """
+    if not texts:
+        return [], 0.0
+
+    pipe = load_model()
+    start = time.perf_counter()
+    outputs = pipe(list(texts), truncation=True, max_length=512, batch_size=len(texts))
+    compute_time_ms = (time.perf_counter() - start) * 1000
+
+    results = [(_map_label(o["label"]), float(o["score"])) for o in outputs]
+    return results, compute_time_ms
+
+
+MAX_LENGTH = 512
+
+
+def tokenize(texts: list[str]) -> list[dict]:
+    """Tokeniza sem padding; cada item vira {"input_ids", "attention_mask"}."""
+    pipe = load_model()
+    enc = pipe.tokenizer(list(texts), truncation=True, max_length=MAX_LENGTH)
+    return [
+        {"input_ids": ids, "attention_mask": mask}
+        for ids, mask in zip(enc["input_ids"], enc["attention_mask"])
+    ]
+
+
+def _id2label(pipe) -> dict:
+    model = getattr(pipe, "model", None)
+    return (model.config if model is not None else pipe.config).id2label
+
+
+def forward_logits(pipe, features: list[dict]):
+    """Logits (numpy, [batch, classes]) para features já tokenizadas, em qualquer backend."""
+    if hasattr(pipe, "logits"):
+        # backend ONNX
+        return pipe.logits(features)
+
+    import torch
+
+    batch = pipe.tokenizer.pad(features, padding=True, return_tensors="pt")
+    with torch.inference_mode():
+        return pipe.model(**batch).logits.float().numpy()
+
+
+def _forward_features(pipe, features: list[dict]) -> list[tuple[str, float]]:
+    """Forward pass direto no modelo (mesma saída do pipeline: argmax do softmax)."""
+    from app.onnx_backend import softmax
+
+    probs = softmax(forward_logits(pipe, features))
+    id2label = _id2label(pipe)
+    return [(_map_label(id2label[int(row.argmax())]), float(row.max())) for row in probs]
+
+
+def predict_features(features: list[dict]):
+    """
+    Como predict_batch, mas para textos já tokenizados (ver tokenize).
+    Retorna ([(label, score), ...], compute_time_ms).
+    """
+    if not features:
+        return [], 0.0
+
+    pipe = load_model()
+    start = time.perf_counter()
+    results = _forward_features(pipe, features)
+    compute_time_ms = (time.perf_counter() - start) * 1000
+    return results, compute_time_ms
+
+
+def predict_many(texts: list[str], batch_size: int = 32):
+    """
+    Classifica muitos textos em batches ordenados por tamanho (menos padding).
+    Retorna [(label, score, item_time_ms, batch_time_ms), ...] na ordem de entrada.
+    item_time_ms é o tempo do batch dividido pelo número de itens dele.
+    """
+    if not texts:
+        return []
+
+    pipe = load_model()
+    batch_size = max(1, int(batch_size))
+    features = tokenize(texts)
+    order = sorted(range(len(texts)), key=lambda i: len(features[i]["input_ids"]))
+
+    results = [None] * len(texts)
+    for start in range(0, len(order), batch_size):
+        idx = order[start:start + batch_size]
+        t0 = time.perf_counter()
+        outputs = _forward_features(pipe, [features[i] for i in idx])
+        batch_time_ms = (time.perf_counter() - t0) * 1000
+
+        for i, (label, score) in zip(idx, outputs):
+            results[i] = (label, score, batch_time_ms / len(idx), batch_time_ms)
+
+    return results
+
+
+def warm_up(lengths: list[int], batch_sizes: list[int] = (1,)) -> float:
+    """
+    Roda forward passes descartáveis em vários tamanhos de sequência/batch
+    para aquecer kernels e o alocador antes do primeiro usuário.
+    Retorna o tempo total (ms).
+    """
+    pipe = load_model()
+    start = time.perf_counter()
+
+    # cobre o caminho do pipeline (predict / predict_batch)
+    pipe("warm up", truncation=True, max_length=MAX_LENGTH)
+
+    text = " ".join(["warm"] * MAX_LENGTH)
+    for length in sorted({max(2, min(int(n), MAX_LENGTH)) for n in lengths}):
+        enc = pipe.tokenizer(text, truncation=True, max_length=length)
+        feature = {"input_ids": enc["input_ids"], "attention_mask": enc["attention_mask"]}
+        for bs in batch_sizes:
+            _forward_features(pipe, [feature] * max(1, int(bs)))
+
+    return (time.perf_counter() - start) * 1000
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Benchmark do micro-batcher com e sem faixas de tamanho (BATCH_BUCKETS).
+
+Gera textos com distribuição de tamanho parecida com a de tweets (maioria
+curta, cauda longa de threads/textos colados até o limite de 512 tokens),
+submete tudo ao MicroBatcher e mede:
+  - tokens reais/s       tokens dos textos (sem padding) por segundo de relógio
+  - tokens processados/s  tokens que o modelo de fato viu (com padding)
+  - eficiência           reais / processados (1.0 = nenhum padding)
+  - latência p50/p99 por texto (fila + forward pass)
+
+Cenários:
+  sem-faixas  uma faixa só (512): batch em ordem de chegada, padding até o maior
+  faixas      BATCH_BUCKETS / BATCH_MAX_TOKENS do ambiente
+
+Uso:
+    python benchmarks/batch_buckets.py --model-dir ./models
+    python benchmarks/batch_buckets.py --requests 256 --rate 200 --json out.json
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+_WORDS = (
+    "good bad love hate today game new time people great really just going "
+    "know think day best still amazing worst happy sad lol omg thanks vote "
+    "watch music movie team win lost tomorrow tonight weekend coffee work"
+).split()
+
+
+def tweet_lengths(n: int, seed: int, long_fraction: float) -> list[int]:
+    """Tamanhos em palavras: log-normal (mediana ~18) + uma fração de textos longos."""
+    rng = random.Random(seed)
+    lengths = []
+    for _ in range(n):
+        if rng.random() < long_fraction:
+            lengths.append(rng.randint(120, 400))
+        else:
+            lengths.append(max(2, min(60, int(rng.lognormvariate(2.9, 0.6)))))
+    return lengths
+
+
+def make_texts(n: int, seed: int, long_fraction: float) -> list[str]:
+    rng = random.Random(seed + 1)
+    return [
+        " ".join(rng.choice(_WORDS) for _ in range(words))
+        for words in tweet_lengths(n, seed, long_fraction)
+    ]
+
+
+def _percentile(values: list[float], p: float) -> float:
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, int(round(p / 100.0 * (len(ordered) - 1)))))
+    return ordered[idx]
+
+
+def run_scenario(name: str, texts: list[str], bounds: list[int], max_batch_tokens, args) -> dict:
+    from app.batching import MicroBatcher
+
+    batcher = MicroBatcher(
+        max_batch_size=args.batch_size,
+        max_wait_ms=args.max_wait_ms,
+        bucket_bounds=bounds,
+        max_batch_tokens=max_batch_tokens,
+    )
+
+    interval = 1.0 / args.rate if args.rate > 0 else 0.0
+    started = time.perf_counter()
+    futures = []
+    for i, text in enumerate(texts):
+        if interval:
+            # chegadas espaçadas (taxa constante); sem --rate tudo chega de uma vez
+            delay = started + i * interval - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        futures.append(batcher.submit(text))
+    results = [f.result() for f in futures]
+    elapsed = time.perf_counter() - started
+
+    stats = batcher.stats()
+    batcher.stop()
+    latencies = [r.inference_time_ms for r in results]
+    return {
+        "scenario": name,
+        "bounds": bounds,
+        "max_batch_tokens": max_batch_tokens,
+        "requests": len(texts),
+        "seconds": elapsed,
+        "batches": stats["batches_total"],
+        "avg_batch_size": stats["items_total"] / max(1, stats["batches_total"]),
+        "tokens": stats["tokens_total"],
+        "padded_tokens": stats["padded_tokens_total"],
+        "padding_efficiency": stats["padding_efficiency"],
+        "real_tokens_per_s": stats["tokens_total"] / elapsed,
+        "processed_tokens_per_s": stats["padded_tokens_total"] / elapsed,
+        "texts_per_s": len(texts) / elapsed,
+        "p50_ms": _percentile(latencies, 50),
+        "p99_ms": _percentile(latencies, 99),
+        "mean_ms": statistics.fmean(latencies),
+    }
+
+
+def _print_report(results: list[dict]):
+    print(
+        f"\n{'cenário':<12} {'batches':>8} {'média':>6} {'efic.':>6} {'tok reais/s':>12} "
+        f"{'tok proc/s':>11} {'textos/s':>9} {'p50 ms':>9} {'p99 ms':>9}"
+    )
+    for r in results:
+        print(
+            f"{r['scenario']:<12} {r['batches']:>8} {r['avg_batch_size']:>6.1f} {r['padding_efficiency']:>6.2f} "
+            f"{r['real_tokens_per_s']:>12.0f} {r['processed_tokens_per_s']:>11.0f} {r['texts_per_s']:>9.1f} "
+            f"{r['p50_ms']:>9.1f} {r['p99_ms']:>9.1f}"
+        )
+    if len(results) == 2 and results[0]["real_tokens_per_s"] > 0:
+        ratio = results[1]["real_tokens_per_s"] / results[0]["real_tokens_per_s"]
+        print(f"\ntokens reais/s com faixas: {ratio:.2f}x")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Micro-batching com e sem faixas de tamanho")
+    parser.add_argument("--model-dir", help="Pasta do modelo (default: MODEL_LOCAL_PATH)")
+    parser.add_argument("--requests", type=int, default=512)
+    parser.add_argument("--long-fraction", type=float, default=0.03, help="Fração de textos longos (120-400 palavras)")
+    parser.add_argument("--rate", type=float, default=0.0, help="Requisições/s (0 = todas de uma vez)")
+    parser.add_argument("--batch-size", type=int, default=None, help="default: BATCH_MAX_SIZE")
+    parser.add_argument("--max-wait-ms", type=float, default=None, help="default: BATCH_MAX_WAIT_MS")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", help="Salva o resultado em JSON")
+    args = parser.parse_args(argv)
+
+    if args.model_dir:
+        os.environ["MODEL_LOCAL_PATH"] = args.model_dir
+
+    from app import utils
+    from app.config import settings
+
+    if args.batch_size is None:
+        args.batch_size = settings.batch_max_size
+    if args.max_wait_ms is None:
+        args.max_wait_ms = settings.batch_max_wait_ms
+
+    utils.load_model()
+    utils.warm_up(settings.warmup_lengths, settings.warmup_batch_sizes)
+
+    texts = make_texts(args.requests, args.seed, args.long_fraction)
+    lengths = [len(f["input_ids"]) for f in utils.tokenize(texts)]
+    print(
+        f"{len(texts)} textos: tokens p50={_percentile(lengths, 50)} p90={_percentile(lengths, 90)} "
+        f"p99={_percentile(lengths, 99)} max={max(lengths)}"
+    )
+
+    results = [
+        run_scenario("sem-faixas", texts, [utils.MAX_LENGTH], None, args),
+        run_scenario("faixas", texts, settings.batch_buckets or [utils.MAX_LENGTH], settings.batch_max_tokens, args),
+    ]
+
+    _print_report(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"results": results}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Benchmark de tempo de import (cold start) por módulo.
+
+Roda `python -X importtime -c "import <módulo>"` em processos novos, agrega
+o custo cumulativo por módulo e mostra os mais caros.
+
+Uso:
+    python benchmarks/import_time.py                          # app.main, 5 rodadas
+    python benchmarks/import_time.py --json out.json          # salva o resultado
+    python benchmarks/import_time.py --baseline out.json      # compara e falha se regredir
+    python benchmarks/import_time.py --max-total-ms 1500      # limite absoluto
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Módulos que NÃO deveriam aparecer no import do app (carregam sob demanda)
+HEAVY_MODULES = ("torch", "transformers", "google.cloud.firestore", "onnxruntime")
+
+
+def _run_once(module: str) -> tuple[float, dict[str, int]]:
+    env = dict(os.environ, PYTHONPATH=ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    wall_ms = (time.perf_counter() - start) * 1000
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} falhou:\n{proc.stderr[-2000:]}")
+
+    cumulative: dict[str, int] = {}
+    for line in proc.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        try:
+            _, cum, name = line[len("import time:"):].split("|")
+            cumulative[name.strip()] = int(cum.strip())
+        except ValueError:
+            continue
+    return wall_ms, cumulative
+
+
+def measure(module: str, runs: int) -> dict:
+    walls = []
+    per_module: dict[str, list[int]] = {}
+    for _ in range(runs):
+        wall_ms, cumulative = _run_once(module)
+        walls.append(wall_ms)
+        for name, us in cumulative.items():
+            per_module.setdefault(name, []).append(us)
+
+    modules_ms = {name: statistics.median(v) / 1000.0 for name, v in per_module.items()}
+    return {
+        "module": module,
+        "runs": runs,
+        "python": sys.version.split()[0],
+        "wall_ms_median": statistics.median(walls),
+        "wall_ms_min": min(walls),
+        "import_ms": modules_ms.get(module, 0.0),
+        "heavy_modules_loaded": sorted(
+            m for m in HEAVY_MODULES if m in modules_ms
+        ),
+        "modules_ms": dict(sorted(modules_ms.items(), key=lambda kv: kv[1], reverse=True)),
+    }
+
+
+def _print_report(result: dict, top: int):
+    print(f"\n⏱️  import {result['module']} ({result['runs']} rodadas, Python {result['python']})")
+    print(f"   import cumulativo: {result['import_ms']:.1f} ms | processo (mediana): {result['wall_ms_median']:.1f} ms")
+    if result["heavy_modules_loaded"]:
+        print(f"   ⚠️  módulos pesados no import: {', '.join(result['heavy_modules_loaded'])}")
+    print(f"\n   {'cumulativo (ms)':>16}  módulo")
+    for name, ms in list(result["modules_ms"].items())[:top]:
+        print(f"   {ms:>16.1f}  {name}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark de tempo de import por módulo")
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=25)
+    parser.add_argument("--json", help="Salva o resultado em JSON")
+    parser.add_argument("--baseline", help="JSON de uma rodada anterior para comparar")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Regressão máxima vs baseline (0.25 = +25%%)")
+    parser.add_argument("--max-total-ms", type=float, help="Limite absoluto do import cumulativo")
+    args = parser.parse_args(argv)
+
+    result = measure(args.module, max(1, args.runs))
+    _print_report(result, args.top)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+
+    ok = True
+    if args.max_total_ms is not None and result["import_ms"] > args.max_total_ms:
+        print(f"\n❌ import {result['import_ms']:.1f} ms > limite {args.max_total_ms:.1f} ms")
+        ok = False
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            base = json.load(f)
+        limit = base["import_ms"] * (1 + args.tolerance)
+        print(f"\n📊 baseline: {base['import_ms']:.1f} ms | atual: {result['import_ms']:.1f} ms | limite: {limit:.1f} ms")
+        if result["import_ms"] > limit:
+            print("❌ Regressão no tempo de import")
+            ok = False
+        new_heavy = set(result["heavy_modules_loaded"]) - set(base.get("heavy_modules_loaded", []))
+        if new_heavy:
+            print(f"❌ Novos módulos pesados no import: {', '.join(sorted(new_heavy))}")
+            ok = False
+
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
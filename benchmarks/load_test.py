@@ -0,0 +1,407 @@
+#!/usr/bin/env python3
+"""
+Suíte de carga da API contra um corpus fixo de tweets (benchmarks/data/tweets.txt).
+
+Cenários (todos por HTTP, com o app de verdade: admission, batcher, executor):
+  cold_start   sobe `uvicorn app.main:app` num processo novo e mede até o /ready
+               responder 200; RSS do servidor logo depois (e o pico, VmHWM)
+  single       /predict sequencial, um texto por vez (latência p50/p90/p99)
+  concurrency  /predict com N clientes simultâneos para cada N em --concurrency
+               (req/s, latência e 503 do admission control)
+  batch        /predict/batch com --batch-size textos por requisição (textos/s)
+
+Alvos:
+  inprocess  o app roda neste processo (httpx + ASGITransport, lifespan incluso)
+  local      usa o servidor do cold start (uvicorn em 127.0.0.1)
+  --url      servidor já rodando (cold start e memória não são medidos)
+
+Cache e coalescing ficam desligados por padrão (o corpus se repete: com eles o
+benchmark mediria o cache); --keep-cache liga de novo. A persistência fica
+desligada (FIRESTORE_ENABLED=false).
+
+O resultado vai para JSON (--json); com --baseline compara com uma rodada
+anterior e sai com código 1 se alguma métrica piorar mais que --tolerance.
+
+Uso:
+    python benchmarks/load_test.py --model-dir ./models --json bench.json
+    python benchmarks/load_test.py --target local --concurrency 1,8,32 --baseline bench.json
+    python benchmarks/load_test.py --url http://localhost:8000 --api-key $API_KEY --scenarios single,concurrency
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+CORPUS = os.path.join(ROOT, "benchmarks", "data", "tweets.txt")
+BENCH_API_KEY = "bench-key"
+SCENARIOS = ("cold_start", "single", "concurrency", "batch")
+
+# métrica -> (caminho no JSON, True se maior é melhor)
+COMPARED = {
+    "cold_start_ready_ms": (("cold_start", "ready_ms"), False),
+    "cold_start_rss_mb": (("cold_start", "rss_mb"), False),
+    "single_p50_ms": (("single", "p50_ms"), False),
+    "single_p99_ms": (("single", "p99_ms"), False),
+    "batch_texts_per_s": (("batch", "texts_per_s"), True),
+}
+
+
+def load_corpus(path: str = CORPUS) -> list[str]:
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def _percentile(values: list[float], p: float) -> float:
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, int(round(p / 100.0 * (len(ordered) - 1)))))
+    return ordered[idx]
+
+
+def _latency_summary(latencies: list[float]) -> dict:
+    if not latencies:
+        return {"p50_ms": None, "p90_ms": None, "p99_ms": None, "mean_ms": None}
+    return {
+        "p50_ms": _percentile(latencies, 50),
+        "p90_ms": _percentile(latencies, 90),
+        "p99_ms": _percentile(latencies, 99),
+        "mean_ms": statistics.fmean(latencies),
+    }
+
+
+def _proc_status_mb(pid: int) -> dict:
+    mem = {}
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                key, _, rest = line.partition(":")
+                if key in ("VmRSS", "VmHWM"):
+                    mem[key] = int(rest.split()[0]) / 1024.0
+    except OSError:
+        pass
+    return {"rss_mb": mem.get("VmRSS"), "peak_rss_mb": mem.get("VmHWM")}
+
+
+def _git_commit() -> str | None:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True)
+    except OSError:
+        return None
+    return out.stdout.strip() or None
+
+
+def _bench_env(keep_cache: bool) -> dict:
+    env = {
+        "API_KEY": os.environ.get("API_KEY", BENCH_API_KEY),
+        "FIRESTORE_ENABLED": "false",
+        "UI_QUOTA_ENABLED": "false",
+    }
+    if not keep_cache:
+        env["CACHE_ENABLED"] = "false"
+        env["COALESCE_ENABLED"] = "false"
+    return env
+
+
+# ---------------------------------------------------------------- cold start
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(env: dict, timeout: float) -> tuple[subprocess.Popen, str, dict]:
+    """Sobe o uvicorn num processo novo e espera o /ready; retorna (proc, url, cold_start)."""
+    import httpx
+
+    port = _free_port()
+    url = f"http://127.0.0.1:{port}"
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port)],
+        cwd=ROOT,
+        env={**os.environ, **env},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+    )
+    listening_ms = None
+    deadline = started + timeout
+    while True:
+        if proc.poll() is not None:
+            raise RuntimeError(f"servidor saiu com código {proc.returncode}:\n{proc.stderr.read().decode()[-2000:]}")
+        if time.perf_counter() > deadline:
+            proc.kill()
+            raise RuntimeError(f"/ready não respondeu 200 em {timeout:.0f} s")
+        try:
+            resp = httpx.get(url + "/ready", timeout=1.0)
+            if listening_ms is None:
+                listening_ms = (time.perf_counter() - started) * 1000
+            if resp.status_code == 200:
+                break
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.05)
+
+    ready_ms = (time.perf_counter() - started) * 1000
+    body = resp.json()
+    cold_start = {
+        "ready_ms": ready_ms,
+        "listening_ms": listening_ms,
+        "model_load_ms": body.get("model_load_ms"),
+        "warmup_ms": body.get("warmup_ms"),
+        **_proc_status_mb(proc.pid),
+    }
+    return proc, url, cold_start
+
+
+def stop_server(proc: subprocess.Popen):
+    proc.terminate()
+    try:
+        proc.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+
+
+# ---------------------------------------------------------------- cenários
+
+async def _post(client, path: str, payload: dict, api_key: str) -> tuple[int, float]:
+    start = time.perf_counter()
+    resp = await client.post(path, json=payload, headers={"X-API-Key": api_key})
+    return resp.status_code, (time.perf_counter() - start) * 1000
+
+
+async def run_single(client, texts: list[str], requests: int, api_key: str) -> dict:
+    latencies, errors = [], 0
+    for i in range(requests):
+        code, ms = await _post(client, "/predict", {"text": texts[i % len(texts)]}, api_key)
+        if code == 200:
+            latencies.append(ms)
+        else:
+            errors += 1
+    return {"requests": requests, "errors": errors, **_latency_summary(latencies)}
+
+
+async def run_concurrency(client, texts: list[str], level: int, requests: int, api_key: str) -> dict:
+    latencies, codes = [], {}
+    counter = iter(range(requests))
+
+    async def worker():
+        for i in counter:
+            code, ms = await _post(client, "/predict", {"text": texts[i % len(texts)]}, api_key)
+            codes[code] = codes.get(code, 0) + 1
+            if code == 200:
+                latencies.append(ms)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(level)))
+    elapsed = time.perf_counter() - started
+    return {
+        "concurrency": level,
+        "requests": requests,
+        "ok": len(latencies),
+        "shed_503": codes.get(503, 0),
+        "errors": requests - len(latencies) - codes.get(503, 0),
+        "seconds": elapsed,
+        "req_per_s": len(latencies) / elapsed if elapsed > 0 else 0.0,
+        **_latency_summary(latencies),
+    }
+
+
+async def run_batch(client, texts: list[str], batch_size: int, requests: int, api_key: str) -> dict:
+    latencies, errors, done = [], 0, 0
+    started = time.perf_counter()
+    for i in range(requests):
+        items = [{"text": texts[(i * batch_size + j) % len(texts)]} for j in range(batch_size)]
+        code, ms = await _post(client, "/predict/batch", {"items": items}, api_key)
+        if code == 200:
+            latencies.append(ms)
+            done += batch_size
+        else:
+            errors += 1
+    elapsed = time.perf_counter() - started
+    return {
+        "batch_size": batch_size,
+        "requests": requests,
+        "errors": errors,
+        "seconds": elapsed,
+        "texts_per_s": done / elapsed if elapsed > 0 else 0.0,
+        **_latency_summary(latencies),
+    }
+
+
+async def run_scenarios(client, texts: list[str], args, api_key: str) -> dict:
+    # aquecimento do caminho HTTP (não entra na medida)
+    for i in range(args.warmup):
+        await _post(client, "/predict", {"text": texts[i % len(texts)]}, api_key)
+
+    result = {}
+    if "single" in args.scenarios:
+        result["single"] = await run_single(client, texts, args.requests, api_key)
+        print(f"single: p50 {result['single']['p50_ms']:.1f} ms | p99 {result['single']['p99_ms']:.1f} ms")
+    if "concurrency" in args.scenarios:
+        result["concurrency"] = []
+        for level in args.concurrency:
+            r = await run_concurrency(client, texts, level, max(args.requests, level * 4), api_key)
+            result["concurrency"].append(r)
+            print(f"concurrency x{level}: {r['req_per_s']:.1f} req/s | p99 {r['p99_ms'] or 0:.1f} ms | 503: {r['shed_503']}")
+    if "batch" in args.scenarios:
+        result["batch"] = await run_batch(client, texts, args.batch_size, args.batch_requests, api_key)
+        print(f"batch x{args.batch_size}: {result['batch']['texts_per_s']:.1f} textos/s")
+    return result
+
+
+async def run_inprocess(texts: list[str], args, api_key: str) -> dict:
+    import httpx
+
+    from app.main import app
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120.0) as client:
+            result = await run_scenarios(client, texts, args, api_key)
+    result["memory"] = _proc_status_mb(os.getpid())
+    return result
+
+
+async def run_remote(url: str, texts: list[str], args, api_key: str) -> dict:
+    import httpx
+
+    limits = httpx.Limits(max_connections=max(args.concurrency + [1]))
+    async with httpx.AsyncClient(base_url=url, timeout=120.0, limits=limits) as client:
+        return await run_scenarios(client, texts, args, api_key)
+
+
+# ---------------------------------------------------------------- baseline
+
+def flatten(result: dict) -> dict:
+    """Métricas comparáveis (uma por chave) de um resultado."""
+    flat = {}
+    for name, (path, _) in COMPARED.items():
+        node = result
+        for key in path:
+            node = node.get(key) if isinstance(node, dict) else None
+        if isinstance(node, (int, float)):
+            flat[name] = float(node)
+    for r in result.get("concurrency", []):
+        flat[f"concurrency_{r['concurrency']}_req_per_s"] = float(r["req_per_s"])
+        if r.get("p99_ms") is not None:
+            flat[f"concurrency_{r['concurrency']}_p99_ms"] = float(r["p99_ms"])
+    return flat
+
+
+def _higher_is_better(name: str) -> bool:
+    if name in COMPARED:
+        return COMPARED[name][1]
+    return name.endswith("_per_s")
+
+
+def compare(result: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Lista de regressões (vazia = ok) das métricas presentes nas duas rodadas."""
+    current, base = flatten(result), flatten(baseline)
+    regressions = []
+    print(f"\n{'métrica':<32} {'baseline':>10} {'atual':>10} {'delta':>8}")
+    for name in sorted(set(current) & set(base)):
+        old, new = base[name], current[name]
+        delta = (new - old) / old if old else 0.0
+        worse = -delta if _higher_is_better(name) else delta
+        flag = "❌" if worse > tolerance else ""
+        print(f"{name:<32} {old:>10.1f} {new:>10.1f} {delta:>+7.0%} {flag}")
+        if worse > tolerance:
+            regressions.append(name)
+    return regressions
+
+
+def _int_list(value: str) -> list[int]:
+    return [int(x) for x in value.split(",") if x.strip()]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Suíte de carga da API (latência, vazão, cold start, memória)")
+    parser.add_argument("--model-dir", help="Pasta do modelo (default: MODEL_LOCAL_PATH)")
+    parser.add_argument("--target", choices=("inprocess", "local"), default="inprocess")
+    parser.add_argument("--url", help="Servidor já rodando (ignora --target)")
+    parser.add_argument("--api-key", help="X-API-Key do /predict (default: API_KEY ou uma chave de bench)")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--corpus", default=CORPUS)
+    parser.add_argument("--requests", type=int, default=200, help="Requisições por cenário de /predict")
+    parser.add_argument("--concurrency", type=_int_list, default=[1, 4, 16, 64])
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--batch-requests", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--keep-cache", action="store_true", help="Não desliga cache/coalescing")
+    parser.add_argument("--startup-timeout", type=float, default=300.0)
+    parser.add_argument("--json", help="Salva o resultado em JSON")
+    parser.add_argument("--baseline", help="JSON de uma rodada anterior para comparar")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Piora máxima vs baseline (0.15 = 15%%)")
+    args = parser.parse_args(argv)
+    args.scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+
+    if args.model_dir:
+        os.environ["MODEL_LOCAL_PATH"] = args.model_dir
+    env = _bench_env(args.keep_cache)
+    api_key = args.api_key or env["API_KEY"]
+
+    texts = load_corpus(args.corpus)
+    result = {
+        "meta": {
+            "target": "url" if args.url else args.target,
+            "commit": _git_commit(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "cores": os.cpu_count(),
+            "corpus": os.path.relpath(args.corpus, ROOT),
+            "corpus_texts": len(texts),
+            "env": {k: os.environ.get(k) for k in ("MODEL_BACKEND", "SERVING_MODE", "BATCH_ENABLED", "INFERENCE_WORKERS")},
+            "keep_cache": args.keep_cache,
+        }
+    }
+
+    server = None
+    try:
+        if args.url:
+            result.update(asyncio.run(run_remote(args.url, texts, args, api_key)))
+        else:
+            if "cold_start" in args.scenarios or args.target == "local":
+                server, url, result["cold_start"] = start_server(env, args.startup_timeout)
+                cs = result["cold_start"]
+                print(f"cold start: /ready em {cs['ready_ms']:.0f} ms | RSS {cs['rss_mb'] or 0:.0f} MB")
+                if args.target != "local":
+                    stop_server(server)
+                    server = None
+            if args.target == "local":
+                result.update(asyncio.run(run_remote(url, texts, args, api_key)))
+                result["memory"] = _proc_status_mb(server.pid)
+            else:
+                # settings são lidos no import: o ambiente do bench vem antes de importar o app
+                os.environ.update(env)
+                result.update(asyncio.run(run_inprocess(texts, args, api_key)))
+    finally:
+        if server is not None:
+            stop_server(server)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(result, baseline, args.tolerance)
+        if regressions:
+            print(f"\n❌ Regressão (> {args.tolerance:.0%}): {', '.join(regressions)}")
+            return 1
+        print("\n✅ Sem regressão")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark do custo por registro de log na thread que chama logger.info.
+
+Compara três pipelines escrevendo no mesmo destino:
+  legacy  formatter antigo (datetime.now().isoformat + json.dumps) + StreamHandler síncrono
+  sync    JSONFormatter atual + StreamHandler síncrono (LOG_ASYNC=false)
+  async   QueueHandler com fila limitada + QueueListener (padrão)
+
+--write-delay-us simula um stdout lento (pipe cheio, coletor de logs atrasado):
+cada write dorme esse tempo. No modo async o atraso fica na thread do listener;
+com a fila cheia os registros são descartados (coluna dropped).
+
+Uso:
+    python benchmarks/logging_cost.py
+    python benchmarks/logging_cost.py --records 50000 --write-delay-us 50
+    python benchmarks/logging_cost.py --json out.json
+"""
+
+import argparse
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from app.logger import JSONFormatter, _DroppingQueueHandler  # noqa: E402
+
+
+class LegacyJSONFormatter(logging.Formatter):
+    # cópia do formatter anterior, como referência
+    def format(self, record: logging.LogRecord) -> str:
+        log_data = {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            log_data["exception"] = self.formatException(record.exc_info)
+        return json.dumps(log_data, ensure_ascii=False)
+
+
+class _SlowSink:
+    def __init__(self, path: str, delay_s: float):
+        self._f = open(path, "w", encoding="utf-8")
+        self._delay_s = delay_s
+
+    def write(self, s: str):
+        if self._delay_s:
+            time.sleep(self._delay_s)
+        return self._f.write(s)
+
+    def flush(self):
+        self._f.flush()
+
+    def close(self):
+        self._f.close()
+
+
+def _percentile(values: list[float], p: float) -> float:
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, int(round(p / 100.0 * (len(ordered) - 1)))))
+    return ordered[idx]
+
+
+def run(mode: str, records: int, delay_s: float, queue_max: int) -> dict:
+    sink = _SlowSink(os.devnull, delay_s)
+    stream = logging.StreamHandler(sink)
+    stream.setFormatter(LegacyJSONFormatter() if mode == "legacy" else JSONFormatter())
+
+    listener = None
+    if mode == "async":
+        handler = _DroppingQueueHandler(queue.Queue(maxsize=queue_max))
+        listener = logging.handlers.QueueListener(handler.queue, stream)
+        listener.start()
+    else:
+        handler = stream
+
+    logger = logging.getLogger(f"bench.logging.{mode}")
+    logger.handlers = [handler]
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+
+    per_call_us = []
+    start = time.perf_counter()
+    for i in range(records):
+        t0 = time.perf_counter()
+        logger.info(f"Predição(API): text_len={i % 280}, lang=pt")
+        per_call_us.append((time.perf_counter() - t0) * 1e6)
+    caller_s = time.perf_counter() - start
+
+    if listener is not None:
+        listener.stop()  # esvazia a fila antes de medir o total
+    total_s = time.perf_counter() - start
+    sink.close()
+
+    return {
+        "mode": mode,
+        "records": records,
+        "mean_us": round(statistics.fmean(per_call_us), 2),
+        "p50_us": round(_percentile(per_call_us, 50), 2),
+        "p99_us": round(_percentile(per_call_us, 99), 2),
+        "caller_s": round(caller_s, 4),
+        "total_s": round(total_s, 4),
+        "dropped": getattr(handler, "dropped", 0),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--records", type=int, default=20000)
+    parser.add_argument("--write-delay-us", type=float, default=0.0, help="atraso artificial por write no destino")
+    parser.add_argument("--queue-max", type=int, default=10000)
+    parser.add_argument("--modes", default="legacy,sync,async")
+    parser.add_argument("--json", help="grava os resultados neste arquivo")
+    args = parser.parse_args()
+
+    results = [run(m, args.records, args.write_delay_us / 1e6, args.queue_max) for m in args.modes.split(",")]
+
+    print(f"{'mode':<8} {'mean_us':>9} {'p50_us':>9} {'p99_us':>9} {'caller_s':>9} {'total_s':>9} {'dropped':>8}")
+    for r in results:
+        print(
+            f"{r['mode']:<8} {r['mean_us']:>9} {r['p50_us']:>9} {r['p99_us']:>9} "
+            f"{r['caller_s']:>9} {r['total_s']:>9} {r['dropped']:>8}"
+        )
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"write_delay_us": args.write_delay_us, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
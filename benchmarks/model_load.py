@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Benchmark de carga do modelo: tempo e memória por worker, por formato de pesos.
+
+Sobe N processos por cenário, cada um chamando app.utils.load_model(). Com todos
+carregados ao mesmo tempo, lê /proc/self/smaps_rollup de cada um:
+  - RssAnon: memória privada (cópia dos pesos no heap)
+  - RssFile: páginas do arquivo mapeado (page cache, compartilhável)
+  - Pss:     RSS dividido entre os processos que compartilham as páginas
+
+Cenários:
+  bin           pytorch_model.bin (formato antigo)
+  safetensors   model.safetensors, MODEL_MMAP=false (loader do transformers)
+  mmap          model.safetensors, MODEL_MMAP=true  (app/safetensors_mmap.py)
+
+Uso:
+    python benchmarks/model_load.py --model-dir ./models --workers 4
+    python benchmarks/model_load.py --json out.json
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCENARIOS = {
+    "bin": ("bin", "false"),
+    "safetensors": ("safetensors", "false"),
+    "mmap": ("safetensors", "true"),
+}
+
+# Roda em cada worker: carrega, avisa, espera todos carregarem e só então mede
+_WORKER = r"""
+import json, sys, time
+from app import utils
+
+t0 = time.perf_counter()
+utils.load_model()
+load_ms = (time.perf_counter() - t0) * 1000
+print("loaded", flush=True)
+sys.stdin.readline()
+
+mem = {}
+for path in ("/proc/self/smaps_rollup", "/proc/self/status"):
+    try:
+        with open(path) as f:
+            for line in f:
+                key, _, rest = line.partition(":")
+                if key in ("Rss", "Pss", "VmRSS", "RssAnon", "RssFile") and key not in mem:
+                    mem[key] = int(rest.split()[0]) / 1024.0
+    except OSError:
+        pass
+print(json.dumps({"load_ms": load_ms, **{k + "_mb": v for k, v in mem.items()}}), flush=True)
+"""
+
+
+def prepare_dirs(model_dir: str, workdir: str) -> dict[str, str]:
+    """Gera cópias do modelo em .bin e em .safetensors."""
+    import torch
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+    tokenizer = AutoTokenizer.from_pretrained(model_dir)
+    model = AutoModelForSequenceClassification.from_pretrained(model_dir)
+
+    dirs = {}
+    for fmt in ("bin", "safetensors"):
+        out = os.path.join(workdir, fmt)
+        tokenizer.save_pretrained(out)
+        model.config.save_pretrained(out)
+        if fmt == "safetensors":
+            model.save_pretrained(out, safe_serialization=True)
+        else:
+            torch.save(model.state_dict(), os.path.join(out, "pytorch_model.bin"))
+        dirs[fmt] = out
+    return dirs
+
+
+def run_scenario(model_dir: str, mmap_flag: str, workers: int) -> dict:
+    env = dict(
+        os.environ,
+        PYTHONPATH=ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""),
+        MODEL_LOCAL_PATH=model_dir,
+        MODEL_BACKEND="torch",
+        MODEL_MMAP=mmap_flag,
+    )
+    procs = [
+        subprocess.Popen(
+            [sys.executable, "-c", _WORKER],
+            cwd=ROOT,
+            env=env,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            text=True,
+        )
+        for _ in range(workers)
+    ]
+    try:
+        for p in procs:
+            if p.stdout.readline().strip() != "loaded":
+                raise RuntimeError(f"worker falhou ao carregar (rc={p.wait()})")
+        for p in procs:
+            p.stdin.write("\n")
+            p.stdin.flush()
+        reports = [json.loads(p.stdout.readline()) for p in procs]
+    finally:
+        for p in procs:
+            p.wait(timeout=60)
+
+    def _median(key):
+        values = [r[key] for r in reports if key in r]
+        return statistics.median(values) if values else None
+
+    keys = ("load_ms", "VmRSS_mb", "RssAnon_mb", "RssFile_mb", "Pss_mb")
+    return {
+        "workers": workers,
+        **{f"{k}_median": _median(k) for k in keys},
+        "pss_total_mb": sum(r.get("Pss_mb", 0.0) for r in reports),
+    }
+
+
+def _print_report(results: dict):
+    print(f"\n{'cenário':<12} {'load ms':>9} {'RSS MB':>8} {'anon MB':>8} {'file MB':>8} {'PSS MB':>8} {'PSS total':>10}")
+    for name, r in results.items():
+        def fmt(v):
+            return f"{v:.1f}" if v is not None else "-"
+        print(
+            f"{name:<12} {fmt(r['load_ms_median']):>9} {fmt(r['VmRSS_mb_median']):>8} "
+            f"{fmt(r['RssAnon_mb_median']):>8} {fmt(r['RssFile_mb_median']):>8} "
+            f"{fmt(r['Pss_mb_median']):>8} {fmt(r['pss_total_mb']):>10}"
+        )
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark de carga do modelo (tempo e memória por worker)")
+    parser.add_argument("--model-dir", default=os.getenv("MODEL_LOCAL_PATH", "./models"))
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="Lista separada por vírgula")
+    parser.add_argument("--json", help="Salva o resultado em JSON")
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="model_load_")
+    try:
+        dirs = prepare_dirs(os.path.abspath(args.model_dir), workdir)
+        results = {}
+        for name in [s.strip() for s in args.scenarios.split(",") if s.strip()]:
+            fmt, mmap_flag = SCENARIOS[name]
+            results[name] = run_scenario(dirs[fmt], mmap_flag, max(1, args.workers))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    _print_report(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"model_dir": args.model_dir, "results": results}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Benchmark de latência da quota do /ui/predict (enforce_ui_quota) por backend.
+
+Chama a dependency enforce_ui_quota direto (sem HTTP), com IPs variados, e
+mede p50/p90/p99 por chamada. Por padrão as regras ficam frouxas (sem burst,
+limite diário alto) para medir o caminho que grava estado; --real-rules usa
+as regras do ambiente.
+
+Backends:
+  memory     dict em memória
+  local      memória + sync com o Firestore (precisa de credenciais/emulador)
+  firestore  transação por requisição (precisa de credenciais/emulador)
+  redis      script Lua; sem --redis-url sobe um servidor fake local (fakeredis)
+
+Uso:
+    python benchmarks/quota_latency.py                                  # memory + redis (fake)
+    python benchmarks/quota_latency.py --backends memory,redis --redis-url redis://localhost:6379/0
+    FIRESTORE_EMULATOR_HOST=localhost:8080 python benchmarks/quota_latency.py --backends memory,local,firestore
+    python benchmarks/quota_latency.py --json out.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def _request(ip: str):
+    from starlette.requests import Request
+
+    return Request(
+        {
+            "type": "http",
+            "method": "POST",
+            "path": "/ui/predict",
+            "headers": [(b"x-forwarded-for", ip.encode())],
+            "client": ("127.0.0.1", 0),
+        }
+    )
+
+
+def _start_fake_redis() -> tuple[str, object]:
+    import fakeredis
+
+    server = fakeredis.TcpFakeServer(("127.0.0.1", 0), server_type="redis")
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address[:2]
+    return f"redis://{host}:{port}/0", server
+
+
+def _percentile(values: list[float], p: float) -> float:
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, int(round(p / 100.0 * (len(ordered) - 1)))))
+    return ordered[idx]
+
+
+def run_backend(backend: str, requests: int, ips: int, threads: int, warmup: int) -> dict:
+    from fastapi import HTTPException
+
+    from app import quota
+    from app.security import enforce_ui_quota
+
+    quota.shutdown_quota_store()
+    quota.settings.ui_quota_backend = backend
+    store = quota.get_quota_store()
+
+    reqs = [_request(f"10.{(i >> 16) & 255}.{(i >> 8) & 255}.{i & 255}") for i in range(ips)]
+    denied = 0
+
+    def _call(i: int) -> float:
+        nonlocal denied
+        req = reqs[i % ips]
+        start = time.perf_counter_ns()
+        try:
+            enforce_ui_quota(req)
+        except HTTPException:
+            denied += 1
+        return (time.perf_counter_ns() - start) / 1e6
+
+    for i in range(warmup):
+        _call(i)
+    denied = 0
+
+    started = time.perf_counter()
+    if threads > 1:
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            latencies = list(pool.map(_call, range(requests)))
+    else:
+        latencies = [_call(i) for i in range(requests)]
+    elapsed = time.perf_counter() - started
+
+    stats = store.stats()
+    quota.shutdown_quota_store()
+    return {
+        "backend": backend,
+        "requests": requests,
+        "threads": threads,
+        "denied": denied,
+        "p50_ms": _percentile(latencies, 50),
+        "p90_ms": _percentile(latencies, 90),
+        "p99_ms": _percentile(latencies, 99),
+        "mean_ms": statistics.fmean(latencies),
+        "max_ms": max(latencies),
+        "ops_per_s": requests / elapsed if elapsed > 0 else 0.0,
+        "store": stats,
+    }
+
+
+def _print_report(results: list[dict]):
+    print(f"\n{'backend':<10} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'mean ms':>8} {'max ms':>8} {'ops/s':>10} {'negadas':>8}")
+    for r in results:
+        print(
+            f"{r['backend']:<10} {r['p50_ms']:>8.3f} {r['p90_ms']:>8.3f} {r['p99_ms']:>8.3f} "
+            f"{r['mean_ms']:>8.3f} {r['max_ms']:>8.2f} {r['ops_per_s']:>10.0f} {r['denied']:>8}"
+        )
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Latência de enforce_ui_quota por backend")
+    parser.add_argument("--backends", default="memory,redis", help="Lista separada por vírgula")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--ips", type=int, default=1000, help="IPs distintos no tráfego")
+    parser.add_argument("--threads", type=int, default=1)
+    parser.add_argument("--warmup", type=int, default=200)
+    parser.add_argument("--redis-url", help="Redis real; sem isso usa um servidor fake local")
+    parser.add_argument("--real-rules", action="store_true", help="Usa as regras do ambiente (burst/limite)")
+    parser.add_argument("--json", help="Salva o resultado em JSON")
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("UI_QUOTA_ENABLED", "true")
+    if not args.real_rules:
+        os.environ["UI_BURST_MIN_INTERVAL_MS"] = "0"
+        os.environ["UI_DAILY_LIMIT"] = str(10**9)
+
+    from app.config import settings
+
+    fake_server = None
+    results = []
+    for backend in [b.strip() for b in args.backends.split(",") if b.strip()]:
+        if backend == "redis":
+            if args.redis_url:
+                settings.redis_url = args.redis_url
+            else:
+                settings.redis_url, fake_server = _start_fake_redis()
+                print(f"(redis: servidor fake em {settings.redis_url} — mede protocolo/round-trip, não o Redis real)")
+        try:
+            results.append(run_backend(backend, args.requests, args.ips, max(1, args.threads), args.warmup))
+        except Exception as e:
+            print(f"⚠️  {backend}: pulado ({e})")
+
+    if fake_server is not None:
+        fake_server.shutdown()
+
+    _print_report(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"results": results}, f, indent=2, default=str)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Benchmark do custo de montar e serializar a resposta do /predict e do /predict/batch.
+
+Reproduz o que a rota faz depois da inferência, sem HTTP e sem modelo:
+  legacy  PredictResponse(...) validado no construtor + validação/serialização
+          pelo response_model no FastAPI (comportamento anterior)
+  stdlib  dict pronto, validado uma vez pelo response_model (JSON_RESPONSE=stdlib)
+  orjson  dict pronto -> FastJSONResponse, sem passar pelo response_model (JSON_RESPONSE=orjson)
+
+A serialização pelo response_model usa fastapi.routing.serialize_response, com o
+atalho dump_json quando a versão instalada do FastAPI tem.
+
+Uso:
+    python benchmarks/response_serialization.py
+    python benchmarks/response_serialization.py --iterations 20000 --batch-sizes 1,32,256
+    python benchmarks/response_serialization.py --json out.json
+"""
+
+import argparse
+import asyncio
+import inspect
+import json
+import os
+import statistics
+import sys
+import time
+import uuid
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from fastapi.responses import JSONResponse, Response  # noqa: E402
+from fastapi.routing import serialize_response  # noqa: E402
+from fastapi.utils import create_model_field  # noqa: E402
+
+from app.models import BatchPredictItem, BatchPredictResponse, PredictResponse  # noqa: E402
+from app.responses import FastJSONResponse, orjson  # noqa: E402
+
+_DUMP_JSON = "dump_json" in inspect.signature(serialize_response).parameters
+
+
+def _single_body() -> dict:
+    return {
+        "inference_id": str(uuid.uuid4()),
+        "label": "positive",
+        "score": 0.98123,
+        "model_version": "1.0.0",
+        "inference_time_ms": 41.37,
+        "queue_wait_ms": 3.12,
+        "compute_time_ms": 38.25,
+        "cached": False,
+        "num_chunks": None,
+        "aggregation": None,
+        "chunks": None,
+    }
+
+
+def _batch_body(n: int) -> dict:
+    items = [
+        {
+            "inference_id": str(uuid.uuid4()),
+            "label": ("positive", "neutral", "negative")[i % 3],
+            "score": 0.91234,
+            "inference_time_ms": 1.27,
+            "batch_time_ms": 40.64,
+            "cached": False,
+        }
+        for i in range(n)
+    ]
+    return {"model_version": "1.0.0", "count": n, "total_time_ms": 55.1, "compute_time_ms": 40.64, "items": items}
+
+
+def _legacy_model(body: dict):
+    if "items" in body:
+        return BatchPredictResponse(**{**body, "items": [BatchPredictItem(**it) for it in body["items"]]})
+    return PredictResponse(**body)
+
+
+async def _via_response_model(field, content) -> bytes:
+    kwargs = {"dump_json": True} if _DUMP_JSON else {}
+    out = await serialize_response(field=field, response_content=content, **kwargs)
+    return Response(content=out, media_type="application/json").body if _DUMP_JSON else JSONResponse(out).body
+
+
+async def _measure(fn, body: dict, iterations: int) -> list[float]:
+    for _ in range(min(200, iterations)):
+        await fn(body)
+    samples = []
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        await fn(body)
+        samples.append((time.perf_counter() - t0) * 1e6)
+    return samples
+
+
+def _percentile(values: list[float], p: float) -> float:
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, int(round(p / 100.0 * (len(ordered) - 1)))))
+    return ordered[idx]
+
+
+async def run(batch_sizes: list[int], iterations: int) -> list[dict]:
+    single_field = create_model_field(name="Response_predict", type_=PredictResponse, mode="serialization")
+    batch_field = create_model_field(name="Response_batch", type_=BatchPredictResponse, mode="serialization")
+
+    cases = [("single", _single_body(), single_field)]
+    cases += [(f"batch_{n}", _batch_body(n), batch_field) for n in batch_sizes]
+
+    modes = {
+        "legacy": lambda field: lambda body: _via_response_model(field, _legacy_model(body)),
+        "stdlib": lambda field: lambda body: _via_response_model(field, body),
+    }
+    if orjson is not None:
+        async def _fast(body):
+            return FastJSONResponse(body).body
+
+        modes["orjson"] = lambda field: _fast
+
+    results = []
+    for case, body, field in cases:
+        # a rodada só vale se os três caminhos gerarem o mesmo JSON
+        reference = json.loads(await modes["legacy"](field)(body))
+        for mode, make in modes.items():
+            fn = make(field)
+            assert json.loads(await fn(body)) == reference, f"{mode} diverge em {case}"
+            iters = iterations if case == "single" else max(50, iterations // max(1, len(body["items"]) // 8))
+            samples = await _measure(fn, body, iters)
+            results.append(
+                {
+                    "case": case,
+                    "mode": mode,
+                    "iterations": iters,
+                    "mean_us": round(statistics.fmean(samples), 2),
+                    "p50_us": round(_percentile(samples, 50), 2),
+                    "p99_us": round(_percentile(samples, 99), 2),
+                }
+            )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=10000)
+    parser.add_argument("--batch-sizes", default="32,256")
+    parser.add_argument("--json", help="grava os resultados neste arquivo")
+    args = parser.parse_args()
+
+    batch_sizes = [int(n) for n in args.batch_sizes.split(",") if n.strip()]
+    results = asyncio.run(run(batch_sizes, args.iterations))
+
+    if orjson is None:
+        print("orjson não instalado: modo orjson fora da comparação")
+    print(f"{'case':<10} {'mode':<8} {'mean_us':>9} {'p50_us':>9} {'p99_us':>9}")
+    for r in results:
+        print(f"{r['case']:<10} {r['mode']:<8} {r['mean_us']:>9} {r['p50_us']:>9} {r['p99_us']:>9}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"dump_json": _DUMP_JSON, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Benchmark de vazão por número de workers: SERVING_MODE=thread vs process.
+
+Para cada N em --workers, sobe um processo limpo que carrega o modelo e roda
+a mesma carga (batches de textos pré-tokenizados, todos submetidos de uma vez):
+  thread   N threads no mesmo processo, torch com cores/N threads intra-op cada
+  process  pool de N processos criado por fork depois da carga (app/process_pool.py)
+
+Reporta textos/s, speedup sobre N=1 e, no modo process, memória dos workers
+(Pss soma a parte de cada um nas páginas compartilhadas; RssAnon é a cópia privada).
+
+Uso:
+    python benchmarks/serving_scaling.py --model-dir ./models
+    python benchmarks/serving_scaling.py --workers 1,2,4,8 --modes process --json out.json
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def _proc_mem(pid: int) -> dict:
+    mem = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                key, _, rest = line.partition(":")
+                if key in ("Rss", "Pss", "RssAnon", "RssFile"):
+                    mem[key + "_mb"] = int(rest.split()[0]) / 1024.0
+    except OSError:
+        pass
+    return mem
+
+
+def run_once(mode: str, workers: int, batches: int, batch_size: int, seed: int) -> dict:
+    """Roda num processo próprio (chamado via --run)."""
+    os.environ["SERVING_MODE"] = mode
+    os.environ["PROCESS_WORKERS"] = str(workers)
+    os.environ["INFERENCE_WORKERS"] = str(workers)
+
+    from batch_buckets import make_texts
+
+    from app import process_pool, utils
+    from app.config import settings
+    from app.executor import get_inference_executor, submit_inference
+
+    texts = make_texts(batches * batch_size, seed, long_fraction=0.0)
+    utils.load_model()
+    features = utils.tokenize(texts)
+    chunks = [features[i:i + batch_size] for i in range(0, len(features), batch_size)]
+
+    if mode == "process":
+        process_pool.start_process_pool()
+    else:
+        get_inference_executor()
+        if settings.warmup_enabled:
+            utils.warm_up(settings.warmup_lengths, settings.warmup_batch_sizes)
+
+    # uma rodada curta para estabilizar (alocador, caches)
+    for f in [submit_inference(utils.predict_features, c) for c in chunks[:workers]]:
+        f.result()
+
+    started = time.perf_counter()
+    for f in [submit_inference(utils.predict_features, c) for c in chunks]:
+        f.result()
+    elapsed = time.perf_counter() - started
+
+    result = {
+        "mode": mode,
+        "workers": workers,
+        "texts": len(texts),
+        "seconds": elapsed,
+        "texts_per_s": len(texts) / elapsed,
+    }
+    if mode == "process":
+        mems = [_proc_mem(pid) for pid in process_pool.stats()["pids"]]
+        for key in ("Pss_mb", "RssAnon_mb", "Rss_mb"):
+            values = [m[key] for m in mems if key in m]
+            if values:
+                result["workers_" + key] = sum(values)
+        result["parent_" + "Rss_mb"] = _proc_mem(os.getpid()).get("Rss_mb")
+        process_pool.shutdown_process_pool()
+    return result
+
+
+def _print_report(results: list[dict]):
+    print(f"\n{'modo':<8} {'workers':>7} {'textos/s':>9} {'speedup':>8} {'Pss workers MB':>15} {'RssAnon workers MB':>19}")
+    base = {}
+    for r in results:
+        base.setdefault(r["mode"], r["texts_per_s"])
+        pss = r.get("workers_Pss_mb")
+        anon = r.get("workers_RssAnon_mb")
+        print(
+            f"{r['mode']:<8} {r['workers']:>7} {r['texts_per_s']:>9.1f} {r['texts_per_s'] / base[r['mode']]:>7.2f}x "
+            f"{pss if pss is not None else float('nan'):>15.0f} {anon if anon is not None else float('nan'):>19.0f}"
+        )
+
+
+def main(argv=None) -> int:
+    from app.process_pool import available_cores
+
+    cores = available_cores()
+    default_workers = sorted({1, 2, 4, cores} | ({cores // 2} if cores > 4 else set()))
+
+    parser = argparse.ArgumentParser(description="Vazão vs. workers (thread x process)")
+    parser.add_argument("--model-dir", help="Pasta do modelo (default: MODEL_LOCAL_PATH)")
+    parser.add_argument("--workers", default=",".join(str(n) for n in default_workers))
+    parser.add_argument("--modes", default="thread,process")
+    parser.add_argument("--batches", type=int, default=32)
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", help="Salva o resultado em JSON")
+    parser.add_argument("--run", nargs=2, metavar=("MODE", "N"), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.model_dir:
+        os.environ["MODEL_LOCAL_PATH"] = args.model_dir
+
+    if args.run:
+        sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+        result = run_once(args.run[0], int(args.run[1]), args.batches, args.batch_size, args.seed)
+        print("RESULT " + json.dumps(result), flush=True)
+        return 0
+
+    print(f"cores disponíveis: {cores}")
+    results = []
+    for mode in [m.strip() for m in args.modes.split(",") if m.strip()]:
+        for n in [int(x) for x in args.workers.split(",") if x.strip()]:
+            cmd = [
+                sys.executable, os.path.abspath(__file__), "--run", mode, str(n),
+                "--batches", str(args.batches), "--batch-size", str(args.batch_size), "--seed", str(args.seed),
+            ]
+            proc = subprocess.run(cmd, capture_output=True, text=True, cwd=ROOT)
+            line = next((ln for ln in proc.stdout.splitlines() if ln.startswith("RESULT ")), None)
+            if line is None:
+                print(f"⚠️  {mode} x{n}: falhou\n{proc.stderr[-2000:]}")
+                continue
+            results.append(json.loads(line[len("RESULT "):]))
+            print(f"{mode} x{n}: {results[-1]['texts_per_s']:.1f} textos/s")
+
+    _print_report(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"cores": cores, "results": results}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
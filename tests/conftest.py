@@ -0,0 +1,237 @@
+import threading
+
+import pytest
+
+from app.cache import get_cache
+
+
+@pytest.fixture(autouse=True)
+def _clear_prediction_cache():
+    # o cache é global do processo: não deixa resultado vazar entre testes
+    get_cache().clear()
+    yield
+    get_cache().clear()
+
+
+# ---- Firestore em memória (persistência, rollups, quota, /inferences) ----
+
+
+class FakeIncrement:
+    def __init__(self, value):
+        self.value = value
+
+
+class FakeFieldFilter:
+    def __init__(self, field_path, op_string, value):
+        self.field_path, self.op_string, self.value = field_path, op_string, value
+
+
+class FakeFirestore:
+    """Faz o papel do módulo google.cloud.firestore (o que get_firestore() devolve)."""
+
+    Increment = FakeIncrement
+    FieldFilter = FakeFieldFilter
+    SERVER_TIMESTAMP = "SERVER_TIMESTAMP"
+
+    class Query:
+        ASCENDING = "ASCENDING"
+        DESCENDING = "DESCENDING"
+
+    @staticmethod
+    def transactional(fn):
+        return fn
+
+
+_OPS = {"==": lambda a, b: a == b, ">=": lambda a, b: a >= b, "<": lambda a, b: a < b}
+
+
+def _merge(target: dict, data: dict):
+    # set(merge=True): mapas são mesclados e Increment soma no valor atual
+    for k, v in data.items():
+        if isinstance(v, dict):
+            _merge(target.setdefault(k, {}), v)
+        elif isinstance(v, FakeIncrement):
+            target[k] = target.get(k, 0) + v.value
+        else:
+            target[k] = v
+
+
+class FakeSnapshot:
+    def __init__(self, doc_id: str, data: dict | None):
+        self.id = doc_id
+        self.exists = data is not None
+        self._data = data
+
+    def to_dict(self):
+        return dict(self._data) if self._data is not None else None
+
+
+class FakeDocRef:
+    def __init__(self, db: "FakeFirestoreDB", collection: str, doc_id: str):
+        self._db = db
+        self.id = doc_id
+        self.path = (collection, doc_id)
+
+    def get(self, transaction=None):
+        return FakeSnapshot(self.id, self._db.docs.get(self.path))
+
+
+class FakeQuery:
+    """Coleção/consulta: where/order_by/select/start_after/limit/stream."""
+
+    def __init__(self, db, name, filters=(), orders=(), fields=None, after=None, limit=None):
+        self._db, self.name = db, name
+        self._filters, self._orders, self._fields = filters, orders, fields
+        self._after, self._limit = after, limit
+
+    def _copy(self, **kw):
+        state = dict(
+            filters=self._filters, orders=self._orders, fields=self._fields, after=self._after, limit=self._limit
+        )
+        state.update(kw)
+        return FakeQuery(self._db, self.name, **state)
+
+    def document(self, doc_id: str) -> FakeDocRef:
+        return FakeDocRef(self._db, self.name, doc_id)
+
+    def where(self, filter):
+        return self._copy(filters=self._filters + (filter,))
+
+    def order_by(self, field, direction=FakeFirestore.Query.ASCENDING):
+        return self._copy(orders=self._orders + ((field, direction),))
+
+    def select(self, fields):
+        return self._copy(fields=list(fields))
+
+    def start_after(self, values: dict):
+        return self._copy(after=values)
+
+    def limit(self, n):
+        return self._copy(limit=n)
+
+    def _key(self, doc_id, data):
+        return tuple(doc_id if field == "__name__" else data.get(field) for field, _ in self._orders)
+
+    def stream(self):
+        self._db.queries += 1
+        rows = [
+            (doc_id, d)
+            for (col, doc_id), d in list(self._db.docs.items())
+            if col == self.name and all(_OPS[f.op_string](d.get(f.field_path), f.value) for f in self._filters)
+        ]
+        descending = bool(self._orders) and self._orders[0][1] == FakeFirestore.Query.DESCENDING
+        if self._orders:
+            rows.sort(key=lambda r: self._key(*r), reverse=descending)
+        if self._after is not None:
+            after = tuple(self._after[field] for field, _ in self._orders)
+            rows = [r for r in rows if (self._key(*r) < after if descending else self._key(*r) > after)]
+        for doc_id, d in rows[: self._limit]:
+            yield FakeSnapshot(doc_id, {k: v for k, v in d.items() if self._fields is None or k in self._fields})
+
+
+class FakeWriteBatch:
+    def __init__(self, db: "FakeFirestoreDB"):
+        self._db = db
+        self._ops = []
+
+    def set(self, ref: FakeDocRef, data: dict, merge: bool = False):
+        self._ops.append((ref.path, data, merge))
+
+    def commit(self):
+        assert len(self._ops) <= 500
+        with self._db.lock:
+            if self._db.fail_next > 0:
+                self._db.fail_next -= 1
+                raise RuntimeError("unavailable")
+            self._db.commits.append(len(self._ops))
+            self._db.apply(self._ops)
+
+
+class FakeTransaction:
+    """Com FakeFirestore.transactional as escritas valem na hora (um processo, sem concorrência)."""
+
+    def __init__(self, db: "FakeFirestoreDB"):
+        self._db = db
+
+    def set(self, ref: FakeDocRef, data: dict, merge: bool = False):
+        with self._db.lock:
+            self._db.apply([(ref.path, data, merge)])
+
+
+class FakeFirestoreDB:
+    """Firestore em memória: docs[(coleção, id)] -> dict."""
+
+    def __init__(self, docs: dict | None = None, fail_next: int = 0):
+        self.docs = dict(docs or {})
+        self.commits = []  # tamanho de cada batch gravado
+        self.queries = 0
+        self.fail_next = fail_next
+        self.lock = threading.Lock()
+
+    def apply(self, ops):
+        for path, data, merge in ops:
+            if merge:
+                _merge(self.docs.setdefault(path, {}), data)
+            else:
+                self.docs[path] = dict(data)
+
+    def collection(self, name: str) -> FakeQuery:
+        return FakeQuery(self, name)
+
+    def batch(self) -> FakeWriteBatch:
+        return FakeWriteBatch(self)
+
+    def transaction(self) -> FakeTransaction:
+        return FakeTransaction(self)
+
+    def get_all(self, refs):
+        return [ref.get() for ref in refs]
+
+
+@pytest.fixture
+def make_firestore_db():
+    return FakeFirestoreDB
+
+
+@pytest.fixture
+def firestore_db(make_firestore_db):
+    return make_firestore_db()
+
+
+@pytest.fixture
+def fake_firestore():
+    return FakeFirestore
+
+
+# ---- modelo minúsculo (ONNX, safetensors/mmap) ----
+
+TINY_BERT_WORDS = "i love this hate the sky is blue not bad at all meh".split()
+
+
+@pytest.fixture
+def tiny_bert_dir(request, tmp_path):
+    """
+    Bert de pesos aleatórios + tokenizer salvos com save_pretrained (model.safetensors).
+    Overrides do BertConfig via parametrize(..., indirect=True).
+    """
+    pytest.importorskip("torch")
+    from transformers import BertConfig, BertForSequenceClassification, BertTokenizerFast
+
+    vocab = tmp_path / "vocab.txt"
+    vocab.write_text("\n".join(["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]", *TINY_BERT_WORDS]), encoding="utf-8")
+    BertTokenizerFast(vocab_file=str(vocab)).save_pretrained(tmp_path)
+
+    config = {
+        "vocab_size": len(TINY_BERT_WORDS) + 5,
+        "hidden_size": 32,
+        "num_hidden_layers": 2,
+        "num_attention_heads": 2,
+        "intermediate_size": 64,
+        "max_position_embeddings": 64,
+        "num_labels": 3,
+        "id2label": {0: "LABEL_0", 1: "LABEL_1", 2: "LABEL_2"},
+        "label2id": {"LABEL_0": 0, "LABEL_1": 1, "LABEL_2": 2},
+        **getattr(request, "param", {}),
+    }
+    BertForSequenceClassification(BertConfig(**config)).eval().save_pretrained(tmp_path)
+    return tmp_path
@@ -0,0 +1,213 @@
+import asyncio
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import admission, main
+from app.admission import PRIORITY_API, PRIORITY_UI, AdmissionController, AdmissionRejected
+
+client = TestClient(main.app)
+
+
+def test_caps_in_flight_and_sheds_when_queue_is_full():
+    async def scenario():
+        ctrl = AdmissionController(max_in_flight=1, max_queue=1, latency_budget_ms=10_000)
+        await ctrl.acquire(PRIORITY_API)
+
+        waiter = asyncio.ensure_future(ctrl.acquire(PRIORITY_API))
+        await asyncio.sleep(0)
+        assert ctrl.stats()["queue_depth"] == 1
+
+        with pytest.raises(AdmissionRejected) as exc:
+            await ctrl.acquire(PRIORITY_API)
+        assert exc.value.reason == "queue_full"
+        assert exc.value.retry_after_s >= 1
+
+        ctrl.release(10.0)
+        await waiter
+        stats = ctrl.stats()
+        assert stats["in_flight"] == 1
+        assert stats["shed_reasons"]["queue_full"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_api_traffic_is_served_before_ui():
+    async def scenario():
+        ctrl = AdmissionController(max_in_flight=1, max_queue=10, latency_budget_ms=10_000, ui_budget_factor=1.0)
+        await ctrl.acquire(PRIORITY_API)
+
+        order = []
+
+        async def request(name, priority):
+            await ctrl.acquire(priority)
+            order.append(name)
+
+        tasks = [
+            asyncio.ensure_future(request("ui-1", PRIORITY_UI)),
+            asyncio.ensure_future(request("ui-2", PRIORITY_UI)),
+        ]
+        await asyncio.sleep(0)
+        tasks.append(asyncio.ensure_future(request("api", PRIORITY_API)))
+        await asyncio.sleep(0)
+
+        for _ in range(3):
+            ctrl.release()
+            await asyncio.sleep(0)
+        await asyncio.gather(*tasks)
+        assert order == ["api", "ui-1", "ui-2"]
+
+    asyncio.run(scenario())
+
+
+def test_ui_is_shed_before_api_on_latency_budget():
+    async def scenario():
+        # serviço médio de 1s com 1 slot: cada item na fila soma ~1s de espera
+        ctrl = AdmissionController(
+            max_in_flight=1, max_queue=100, latency_budget_ms=2500, ui_budget_factor=0.5, initial_service_ms=1000
+        )
+        await ctrl.acquire(PRIORITY_API)
+        queued = asyncio.ensure_future(ctrl.acquire(PRIORITY_API))
+        await asyncio.sleep(0)
+
+        # espera estimada de 2s: cabe no orçamento da API (2.5s), não no da UI (1.25s)
+        with pytest.raises(AdmissionRejected) as exc:
+            await ctrl.acquire(PRIORITY_UI)
+        assert exc.value.reason == "latency_budget"
+        assert exc.value.retry_after_s == 2
+
+        api = asyncio.ensure_future(ctrl.acquire(PRIORITY_API))
+        await asyncio.sleep(0)
+        assert ctrl.stats()["queue_depth_api"] == 2
+
+        ctrl.release()
+        ctrl.release()
+        await asyncio.gather(queued, api)
+        assert ctrl.stats()["shed"] == {"api": 0, "ui": 1}
+
+    asyncio.run(scenario())
+
+
+def test_waiter_times_out_and_frees_its_place():
+    async def scenario():
+        ctrl = AdmissionController(max_in_flight=1, max_queue=10, latency_budget_ms=20, initial_service_ms=1)
+        await ctrl.acquire(PRIORITY_API)
+        with pytest.raises(AdmissionRejected) as exc:
+            await ctrl.acquire(PRIORITY_API)
+        assert exc.value.reason == "timeout"
+        assert ctrl.stats()["queue_depth"] == 0
+
+        ctrl.release()
+        assert ctrl.stats()["in_flight"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_endpoint_returns_503_with_retry_after(monkeypatch):
+    monkeypatch.setenv("API_KEY", "test-key")
+    monkeypatch.setenv("FIRESTORE_ENABLED", "false")
+    ctrl = AdmissionController(max_in_flight=1, max_queue=0)
+    ctrl._in_flight = 1  # todos os slots ocupados
+    monkeypatch.setattr(admission, "get_admission", lambda: ctrl)
+
+    r = client.post("/predict", json={"text": "hello", "lang": "en"}, headers={"X-API-Key": "test-key"})
+    assert r.status_code == 503
+    assert int(r.headers["Retry-After"]) >= 1
+    assert ctrl.stats()["shed"]["api"] == 1
+
+
+def test_batch_cost_waits_for_enough_free_slots():
+    async def scenario():
+        ctrl = AdmissionController(max_in_flight=4, max_queue=10, latency_budget_ms=10_000)
+        await ctrl.acquire(PRIORITY_API)
+        await ctrl.acquire(PRIORITY_API)
+
+        batch = asyncio.ensure_future(ctrl.acquire(PRIORITY_API, cost=3))
+        await asyncio.sleep(0)
+        # 2 livres de 4: o lote de 3 espera
+        assert not batch.done() and ctrl.stats()["in_flight"] == 2
+
+        ctrl.release()
+        await batch
+        assert ctrl.stats()["in_flight"] == 4
+
+        # lote maior que a capacidade ocupa todos os slots
+        ctrl.release(cost=3)
+        ctrl.release()
+        await ctrl.acquire(PRIORITY_API, cost=100)
+        assert ctrl.stats()["in_flight"] == 4
+
+    asyncio.run(scenario())
+
+
+def test_batch_endpoint_is_shed_when_saturated(monkeypatch):
+    monkeypatch.setenv("API_KEY", "test-key")
+    monkeypatch.setenv("FIRESTORE_ENABLED", "false")
+    ctrl = AdmissionController(max_in_flight=4, max_queue=0)
+    ctrl._in_flight = 1  # um slot ocupado: cabe um /predict, não um lote de 4
+    monkeypatch.setattr(admission, "get_admission", lambda: ctrl)
+    monkeypatch.setattr(main, "predict_many", lambda texts, batch_size: [("neutral", 0.7, 1.0, 1.0) for _ in texts])
+
+    items = [{"text": f"tweet {i}", "lang": "en"} for i in range(4)]
+    r = client.post("/predict/batch", json={"items": items}, headers={"X-API-Key": "test-key"})
+    assert r.status_code == 503
+    assert int(r.headers["Retry-After"]) >= 1
+    assert ctrl.stats()["shed"]["api"] == 1
+
+    r = client.post("/predict/batch", json={"items": items[:3]}, headers={"X-API-Key": "test-key"})
+    assert r.status_code == 200
+    assert ctrl.stats()["in_flight"] == 1
+
+
+def test_stream_batches_report_shedding_per_line(monkeypatch):
+    monkeypatch.setenv("API_KEY", "test-key")
+    monkeypatch.setenv("FIRESTORE_ENABLED", "false")
+    ctrl = AdmissionController(max_in_flight=2, max_queue=0)
+    ctrl._in_flight = 2
+    monkeypatch.setattr(admission, "get_admission", lambda: ctrl)
+
+    body = '{"text": "a"}\n{"text": "b"}\n'
+    r = client.post("/predict/stream", content=body, headers={"X-API-Key": "test-key"})
+    lines = [json.loads(line) for line in r.text.splitlines()]
+    assert [line["line"] for line in lines] == [1, 2]
+    assert all(line["retry_after_s"] >= 1 and "error" in line for line in lines)
+
+
+def test_ui_request_shed_by_admission_does_not_consume_quota(monkeypatch):
+    from app import security
+
+    monkeypatch.setenv("FIRESTORE_ENABLED", "false")
+    monkeypatch.setenv("UI_QUOTA_ENABLED", "true")
+    calls = []
+    monkeypatch.setattr(security, "check_ui_quota", lambda ip, now: calls.append(ip) or (True, ""))
+    ctrl = AdmissionController(max_in_flight=1, max_queue=0)
+    ctrl._in_flight = 1
+    monkeypatch.setattr(admission, "get_admission", lambda: ctrl)
+
+    r = client.post("/ui/predict", json={"text": "hello", "lang": "en"})
+    assert r.status_code == 503
+    assert calls == []
+
+    # com slot livre a quota é cobrada (e o 429 dela continua valendo)
+    ctrl._in_flight = 0
+    monkeypatch.setattr(security, "check_ui_quota", lambda ip, now: calls.append(ip) or (False, "Limite diário"))
+    r = client.post("/ui/predict", json={"text": "hello", "lang": "en"})
+    assert r.status_code == 429
+    assert len(calls) == 1
+    assert ctrl.stats()["in_flight"] == 0
+
+
+def test_quota_rejections_do_not_lower_the_service_time_estimate(monkeypatch):
+    from app import security
+
+    monkeypatch.setenv("FIRESTORE_ENABLED", "false")
+    monkeypatch.setenv("UI_QUOTA_ENABLED", "true")
+    monkeypatch.setattr(security, "check_ui_quota", lambda ip, now: (False, "Limite diário"))
+    ctrl = AdmissionController(max_in_flight=4, max_queue=10, initial_service_ms=80.0)
+    monkeypatch.setattr(admission, "get_admission", lambda: ctrl)
+
+    for _ in range(20):
+        assert client.post("/ui/predict", json={"text": "hello", "lang": "en"}).status_code == 429
+    assert ctrl.stats()["service_ms_ewma"] == 80.0
+    assert ctrl.stats()["in_flight"] == 0
@@ -0,0 +1,135 @@
+import threading
+import time
+
+import pytest
+
+from app.batching import MicroBatcher
+
+
+def _fake_predict_batch(calls):
+    def _fn(texts):
+        calls.append(list(texts))
+        time.sleep(0.01)
+        return [("positive" if "love" in t else "negative", 0.9) for t in texts], 10.0
+    return _fn
+
+
+def test_concurrent_submits_share_one_batch():
+    calls = []
+    batcher = MicroBatcher(predict_fn=_fake_predict_batch(calls), max_batch_size=8, max_wait_ms=50)
+
+    texts = ["I love it", "I hate it", "love love", "meh"]
+    futures = [batcher.submit(t) for t in texts]
+    results = [f.result(timeout=2) for f in futures]
+    batcher.stop()
+
+    assert calls == [texts]
+    assert [r.label for r in results] == ["positive", "negative", "positive", "negative"]
+    assert all(r.batch_size == 4 for r in results)
+    assert all(r.inference_time_ms == pytest.approx(r.queue_wait_ms + r.compute_time_ms) for r in results)
+
+
+def test_flushes_on_max_batch_size():
+    calls = []
+    batcher = MicroBatcher(predict_fn=_fake_predict_batch(calls), max_batch_size=2, max_wait_ms=1000)
+
+    start = time.perf_counter()
+    futures = [batcher.submit(str(i)) for i in range(4)]
+    for f in futures:
+        f.result(timeout=2)
+    batcher.stop()
+
+    # não espera o max_wait quando o batch enche
+    assert time.perf_counter() - start < 0.5
+    assert [len(c) for c in calls] == [2, 2]
+
+
+def test_errors_propagate_to_every_caller():
+    def _boom(texts):
+        raise RuntimeError("modelo indisponível")
+
+    batcher = MicroBatcher(predict_fn=_boom, max_batch_size=4, max_wait_ms=20)
+    futures = [batcher.submit("a"), batcher.submit("b")]
+    for f in futures:
+        with pytest.raises(RuntimeError):
+            f.result(timeout=2)
+    batcher.stop()
+
+
+def test_submit_from_many_threads():
+    calls = []
+    batcher = MicroBatcher(predict_fn=_fake_predict_batch(calls), max_batch_size=32, max_wait_ms=20)
+    results = {}
+
+    def _worker(i):
+        results[i] = batcher.submit(f"love {i}").result(timeout=5)
+
+    threads = [threading.Thread(target=_worker, args=(i,)) for i in range(20)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    batcher.stop()
+
+    assert len(results) == 20
+    assert sum(len(c) for c in calls) == 20
+    assert len(calls) < 20
+
+
+def _fake_tokenize(texts):
+    # um token por palavra
+    return [{"input_ids": [0] * len(t.split()), "attention_mask": [1] * len(t.split())} for t in texts]
+
+
+def _fake_predict_features(calls):
+    def _fn(features):
+        calls.append([len(f["input_ids"]) for f in features])
+        return [("long" if len(f["input_ids"]) > 8 else "short", 0.9) for f in features], 5.0
+    return _fn
+
+
+def test_buckets_batch_texts_of_similar_length():
+    calls = []
+    batcher = MicroBatcher(
+        predict_fn=_fake_predict_features(calls),
+        tokenize_fn=_fake_tokenize,
+        max_batch_size=16,
+        max_wait_ms=50,
+        bucket_bounds=[8, 128],
+    )
+
+    texts = ["curto"] * 3 + [" ".join(["longo"] * 100)] * 2 + ["bem curto"]
+    futures = [batcher.submit(t) for t in texts]
+    results = [f.result(timeout=2) for f in futures]
+    stats = batcher.stats()
+    batcher.stop()
+
+    # cada forward pass só vê textos da mesma faixa
+    assert sorted(calls) == [[1, 1, 1, 2], [100, 100]]
+    assert [r.label for r in results] == ["short"] * 3 + ["long"] * 2 + ["short"]
+    assert [r.batch_size for r in results] == [4, 4, 4, 2, 2, 4]
+    assert stats["bucket_batches"] == [1, 1]
+    assert stats["tokens_total"] == 205
+    assert stats["padded_tokens_total"] == 208
+
+
+def test_max_batch_tokens_caps_long_buckets():
+    calls = []
+    batcher = MicroBatcher(
+        predict_fn=_fake_predict_features(calls),
+        tokenize_fn=_fake_tokenize,
+        max_batch_size=32,
+        max_wait_ms=1000,
+        bucket_bounds=[16, 512],
+        max_batch_tokens=1024,
+    )
+
+    start = time.perf_counter()
+    futures = [batcher.submit(" ".join(["longo"] * 300)) for _ in range(4)]
+    for f in futures:
+        f.result(timeout=2)
+    batcher.stop()
+
+    # faixa de 512 tokens: no máximo 1024 // 512 = 2 textos por batch, sem esperar o prazo
+    assert time.perf_counter() - start < 0.5
+    assert calls == [[300, 300], [300, 300]]
@@ -0,0 +1,74 @@
+import asyncio
+import json
+
+from fastapi.testclient import TestClient
+
+from app import main, utils
+from app.bulk import _iter_lines
+
+client = TestClient(main.app)
+
+
+async def _collect_lines(chunks, max_line_bytes):
+    async def _gen():
+        for c in chunks:
+            yield c
+
+    return [line async for line in _iter_lines(_gen(), max_line_bytes)]
+
+
+def test_iter_lines_handles_split_chunks_and_long_lines():
+    chunks = [b'{"a":', b' 1}\n{"b": 2}\n', b"x" * 30, b"x" * 30, b"\n", b'{"c": 3}']
+    lines = asyncio.run(_collect_lines(chunks, max_line_bytes=40))
+    assert lines == [b'{"a": 1}', b'{"b": 2}', None, b'{"c": 3}']
+
+
+def test_iter_lines_rejects_long_line_inside_a_single_chunk():
+    body = b'{"a": 1}\n' + b"x" * 60 + b'\n{"b": 2}\n' + b"y" * 41
+    lines = asyncio.run(_collect_lines([body], max_line_bytes=40))
+    assert lines == [b'{"a": 1}', None, b'{"b": 2}', None]
+
+
+def test_predict_stream_scores_in_batches(monkeypatch):
+    monkeypatch.setenv("API_KEY", "test-key")
+    monkeypatch.setenv("FIRESTORE_ENABLED", "false")
+    monkeypatch.setattr(main.settings, "stream_batch_size", 2)
+
+    batch_sizes = []
+
+    def _fake_predict_many(texts, batch_size):
+        batch_sizes.append(len(texts))
+        return [("positive", 0.9, 1.0, 2.0) for _ in texts]
+
+    monkeypatch.setattr(utils, "predict_many", _fake_predict_many)
+
+    body = "\n".join(
+        [
+            json.dumps({"text": "one", "lang": "en"}),
+            json.dumps({"text": "two"}),
+            "not json",
+            json.dumps({"text": ""}),
+            "",
+            json.dumps({"text": "three"}),
+        ]
+    )
+    r = client.post(
+        "/predict/stream",
+        content=body.encode(),
+        headers={"X-API-Key": "test-key", "Content-Type": "application/x-ndjson"},
+    )
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("application/x-ndjson")
+
+    rows = [json.loads(line) for line in r.text.splitlines()]
+    ok = sorted(row["line"] for row in rows if "label" in row)
+    errors = sorted(row["line"] for row in rows if "error" in row)
+    assert ok == [1, 2, 6]
+    assert errors == [3, 4]
+    assert batch_sizes == [2, 1]
+
+
+def test_predict_stream_requires_api_key(monkeypatch):
+    monkeypatch.setenv("API_KEY", "test-key")
+    r = client.post("/predict/stream", content=b'{"text": "hi"}\n')
+    assert r.status_code == 401
@@ -0,0 +1,58 @@
+import time
+
+from fastapi.testclient import TestClient
+
+from app import main
+from app.cache import PredictionCache, cache_key
+
+client = TestClient(main.app)
+
+
+def test_cache_key_normalizes_whitespace_but_not_case():
+    assert cache_key("I  love\n it ", "v1") == cache_key("I love it", "v1")
+    assert cache_key("I love it", "v1") != cache_key("i love it", "v1")
+    assert cache_key("I love it", "v1") != cache_key("I love it", "v2")
+
+
+def test_lru_eviction_and_ttl():
+    cache = PredictionCache(max_entries=2, ttl_seconds=0.05)
+    cache.put("a", ("positive", 0.9))
+    cache.put("b", ("negative", 0.8))
+    assert cache.get("a") == ("positive", 0.9)  # "a" vira o mais recente
+    cache.put("c", ("neutral", 0.7))
+    assert cache.get("b") is None
+    assert cache.stats()["evictions"] == 1
+
+    time.sleep(0.06)
+    assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_version_change_misses():
+    cache = PredictionCache()
+    cache.put(cache_key("hello", "1.0.0:abc"), ("positive", 0.9))
+    assert cache.get(cache_key("hello", "1.0.0:abc")) == ("positive", 0.9)
+    assert cache.get(cache_key("hello", "1.0.1:abc")) is None
+
+
+def test_repeated_text_skips_forward_pass(monkeypatch):
+    monkeypatch.setenv("API_KEY", "test-key")
+    monkeypatch.setenv("FIRESTORE_ENABLED", "false")
+    monkeypatch.setattr(main.settings, "batch_enabled", False)
+
+    calls = []
+
+    def _fake_predict(text):
+        calls.append(text)
+        return "positive", 0.91, 50.0
+
+    monkeypatch.setattr(main, "predict", _fake_predict)
+
+    headers = {"X-API-Key": "test-key"}
+    first = client.post("/predict", json={"text": "RT great game!"}, headers=headers).json()
+    second = client.post("/predict", json={"text": "RT  great game! "}, headers=headers).json()
+
+    assert calls == ["RT great game!"]
+    assert first["cached"] is False and second["cached"] is True
+    assert second["label"] == first["label"] and second["score"] == first["score"]
+    assert second["inference_id"] != first["inference_id"]
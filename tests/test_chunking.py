@@ -0,0 +1,111 @@
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from app import chunking, main, utils
+from app.chunking import aggregate_logits, predict_chunked, split_windows
+
+client = TestClient(main.app)
+
+
+def _word_tokenizer():
+    from tokenizers import Tokenizer, models, pre_tokenizers, processors
+    from transformers import PreTrainedTokenizerFast
+
+    vocab = {"<s>": 0, "<pad>": 1, "</s>": 2, "<unk>": 3, "good": 4, "bad": 5}
+    tok = Tokenizer(models.WordLevel(vocab, unk_token="<unk>"))
+    tok.pre_tokenizer = pre_tokenizers.Whitespace()
+    tok.post_processor = processors.TemplateProcessing(
+        single="<s> $A </s>", special_tokens=[("<s>", 0), ("</s>", 2)]
+    )
+    return PreTrainedTokenizerFast(
+        tokenizer_object=tok, bos_token="<s>", eos_token="</s>", pad_token="<pad>", unk_token="<unk>"
+    )
+
+
+class _Config:
+    id2label = {0: "negative", 1: "neutral", 2: "positive"}
+
+
+class _FakePipe:
+    tokenizer = _word_tokenizer()
+    config = _Config()
+
+
+def test_windows_overlap_and_cover_the_whole_text():
+    text = " ".join(["good"] * 10 + ["bad"] * 10)
+    windows = split_windows(_word_tokenizer(), text, window=10, stride=2)
+
+    # 8 tokens de conteúdo por janela, 2 repetidos da anterior: 0-8, 6-14, 12-20
+    assert [sum(w["attention_mask"]) for w in windows] == [10, 10, 10]
+    assert windows[0]["start_char"] == 0
+    assert windows[-1]["end_char"] == len(text)
+    assert windows[1]["start_char"] < windows[0]["end_char"]
+
+    assert len(split_windows(_word_tokenizer(), text, window=10, stride=2, max_windows=2)) == 2
+
+
+def test_aggregations():
+    logits = np.array([[0.0, 0.0, 4.0], [2.0, 0.0, 0.0]])
+    assert aggregate_logits(logits, [10, 10], "mean_logits").tolist() == [1.0, 0.0, 2.0]
+    assert aggregate_logits(logits, [30, 10], "length_weighted").tolist() == [0.5, 0.0, 3.0]
+    with pytest.raises(ValueError):
+        aggregate_logits(logits, [1, 1], "max")
+
+
+def test_all_windows_run_in_one_forward_pass(monkeypatch):
+    calls = []
+
+    def _fake_logits(pipe, features):
+        calls.append(len(features))
+        # janela com "bad" é negativa, o resto positivo
+        return np.array([[3.0, 0.0, 0.0] if 5 in f["input_ids"] else [0.0, 0.0, 2.0] for f in features])
+
+    monkeypatch.setattr(utils, "load_model", lambda: _FakePipe())
+    monkeypatch.setattr(utils, "forward_logits", _fake_logits)
+    monkeypatch.setattr(chunking.settings, "chunk_window_tokens", 10)
+    monkeypatch.setattr(chunking.settings, "chunk_stride_tokens", 0)
+
+    text = " ".join(["good"] * 16 + ["bad"] * 2)
+    label, score, _, chunks = predict_chunked(text, "mean_logits")
+    assert calls == [3]
+    assert [c["label"] for c in chunks] == ["positive", "positive", "negative"]
+    # média: negativo (0+0+3)/3 vs positivo (2+2+0)/3
+    assert label == "positive"
+
+    # ponderado pelo tamanho: a última janela (curta) pesa menos ainda
+    label, weighted_score, _, _ = predict_chunked(text, "length_weighted")
+    assert label == "positive"
+    assert weighted_score > score
+
+
+def test_predict_endpoint_with_chunking(monkeypatch):
+    monkeypatch.setenv("API_KEY", "test-key")
+    monkeypatch.setenv("FIRESTORE_ENABLED", "false")
+    seen = []
+
+    def _fake_chunked(text, aggregation):
+        seen.append(aggregation)
+        chunks = [
+            {"index": i, "start_char": i * 10, "end_char": i * 10 + 12, "tokens": 5, "label": "neutral", "score": 0.6}
+            for i in range(2)
+        ]
+        return "neutral", 0.6, 3.0, chunks
+
+    monkeypatch.setattr(main, "predict_chunked", _fake_chunked)
+    body = {"text": "texto longo " * 50, "chunking": True, "aggregation": "length_weighted", "return_chunks": True}
+    r = client.post("/predict", json=body, headers={"X-API-Key": "test-key"})
+    assert r.status_code == 200
+    data = r.json()
+    assert seen == ["length_weighted"]
+    assert data["num_chunks"] == 2
+    assert data["aggregation"] == "length_weighted"
+    assert [c["index"] for c in data["chunks"]] == [0, 1]
+
+    body.update(return_chunks=False, aggregation=None)
+    data = client.post("/predict", json=body, headers={"X-API-Key": "test-key"}).json()
+    assert data["num_chunks"] == 2
+    assert data["chunks"] is None
+
+    body["aggregation"] = "max"
+    assert client.post("/predict", json=body, headers={"X-API-Key": "test-key"}).status_code == 422
@@ -0,0 +1,71 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import Future
+
+import httpx
+
+from app import main, utils
+from app.batching import shutdown_batcher
+from app.coalescing import SingleFlight, get_singleflight
+from app.executor import shutdown_executor
+
+
+def test_singleflight_shares_future_until_done():
+    sf = SingleFlight()
+    submitted = []
+
+    def _submit():
+        fut = Future()
+        submitted.append(fut)
+        return fut
+
+    f1, c1 = sf.do("k", _submit)
+    f2, c2 = sf.do("k", _submit)
+    assert f1 is f2 and (c1, c2) == (False, True)
+
+    f1.set_result("ok")
+    f3, c3 = sf.do("k", _submit)
+    assert f3 is not f1 and c3 is False
+    assert len(submitted) == 2
+    assert sf.stats()["coalesced"] == 1
+
+
+def test_identical_concurrent_requests_share_one_forward_pass(monkeypatch):
+    monkeypatch.setenv("API_KEY", "test-key")
+    monkeypatch.setenv("FIRESTORE_ENABLED", "false")
+    monkeypatch.setattr(main.settings, "cache_enabled", False)
+    monkeypatch.setattr(main.settings, "batch_buckets", [])
+
+    calls = []
+    lock = threading.Lock()
+
+    def _slow_predict_batch(texts):
+        with lock:
+            calls.extend(texts)
+        time.sleep(0.2)
+        return [("positive", 0.95) for _ in texts], 200.0
+
+    monkeypatch.setattr(utils, "predict_batch", _slow_predict_batch)
+    before = get_singleflight().stats()["coalesced"]
+
+    async def _run():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await asyncio.gather(
+                *[
+                    client.post("/predict", json={"text": "viral tweet"}, headers={"X-API-Key": "test-key"})
+                    for _ in range(10)
+                ]
+            )
+
+    try:
+        responses = asyncio.run(_run())
+    finally:
+        shutdown_batcher()
+        shutdown_executor()
+
+    assert [r.status_code for r in responses] == [200] * 10
+    assert calls == ["viral tweet"]
+    assert get_singleflight().stats()["coalesced"] - before == 9
+    assert len({r.json()["inference_id"] for r in responses}) == 10
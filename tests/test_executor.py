@@ -0,0 +1,73 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from app import main, utils
+from app.batching import shutdown_batcher
+from app.executor import shutdown_executor
+
+SLOW_PREDICT_S = 0.4
+
+
+@pytest.fixture
+def slow_model(monkeypatch):
+    monkeypatch.setenv("API_KEY", "test-key")
+    monkeypatch.setenv("FIRESTORE_ENABLED", "false")
+
+    def _slow_predict_batch(texts):
+        time.sleep(SLOW_PREDICT_S)
+        return [("positive", 0.99) for _ in texts], SLOW_PREDICT_S * 1000
+
+    def _slow_predict(text):
+        time.sleep(SLOW_PREDICT_S)
+        return "positive", 0.99, SLOW_PREDICT_S * 1000
+
+    monkeypatch.setattr(utils, "predict_batch", _slow_predict_batch)
+    monkeypatch.setattr(main, "predict", _slow_predict)
+    # predict_batch recebe textos: batcher sem faixas de tamanho (não tokeniza)
+    monkeypatch.setattr(main.settings, "batch_buckets", [])
+    yield
+    shutdown_batcher()
+    shutdown_executor()
+
+
+async def _health_latencies_while_predicting(n_predictions: int) -> tuple[list[float], list[int]]:
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        predictions = [
+            asyncio.create_task(
+                client.post(
+                    "/predict",
+                    json={"text": f"texto {i}", "lang": "en"},
+                    headers={"X-API-Key": "test-key"},
+                )
+            )
+            for i in range(n_predictions)
+        ]
+        # deixa as predições entrarem no executor
+        await asyncio.sleep(0.05)
+
+        latencies = []
+        while not all(p.done() for p in predictions):
+            start = time.perf_counter()
+            r = await client.get("/health")
+            latencies.append(time.perf_counter() - start)
+            assert r.status_code == 200
+            await asyncio.sleep(0.02)
+
+        statuses = [p.result().status_code for p in predictions]
+    return latencies, statuses
+
+
+@pytest.mark.parametrize("batching", [True, False])
+def test_health_stays_responsive_during_inference(slow_model, monkeypatch, batching):
+    monkeypatch.setattr(main.settings, "batch_enabled", batching)
+
+    latencies, statuses = asyncio.run(_health_latencies_while_predicting(4))
+
+    assert statuses == [200] * 4
+    assert len(latencies) >= 3
+    # se o forward pass bloqueasse o loop, o /health levaria ~SLOW_PREDICT_S
+    assert max(latencies) < SLOW_PREDICT_S / 4
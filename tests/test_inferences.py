@@ -0,0 +1,111 @@
+import csv
+import gzip
+import io
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import inference_query, main
+from app.config import settings
+
+client = TestClient(main.app)
+HEADERS = {"X-API-Key": "dash-key"}
+T0 = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def fake_db(monkeypatch, firestore_db, fake_firestore):
+    monkeypatch.setenv("DASH_API_KEY", "dash-key")
+    for i in range(7):
+        firestore_db.docs[("inferences", f"doc-{i}")] = {
+            "id": f"doc-{i}",
+            # dois documentos por timestamp: o id desempata no cursor
+            "created_at": T0 + timedelta(minutes=i // 2),
+            "label": "positive" if i % 3 else "negative",
+            "model_version": "1.0.0" if i < 5 else "1.1.0",
+            "score": 0.9,
+            "text": "x" * 1000,
+        }
+    monkeypatch.setattr(inference_query, "get_db", lambda: firestore_db)
+    monkeypatch.setattr(inference_query, "get_firestore", lambda: fake_firestore)
+    return firestore_db
+
+
+def test_cursor_pagination_walks_full_history_without_text(fake_db):
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 3, "fields": "id,label,score", **({"cursor": cursor} if cursor else {})}
+        body = client.get("/inferences", params=params, headers=HEADERS).json()
+        assert all("text" not in item for item in body["items"])
+        seen += [item["id"] for item in body["items"]]
+        cursor = body["next_cursor"]
+        if cursor is None:
+            break
+
+    assert seen == [f"doc-{i}" for i in range(6, -1, -1)]
+
+
+def test_default_response_keeps_the_original_shape(fake_db):
+    fake_db.docs[("inferences", "doc-6")]["score"] = 0.912345678
+    fake_db.docs[("inferences", "doc-6")]["inference_time_ms"] = 12.3456
+    body = client.get("/inferences", params={"limit": 1}, headers=HEADERS).json()
+
+    assert body["count"] == 1
+    assert body["items"] == [
+        {
+            "id": "doc-6",
+            "created_at": "2026-01-01 00:03:00 UTC",
+            "lang": None,
+            "label": "negative",
+            "score": 0.91235,
+            "inference_time_ms": 12.35,
+            "model_version": "1.1.0",
+            "text": "x" * 1000,
+        }
+    ]
+
+
+def test_server_side_filters_and_projection(fake_db):
+    params = {
+        "label": "positive",
+        "model_version": "1.0.0",
+        "since": (T0 + timedelta(minutes=1)).isoformat(),
+        "fields": "id,label,text",
+    }
+    body = client.get("/inferences", params=params, headers=HEADERS).json()
+
+    assert [item["id"] for item in body["items"]] == ["doc-4", "doc-2"]
+    assert set(body["items"][0]) == {"id", "label", "text", "created_at"}
+    assert body["items"][0]["created_at"] == (T0 + timedelta(minutes=2)).isoformat()
+    assert body["next_cursor"] is None
+
+
+def test_rejects_bad_cursor_and_unknown_fields(fake_db):
+    assert client.get("/inferences", params={"cursor": "nope"}, headers=HEADERS).status_code == 400
+    assert client.get("/inferences", params={"fields": "id,password"}, headers=HEADERS).status_code == 400
+
+
+def test_export_pages_through_everything_as_ndjson(fake_db, monkeypatch):
+    monkeypatch.setattr(settings, "export_page_size", 3)
+    resp = client.get("/inferences/export", headers=HEADERS)
+
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in resp.text.splitlines()]
+    assert [r["id"] for r in rows] == [f"doc-{i}" for i in range(6, -1, -1)]
+    assert rows[0]["text"] == "x" * 1000
+    # 7 documentos em páginas de 3: três consultas, nenhuma com o histórico inteiro
+    assert fake_db.queries == 3
+
+
+def test_export_csv_gzip_with_time_range(fake_db):
+    params = {"format": "csv", "gzip": "true", "fields": "id,label", "until": (T0 + timedelta(minutes=2)).isoformat()}
+    resp = client.get("/inferences/export", params=params, headers=HEADERS)
+
+    assert resp.status_code == 200
+    assert resp.headers["content-disposition"].endswith('.csv.gz"')
+    rows = list(csv.DictReader(io.StringIO(gzip.decompress(resp.content).decode("utf-8"))))
+    assert [r["id"] for r in rows] == ["doc-3", "doc-2", "doc-1", "doc-0"]
+    assert set(rows[0]) == {"id", "label", "created_at"}
@@ -0,0 +1,67 @@
+import io
+import json
+import logging
+import logging.handlers
+import queue
+from datetime import datetime
+
+from app.logger import JSONFormatter, _DroppingQueueHandler, _SampleFilter
+
+
+def _logger(name: str, handler: logging.Handler) -> logging.Logger:
+    logger = logging.getLogger(name)
+    logger.handlers = [handler]
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    return logger
+
+
+def test_listener_writes_json_lines_off_the_caller_thread():
+    out = io.StringIO()
+    stream = logging.StreamHandler(out)
+    stream.setFormatter(JSONFormatter())
+    handler = _DroppingQueueHandler(queue.Queue(maxsize=100))
+    listener = logging.handlers.QueueListener(handler.queue, stream)
+    logger = _logger("test.logging.listener", handler)
+
+    listener.start()
+    args = ["mutável"]
+    logger.info("texto=%s", args)
+    args.append("depois")  # a mensagem já foi fixada no enqueue
+    try:
+        raise RuntimeError("boom")
+    except RuntimeError:
+        logger.error("falhou", exc_info=True)
+    listener.stop()
+
+    first, second = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert first["message"] == "texto=['mutável']"
+    assert first["level"] == "INFO" and first["logger"] == "test.logging.listener"
+    assert datetime.fromisoformat(first["timestamp"]).utcoffset().total_seconds() == 0
+    assert "RuntimeError: boom" in second["exception"]
+    assert handler.enqueued == 2 and handler.dropped == 0
+
+
+def test_full_queue_drops_instead_of_blocking():
+    handler = _DroppingQueueHandler(queue.Queue(maxsize=2))  # sem listener: ninguém consome
+    logger = _logger("test.logging.full", handler)
+
+    for i in range(5):
+        logger.info("linha %d", i)
+
+    assert handler.enqueued == 2 and handler.dropped == 3
+
+
+def test_sampling_only_touches_marked_info_lines():
+    handler = _DroppingQueueHandler(queue.Queue(maxsize=100))
+    sample = _SampleFilter(0.0)
+    handler.addFilter(sample)
+    logger = _logger("test.logging.sample", handler)
+
+    for _ in range(10):
+        logger.info("predição", extra={"sampled": True})
+    logger.info("startup")
+    logger.warning("aviso", extra={"sampled": True})
+
+    assert sample.sampled_out == 10
+    assert [r.getMessage() for r in list(handler.queue.queue)] == ["startup", "aviso"]
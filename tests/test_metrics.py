@@ -0,0 +1,91 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import dash, main, metrics
+from app.metrics import Histogram
+
+client = TestClient(main.app)
+
+
+def test_histogram_renders_cumulative_buckets():
+    hist = Histogram("demo_seconds", "Demo.", (0.01, 0.1), ("stage",))
+    for value in (0.005, 0.05, 0.05, 3.0):
+        hist.observe(value, "forward")
+
+    lines = hist.render()
+    assert '# TYPE demo_seconds histogram' in lines
+    assert 'demo_seconds_bucket{stage="forward",le="0.01"} 1' in lines
+    assert 'demo_seconds_bucket{stage="forward",le="0.1"} 3' in lines
+    assert 'demo_seconds_bucket{stage="forward",le="+Inf"} 4' in lines
+    assert 'demo_seconds_count{stage="forward"} 4' in lines
+    assert hist.snapshot("forward")["sum"] == pytest.approx(3.105)
+
+
+def test_predict_records_stages_and_metrics_endpoint(monkeypatch):
+    monkeypatch.setenv("API_KEY", "test-key")
+    monkeypatch.setenv("DASH_API_KEY", "dash-key")
+    monkeypatch.setenv("FIRESTORE_ENABLED", "false")
+    monkeypatch.setattr(main.settings, "batch_enabled", False)
+    monkeypatch.setattr(main, "predict", lambda text: ("positive", 0.9, 12.0))
+    metrics.stage_seconds.reset()
+
+    resp = client.post("/predict", json={"text": "metrics please"}, headers={"X-API-Key": "test-key"})
+    assert resp.status_code == 200
+
+    for stage in ("auth", "queue_wait", "forward", "postprocess", "persist_enqueue"):
+        assert metrics.stage_seconds.snapshot(stage)["count"] == 1, stage
+    assert metrics.stage_seconds.snapshot("forward")["sum"] == pytest.approx(0.012)
+
+    assert client.get("/metrics").status_code == 401
+    body = client.get("/metrics", headers={"X-API-Key": "dash-key"})
+    assert body.status_code == 200
+    assert body.headers["content-type"].startswith("text/plain")
+    text = body.text
+    assert 'sentiment_stage_duration_seconds_count{stage="forward"} 1' in text
+    assert "sentiment_cache_misses_total" in text
+    assert 'sentiment_queue_depth{queue="admission"}' in text
+
+
+def test_scrapes_do_not_create_background_singletons(monkeypatch):
+    from app import batching, persistence, quota
+
+    monkeypatch.setenv("DASH_API_KEY", "dash-key")
+    monkeypatch.setattr(batching, "_batcher", None)
+    monkeypatch.setattr(persistence, "_writer", None)
+    monkeypatch.setattr(quota, "_store", None)
+
+    r = client.get("/metrics", headers={"X-API-Key": "dash-key"})
+    assert r.status_code == 200
+    assert "sentiment_batcher_batches_total" not in r.text
+    stats = client.get("/stats", headers={"X-API-Key": "dash-key"}).json()
+    assert stats["batcher"] == {} and stats["persistence"] == {} and stats["ui_quota"] == {}
+
+    assert batching._batcher is None and persistence._writer is None and quota._store is None
+
+
+def test_admission_is_read_on_the_event_loop(monkeypatch):
+    from app import admission
+
+    monkeypatch.setenv("DASH_API_KEY", "dash-key")
+    ctrl = admission.AdmissionController()
+    on_loop = []
+    real_stats = ctrl.stats
+
+    def _stats():
+        # as filas do controller só podem ser lidas na thread do event loop
+        try:
+            asyncio.get_running_loop()
+            on_loop.append(True)
+        except RuntimeError:
+            on_loop.append(False)
+        return real_stats()
+
+    monkeypatch.setattr(ctrl, "stats", _stats)
+    monkeypatch.setattr(admission, "get_admission", lambda: ctrl)
+    monkeypatch.setattr(dash, "get_admission", lambda: ctrl)
+
+    assert client.get("/metrics", headers={"X-API-Key": "dash-key"}).status_code == 200
+    assert client.get("/stats", headers={"X-API-Key": "dash-key"}).status_code == 200
+    assert on_loop == [True, True]
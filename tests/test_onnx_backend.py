@@ -0,0 +1,76 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from app import onnx_backend, utils
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class _FakeOnnxPipeline:
+    def __init__(self, model_path, tokenizer_dir, intra_op_threads=None):
+        self.model_path, self.tokenizer_dir, self.intra_op_threads = model_path, tokenizer_dir, intra_op_threads
+
+
+@pytest.fixture
+def model_dir(tmp_path, monkeypatch):
+    (tmp_path / "config.json").write_text("{}", encoding="utf-8")
+    monkeypatch.setattr(utils, "LOCAL_DIR", str(tmp_path))
+    monkeypatch.setattr(utils, "_pipe", None)
+    monkeypatch.setattr(onnx_backend, "OnnxSentimentPipeline", _FakeOnnxPipeline)
+    return tmp_path
+
+
+@pytest.mark.parametrize("backend, quantized", [("onnx", False), ("onnx-int8", True)])
+def test_backend_selects_the_onnx_graph(model_dir, monkeypatch, backend, quantized):
+    monkeypatch.setattr(utils, "MODEL_BACKEND", backend)
+    pipe = utils.load_model()
+
+    assert isinstance(pipe, _FakeOnnxPipeline)
+    assert pipe.model_path == onnx_backend.onnx_model_path(str(model_dir), quantized=quantized)
+    assert pipe.tokenizer_dir == str(model_dir)
+
+
+def test_invalid_backend_fails_on_load(model_dir, monkeypatch):
+    monkeypatch.setattr(utils, "MODEL_BACKEND", "tensorrt")
+    with pytest.raises(RuntimeError, match="MODEL_BACKEND inválido"):
+        utils.load_model()
+
+
+def test_export_script_runs_from_the_repo_root():
+    # o uso documentado (python training/export_onnx.py) precisa achar o pacote app
+    proc = subprocess.run(
+        [sys.executable, "training/export_onnx.py", "--help"], cwd=ROOT, capture_output=True, text=True
+    )
+    assert proc.returncode == 0, proc.stderr
+
+
+def test_exported_graph_matches_torch_logits(tiny_bert_dir):
+    pytest.importorskip("onnx")
+    pytest.importorskip("onnxruntime")
+    import torch
+    from transformers import AutoModelForSequenceClassification
+
+    from training.export_onnx import export_onnx, quantize_int8
+
+    texts = ["i love this", "the sky is blue", "not bad at all meh"]
+    model_dir = str(tiny_bert_dir)
+    pipe = onnx_backend.OnnxSentimentPipeline(export_onnx(model_dir), model_dir)
+
+    enc = pipe.tokenizer(texts, truncation=True, max_length=64)
+    features = [{"input_ids": i, "attention_mask": m} for i, m in zip(enc["input_ids"], enc["attention_mask"])]
+    onnx_logits = pipe.logits(features)
+
+    model = AutoModelForSequenceClassification.from_pretrained(model_dir).eval()
+    batch = pipe.tokenizer(texts, padding=True, return_tensors="pt")
+    with torch.inference_mode():
+        torch_logits = model(**batch).logits.numpy()
+
+    np.testing.assert_allclose(onnx_logits, torch_logits, atol=1e-4)
+    assert [r["label"] for r in pipe(texts)] == [f"LABEL_{i}" for i in torch_logits.argmax(axis=-1)]
+
+    int8 = onnx_backend.OnnxSentimentPipeline(quantize_int8(model_dir), model_dir)
+    assert int8.logits(features).shape == torch_logits.shape
@@ -0,0 +1,72 @@
+import threading
+import time
+
+from app.persistence import FirestoreWriter
+
+
+def _writer(db, **kwargs) -> FirestoreWriter:
+    return FirestoreWriter(db_factory=lambda: db, collection="inferences", **kwargs)
+
+
+def test_flushes_on_size_in_batched_writes(firestore_db):
+    db = firestore_db
+    writer = _writer(db, max_batch_size=500, flush_interval_ms=10_000)
+
+    assert writer.enqueue_many([(f"id-{i}", {"i": i}) for i in range(1200)]) == 1200
+    writer.drain(timeout=5)
+
+    assert len(db.docs) == 1200
+    assert db.docs[("inferences", "id-7")] == {"i": 7}
+    assert max(db.commits) == 500
+    assert sum(db.commits) == 1200
+    stats = writer.stats()
+    assert stats["docs_written"] == 1200
+    assert stats["queue_depth"] == 0
+
+
+def test_flushes_on_time_threshold(firestore_db):
+    db = firestore_db
+    writer = _writer(db, max_batch_size=500, flush_interval_ms=20)
+
+    writer.enqueue("a", {"x": 1})
+    writer.enqueue("b", {"x": 2})
+    deadline = time.time() + 2
+    while not db.commits and time.time() < deadline:
+        time.sleep(0.01)
+
+    # saiu sozinho (sem drain), antes de encher o lote
+    assert db.commits == [2]
+    writer.drain(timeout=5)
+
+
+def test_retries_with_backoff_then_gives_up(make_firestore_db):
+    db = make_firestore_db(fail_next=2)
+    writer = _writer(db, flush_interval_ms=0, max_retries=3, retry_backoff_ms=1)
+    writer.enqueue("a", {"x": 1})
+    writer.drain(timeout=5)
+    assert ("inferences", "a") in db.docs
+    assert writer.stats()["retries_total"] == 2
+
+    db = make_firestore_db(fail_next=10)
+    writer = _writer(db, flush_interval_ms=0, max_retries=1, retry_backoff_ms=1)
+    writer.enqueue("a", {"x": 1})
+    writer.drain(timeout=5)
+    assert db.docs == {}
+    assert writer.stats()["docs_failed"] == 1
+
+
+def test_full_queue_drops_without_blocking(firestore_db):
+    db = firestore_db
+    release = threading.Event()
+    writer = FirestoreWriter(db_factory=lambda: (release.wait(5), db)[1], max_queue=2, flush_interval_ms=0)
+
+    # o primeiro sai da fila e fica preso no commit; os próximos lotam a fila
+    writer.enqueue("a", {})
+    time.sleep(0.05)
+    results = [writer.enqueue(f"id-{i}", {}) for i in range(5)]
+    assert results.count(False) >= 3
+    assert writer.stats()["docs_dropped"] == results.count(False)
+
+    release.set()
+    writer.drain(timeout=5)
+    assert writer.stats()["docs_written"] == 1 + results.count(True)
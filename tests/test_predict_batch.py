@@ -0,0 +1,97 @@
+from fastapi.testclient import TestClient
+
+from app import main, utils
+from app.cache import get_cache
+
+client = TestClient(main.app)
+
+
+class _FakeTokenizer:
+    def __call__(self, texts, truncation=True, max_length=512):
+        ids = [[0] * len(t.split()) for t in texts]
+        return {"input_ids": ids, "attention_mask": [[1] * len(i) for i in ids]}
+
+
+class _FakePipe:
+    tokenizer = _FakeTokenizer()
+
+
+def test_predict_many_sorts_by_length_and_keeps_input_order(monkeypatch):
+    batches = []
+
+    def _fake_forward(pipe, features):
+        batches.append([len(f["input_ids"]) for f in features])
+        return [("positive" if len(f["input_ids"]) > 2 else "negative", 0.5) for f in features]
+
+    monkeypatch.setattr(utils, "load_model", lambda: _FakePipe())
+    monkeypatch.setattr(utils, "_forward_features", _fake_forward)
+
+    texts = ["a b c d e", "a", "a b c", "a b", "a b c d"]
+    results = utils.predict_many(texts, batch_size=2)
+
+    # batches saem ordenados por tamanho
+    assert batches == [[1, 2], [3, 4], [5]]
+    # resultados voltam na ordem de entrada
+    assert [r[0] for r in results] == ["positive", "negative", "positive", "negative", "positive"]
+
+
+def test_batch_endpoint(monkeypatch):
+    monkeypatch.setenv("API_KEY", "test-key")
+    monkeypatch.setenv("FIRESTORE_ENABLED", "false")
+    monkeypatch.setattr(
+        main,
+        "predict_many",
+        lambda texts, batch_size: [("neutral", 0.7, 2.0, 4.0) for _ in texts],
+    )
+
+    items = [{"text": f"tweet {i}", "lang": "en"} for i in range(3)]
+    r = client.post("/predict/batch", json={"items": items}, headers={"X-API-Key": "test-key"})
+    assert r.status_code == 200
+    data = r.json()
+    assert data["count"] == 3
+    assert data["compute_time_ms"] == 6.0
+    assert len({item["inference_id"] for item in data["items"]}) == 3
+
+    r = client.post("/predict/batch", json={"items": items})
+    assert r.status_code == 401
+
+    r = client.post("/predict/batch", json={"items": []}, headers={"X-API-Key": "test-key"})
+    assert r.status_code == 422
+
+
+def test_batch_items_reject_chunking_options(monkeypatch):
+    monkeypatch.setenv("API_KEY", "test-key")
+    monkeypatch.setenv("FIRESTORE_ENABLED", "false")
+    monkeypatch.setattr(main, "predict_many", lambda texts, batch_size: [("neutral", 0.7, 2.0, 4.0) for _ in texts])
+
+    items = [{"text": "long tweet", "chunking": True, "return_chunks": True}]
+    r = client.post("/predict/batch", json={"items": items}, headers={"X-API-Key": "test-key"})
+    assert r.status_code == 422
+    assert "chunking só é suportado no /predict" in r.text
+
+    body = '{"text": "a", "aggregation": "mean_logits"}\n'
+    r = client.post("/predict/stream", content=body, headers={"X-API-Key": "test-key"})
+    line = r.json()
+    assert line["line"] == 1 and "chunking só é suportado" in line["error"]
+
+
+def test_orjson_mode_matches_default_response(monkeypatch):
+    monkeypatch.setenv("API_KEY", "test-key")
+    monkeypatch.setenv("FIRESTORE_ENABLED", "false")
+    monkeypatch.setattr(main, "predict_many", lambda texts, batch_size: [("neutral", 0.7, 2.0, 4.0) for _ in texts])
+    items = [{"text": f"tweet {i}", "lang": "en"} for i in range(3)]
+
+    bodies = {}
+    for mode in ("stdlib", "orjson"):
+        monkeypatch.setattr(main.settings, "json_response", mode)
+        get_cache().clear()
+        r = client.post("/predict/batch", json={"items": items}, headers={"X-API-Key": "test-key"})
+        assert r.status_code == 200
+        body = r.json()
+        body.pop("total_time_ms")
+        for item in body["items"]:
+            item.pop("inference_id")
+        bodies[mode] = body
+
+    # sem validação pelo response_model, o corpo continua com os mesmos campos e tipos
+    assert bodies["orjson"] == bodies["stdlib"]
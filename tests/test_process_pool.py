@@ -0,0 +1,122 @@
+import asyncio
+import os
+import signal
+import time
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import pytest
+
+from app import process_pool, utils
+from app.batching import MicroBatcher
+from app.executor import run_inference
+
+
+class _Config:
+    id2label = {0: "negative", 1: "neutral", 2: "positive"}
+
+
+class _FakePipe:
+    """Carregado só no processo pai: os workers enxergam o mesmo objeto via fork."""
+
+    config = _Config()
+
+    def __init__(self):
+        self.loaded_in = os.getpid()
+
+    def logits(self, features):
+        return np.array([[0.0, 0.0, 1.0] if len(f["input_ids"]) > 2 else [1.0, 0.0, 0.0] for f in features])
+
+
+def _pipe_origin():
+    return os.getpid(), utils.load_model().loaded_in
+
+
+def _crash_worker():
+    os.kill(os.getpid(), signal.SIGKILL)
+
+
+@pytest.fixture
+def process_mode(monkeypatch):
+    if not hasattr(os, "fork"):
+        pytest.skip("SERVING_MODE=process precisa de fork")
+    monkeypatch.setattr(process_pool.settings, "serving_mode", "process")
+    monkeypatch.setattr(process_pool.settings, "process_workers", 2)
+    monkeypatch.setattr(process_pool.settings, "warmup_enabled", False)
+    monkeypatch.setattr(utils, "_pipe", _FakePipe())
+    yield
+    process_pool.shutdown_process_pool()
+
+
+def test_workers_are_forked_after_load_and_share_the_model(process_mode):
+    process_pool.start_process_pool()
+    pids = process_pool.stats()["pids"]
+    assert len(pids) == 2
+    assert os.getpid() not in pids
+
+    worker_pid, loaded_in = asyncio.run(run_inference(_pipe_origin))
+    # roda num worker, com o modelo carregado uma vez no pai
+    assert worker_pid in pids
+    assert loaded_in == os.getpid()
+
+
+def test_batcher_dispatches_forward_pass_to_the_pool(process_mode):
+    batcher = MicroBatcher(
+        max_batch_size=8,
+        max_wait_ms=20,
+        bucket_bounds=[4, 16],
+        tokenize_fn=lambda texts: [{"input_ids": [0] * len(t.split())} for t in texts],
+    )
+    futures = [batcher.submit(t) for t in ["a b c d", "a", "a b c d e f"]]
+    labels = [f.result(timeout=30).label for f in futures]
+    batcher.stop()
+
+    assert labels == ["positive", "negative", "positive"]
+    assert len(process_pool.stats()["pids"]) == 2
+
+
+def test_pool_is_rebuilt_after_a_worker_is_killed(process_mode):
+    process_pool.start_process_pool()
+    old_pids = process_pool.stats()["pids"]
+    restarts = process_pool.stats()["restarts"]
+    os.kill(old_pids[0], signal.SIGKILL)
+
+    # as chamadas seguem funcionando: antes de o pool notar a morte, ou num pool novo
+    deadline = time.monotonic() + 30
+    while process_pool.stats()["restarts"] == restarts:
+        assert time.monotonic() < deadline
+        _pid, loaded_in = asyncio.run(run_inference(_pipe_origin))
+        assert loaded_in == os.getpid()
+
+    new_pids = process_pool.stats()["pids"]
+    assert len(new_pids) == 2 and not set(new_pids) & set(old_pids)
+    assert asyncio.run(run_inference(_pipe_origin))[0] in new_pids
+
+
+def test_call_that_kills_its_worker_fails_without_wedging_the_pool(process_mode):
+    process_pool.start_process_pool()
+    restarts = process_pool.stats()["restarts"]
+
+    with pytest.raises(BrokenProcessPool):
+        process_pool.run_in_pool(_crash_worker)
+    # uma recriação por tentativa, e o próximo request já usa um pool saudável
+    assert process_pool.stats()["restarts"] == restarts + 2
+    assert process_pool.run_in_pool(_pipe_origin)[0] in process_pool.stats()["pids"]
+
+
+def test_startup_fails_fast_when_a_worker_cannot_load(process_mode, monkeypatch):
+    parent = os.getpid()
+    fake = utils._pipe
+
+    def _load_model():
+        if os.getpid() != parent:
+            raise RuntimeError("sessão ONNX não sobe no worker")
+        return fake
+
+    monkeypatch.setattr(utils, "load_model", _load_model)
+    started = time.monotonic()
+    with pytest.raises(BrokenProcessPool):
+        process_pool.start_process_pool(timeout=60)
+
+    assert time.monotonic() - started < 30
+    assert process_pool._pool is None and process_pool.stats()["pids"] == []
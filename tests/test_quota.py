@@ -0,0 +1,199 @@
+import random
+import threading
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app import firestore_client, quota
+from app.quota import LocalQuotaEngine
+from app.quota_rules import QuotaRules, ip_hash
+
+T0 = datetime(2026, 1, 1, 9, 0, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def redis_client():
+    """Servidor fake que fala o protocolo do Redis (TCP local) + cliente redis-py."""
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")  # EVAL/EVALSHA no fakeredis
+    redis = pytest.importorskip("redis")
+
+    server = fakeredis.TcpFakeServer(("127.0.0.1", 0), server_type="redis")
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    host, port = server.server_address[:2]
+    client = redis.Redis(host=host, port=port)
+    yield client
+    client.close()
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def fake_db(monkeypatch, firestore_db, fake_firestore):
+    monkeypatch.setenv("FIRESTORE_ENABLED", "true")
+    monkeypatch.setattr(firestore_client, "get_db", lambda: firestore_db)
+    monkeypatch.setattr(firestore_client, "get_firestore", lambda: fake_firestore)
+    monkeypatch.setattr(quota, "get_firestore", lambda: fake_firestore)
+    return firestore_db
+
+
+def _trace_daily_limit_and_cooldown():
+    # 1/min até estourar o limite, depois 1 por dia (e às vezes 2) durante o cooldown
+    events = [("1.1.1.1", T0 + timedelta(minutes=i)) for i in range(14)]
+    for day in range(1, 35):
+        events.append(("1.1.1.1", T0 + timedelta(days=day)))
+        if day % 3 == 0:
+            events.append(("1.1.1.1", T0 + timedelta(days=day, hours=2)))
+    return events
+
+
+def _trace_bursts():
+    offsets = [0, 0.3, 0.5, 10, 3600, 3600.2, 7300, 7301, 7302, 11000]
+    return [("2.2.2.2", T0 + timedelta(seconds=s)) for s in offsets]
+
+
+def _trace_midnight():
+    start = T0.replace(hour=23, minute=50)
+    return [("3.3.3.3", start + timedelta(minutes=m)) for m in range(0, 40, 2)]
+
+
+def _trace_random(seed: int):
+    rng = random.Random(seed)
+    now = T0
+    events = []
+    for _ in range(400):
+        now += timedelta(seconds=rng.choice([0.1, 0.5, 0.9, 5, 60, 900, 4000, 30000]))
+        events.append((rng.choice(["10.0.0.1", "10.0.0.2", "10.0.0.3"]), now))
+    return events
+
+
+TRACES = {
+    "daily_limit_and_cooldown": _trace_daily_limit_and_cooldown(),
+    "bursts": _trace_bursts(),
+    "midnight": _trace_midnight(),
+    "random_1": _trace_random(1),
+    "random_2": _trace_random(2),
+}
+
+
+@pytest.mark.parametrize("name", sorted(TRACES))
+def test_local_engine_matches_firestore_transaction(name, fake_db):
+    events = TRACES[name]
+
+    expected = [firestore_client.consume_ui_quota(ip, now) for ip, now in events]
+    engine = LocalQuotaEngine(rules=QuotaRules.from_env())
+    got = [engine.consume(ip, now) for ip, now in events]
+
+    assert got == expected
+    # o trace exercita os dois lados
+    assert any(allowed for allowed, _ in expected)
+    assert any(not allowed for allowed, _ in expected)
+
+
+def test_state_survives_restart_through_sync(fake_db):
+    events = _trace_daily_limit_and_cooldown()
+    expected = [firestore_client.consume_ui_quota(ip, now) for ip, now in events]
+    fake_db.docs.clear()
+
+    # metade do trace numa instância, o resto numa instância nova (hydrate)
+    half = 16
+    first = LocalQuotaEngine(rules=QuotaRules(), db_factory=lambda: fake_db)
+    got = [first.consume(ip, now) for ip, now in events[:half]]
+    assert first.sync() == 1
+    first.stop()
+
+    second = LocalQuotaEngine(rules=QuotaRules(), db_factory=lambda: fake_db)
+    got += [second.consume(ip, now) for ip, now in events[half:]]
+    second.stop()
+
+    assert got == expected
+
+
+def test_sync_adds_counts_from_other_instances(fake_db):
+    a = LocalQuotaEngine(rules=QuotaRules(), db_factory=lambda: fake_db)
+    b = LocalQuotaEngine(rules=QuotaRules(), db_factory=lambda: fake_db)
+
+    for i in range(3):
+        assert a.consume("4.4.4.4", T0 + timedelta(minutes=i))[0]
+        assert b.consume("4.4.4.4", T0 + timedelta(minutes=i, seconds=30))[0]
+    a.sync()
+    b.sync()
+    a.stop()
+    b.stop()
+
+    doc = fake_db.docs[(firestore_client.ui_quota_collection(), ip_hash("4.4.4.4"))]
+    assert doc["count_today"] == 6
+    assert doc["ip_hash"] == ip_hash("4.4.4.4")
+    # a instância que sincronizou por último já enxerga o consumo da outra
+    assert b.stats()["docs_synced"] == 1
+    assert b._entries[ip_hash("4.4.4.4")].state["count_today"] == 6
+
+
+@pytest.mark.parametrize("name", sorted(TRACES))
+def test_redis_script_matches_firestore_transaction(name, fake_db, redis_client):
+    from app.quota_redis import RedisQuotaStore
+
+    events = TRACES[name]
+    expected = [firestore_client.consume_ui_quota(ip, now) for ip, now in events]
+    store = RedisQuotaStore(client=redis_client, rules=QuotaRules.from_env())
+    got = [store.consume(ip, now) for ip, now in events]
+
+    assert got == expected
+    assert store.stats()["errors_total"] == 0
+
+
+def test_redis_state_is_shared_and_expires(redis_client):
+    from app.quota_redis import RedisQuotaStore
+
+    rules = QuotaRules(daily_limit=2)
+    a = RedisQuotaStore(client=redis_client, rules=rules)
+    b = RedisQuotaStore(client=redis_client, rules=rules)
+
+    assert a.consume("5.5.5.5", T0)[0]
+    assert b.consume("5.5.5.5", T0 + timedelta(minutes=1))[0]
+    # terceira requisição, em outra "instância": limite diário já foi consumido
+    assert a.consume("5.5.5.5", T0 + timedelta(minutes=2)) == (False, "Limite diário atingido. Cooldown ativado.")
+
+    key = "ui_quota:" + ip_hash("5.5.5.5")
+    assert int(redis_client.hget(key, "count_today")) == 2
+    assert 0 < redis_client.pttl(key) <= (rules.cooldown_days + 1) * 86400 * 1000
+
+
+def test_local_backend_without_firestore_lets_everything_through(monkeypatch):
+    monkeypatch.setenv("FIRESTORE_ENABLED", "false")
+    monkeypatch.setenv("UI_DAILY_LIMIT", "1")
+    store = quota.create_quota_store("local")
+    assert store.stats()["backend"] == "disabled"
+    assert all(store.consume("6.6.6.6", T0 + timedelta(minutes=i)) == (True, "") for i in range(5))
+
+    # memory continua aplicando a quota só nesta instância
+    memory = quota.create_quota_store("memory")
+    assert memory.consume("6.6.6.6", T0)[0]
+    assert not memory.consume("6.6.6.6", T0 + timedelta(minutes=1))[0]
+
+
+def test_eviction_drops_least_recent_synced_entries_only(fake_db):
+    engine = LocalQuotaEngine(rules=QuotaRules(), db_factory=lambda: fake_db, max_entries=2, sync_interval_ms=60_000)
+    engine.consume("7.0.0.1", T0)
+    engine.consume("7.0.0.2", T0)
+    engine.sync()
+    # a: pendente de sync (mais antiga no LRU), b: sincronizada
+    engine.consume("7.0.0.1", T0 + timedelta(minutes=1))
+    engine._entries.move_to_end(ip_hash("7.0.0.1"), last=False)
+
+    engine.consume("7.0.0.3", T0)
+    assert list(engine._entries) == [ip_hash("7.0.0.1"), ip_hash("7.0.0.3")]
+
+    # tudo pendente: passa do limite em vez de perder consumo não sincronizado
+    engine.consume("7.0.0.4", T0)
+    assert len(engine._entries) == 3
+    engine.stop()
+
+
+def test_store_without_consume_fails_on_construction():
+    class _Incomplete(quota.QuotaStore):
+        backend = "incomplete"
+
+    with pytest.raises(TypeError):
+        _Incomplete()
@@ -0,0 +1,154 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main, rollups
+from app.persistence import FirestoreWriter
+
+client = TestClient(main.app)
+
+
+@pytest.fixture
+def fake_db(monkeypatch, firestore_db, fake_firestore):
+    monkeypatch.setattr(rollups, "get_firestore", lambda: fake_firestore)
+    monkeypatch.setattr(rollups, "get_db", lambda: firestore_db)
+    return firestore_db
+
+
+def _doc(label, score, ms, version="1.0.0", created_at=None):
+    doc = {"label": label, "score": score, "inference_time_ms": ms, "model_version": version}
+    if created_at is not None:
+        doc["created_at"] = created_at
+    return doc
+
+
+def test_writer_increments_rollups_in_the_same_commit(fake_db):
+    writer = FirestoreWriter(db_factory=lambda: fake_db, collection="inferences", flush_interval_ms=0, rollups=True)
+    docs = [_doc("positive", 0.95, 12.0), _doc("positive", 0.55, 40.0), _doc("negative", 0.81, 900.0, "1.1.0")]
+    for i, d in enumerate(docs):
+        writer.enqueue(f"id-{i}", d)
+    writer.drain(timeout=5)
+
+    rolled = [d for (col, _), d in fake_db.docs.items() if col == "inference_rollups"]
+    # 3 granularidades x 2 model_versions
+    assert len(rolled) == 6
+    hour = next(d for d in rolled if d["granularity"] == "hour" and d["model_version"] == "1.0.0")
+    assert hour["count"] == 2
+    assert hour["labels"] == {"positive": 2}
+    assert hour["score_hist"] == {"9": 1, "5": 1}
+    assert hour["latency_count"] == 2 and hour["latency_sum_ms"] == 52.0
+    minute = next(d for d in rolled if d["granularity"] == "minute" and d["model_version"] == "1.0.0")
+    assert minute["expire_at"] > minute["bucket_start"]
+    assert writer.stats()["docs_written"] == 3
+
+
+def test_summary_endpoint_reads_only_rollups(fake_db, monkeypatch):
+    monkeypatch.setenv("DASH_API_KEY", "dash-key")
+    now = datetime.now(timezone.utc)
+    for label, score, ms, ago in [("positive", 0.9, 10.0, 0), ("neutral", 0.6, 100.0, 0), ("negative", 0.7, 30.0, 3)]:
+        wb = fake_db.batch()
+        for rollup_id, data in rollups.rollup_writes([_doc(label, score, ms)], now - timedelta(hours=ago)):
+            wb.set(fake_db.collection("inference_rollups").document(rollup_id), data, merge=True)
+        wb.commit()
+
+    resp = client.get(
+        "/summary",
+        params={"granularity": "hour", "since": (now - timedelta(hours=2)).isoformat()},
+        headers={"X-API-Key": "dash-key"},
+    )
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["buckets"] == 1
+    totals = body["totals"]
+    assert totals["count"] == 2
+    assert totals["labels"] == {"positive": 1, "neutral": 1, "negative": 0}
+    assert totals["latency_ms"]["mean"] == 55.0
+    assert totals["latency_ms"]["p50"] == 10.0 and totals["latency_ms"]["p99"] == 100.0
+
+    daily = client.get("/summary", params={"granularity": "day"}, headers={"X-API-Key": "dash-key"}).json()
+    assert daily["totals"]["count"] == 3
+
+
+def test_summary_rejects_ranges_with_too_many_buckets(monkeypatch):
+    monkeypatch.setenv("DASH_API_KEY", "dash-key")
+    params = {"granularity": "minute", "since": "2020-01-01T00:00:00Z", "until": "2026-01-01T00:00:00Z"}
+    assert client.get("/summary", params=params, headers={"X-API-Key": "dash-key"}).status_code == 400
+
+
+def test_rollups_bucket_by_created_at_not_flush_time(fake_db):
+    # predição às 10:59:50, commit (fila/retentativa/drain) já na hora seguinte
+    created_at = datetime(2026, 3, 1, 10, 59, 50, tzinfo=timezone.utc)
+    flushed_at = datetime(2026, 3, 1, 11, 0, 5, tzinfo=timezone.utc)
+    writes = dict(rollups.rollup_writes([_doc("positive", 0.9, 10.0, created_at=created_at)], flushed_at))
+
+    starts = sorted((d["granularity"], d["bucket_start"]) for d in writes.values())
+    assert starts == [
+        ("day", datetime(2026, 3, 1, tzinfo=timezone.utc)),
+        ("hour", datetime(2026, 3, 1, 10, tzinfo=timezone.utc)),
+        ("minute", datetime(2026, 3, 1, 10, 59, tzinfo=timezone.utc)),
+    ]
+
+
+def test_writer_buckets_late_flushes_with_the_inference_time(fake_db):
+    writer = FirestoreWriter(db_factory=lambda: fake_db, collection="inferences", flush_interval_ms=0, rollups=True)
+    created_at = datetime.now(timezone.utc) - timedelta(hours=2)
+    writer.enqueue("late", _doc("negative", 0.8, 20.0, created_at=created_at))
+    writer.drain(timeout=5)
+
+    hour = next(d for (col, _), d in fake_db.docs.items() if col == "inference_rollups" and d["granularity"] == "hour")
+    assert hour["bucket_start"] == rollups.bucket_start(created_at, "hour")
+
+
+def test_split_batch_retries_only_the_failed_group(fake_db, monkeypatch):
+    commits = []
+    batch_cls = type(fake_db.batch())
+    real_commit = batch_cls.commit
+
+    def _flaky_commit(self):
+        commits.append(len(self._ops))
+        if len(commits) == 2:
+            raise RuntimeError("deadline exceeded")
+        real_commit(self)
+
+    monkeypatch.setattr(batch_cls, "commit", _flaky_commit)
+    writer = FirestoreWriter(
+        db_factory=lambda: fake_db, collection="inferences", flush_interval_ms=10_000, retry_backoff_ms=0, rollups=True
+    )
+    # uma model_version por doc: 200 docs + 600 incrementos não cabem num commit
+    for i in range(200):
+        writer.enqueue(f"id-{i}", _doc("positive", 0.9, 10.0, version=f"v{i}"))
+    writer.drain(timeout=5)
+
+    assert all(n <= 500 for n in commits) and len(commits) == 3
+    daily = [d for (col, _), d in fake_db.docs.items() if col == "inference_rollups" and d["granularity"] == "day"]
+    assert len(daily) == 200
+    assert all(d["count"] == 1 for d in daily)
+    assert writer.stats()["docs_written"] == 200 and writer.stats()["retries_total"] == 1
+
+
+def test_commit_applied_before_the_error_is_not_resent(fake_db, monkeypatch):
+    commits = []
+    batch_cls = type(fake_db.batch())
+    real_commit = batch_cls.commit
+
+    def _deadline_after_apply(self):
+        # o servidor aplicou, mas o cliente estourou o deadline antes da resposta
+        commits.append(len(self._ops))
+        real_commit(self)
+        if len(commits) == 1:
+            raise RuntimeError("deadline exceeded")
+
+    monkeypatch.setattr(batch_cls, "commit", _deadline_after_apply)
+    writer = FirestoreWriter(
+        db_factory=lambda: fake_db, collection="inferences", flush_interval_ms=10_000, retry_backoff_ms=0, rollups=True
+    )
+    writer.enqueue("a", _doc("positive", 0.9, 10.0))
+    writer.enqueue("b", _doc("negative", 0.2, 20.0))
+    writer.drain(timeout=5)
+
+    assert len(commits) == 1
+    daily = next(d for (col, _), d in fake_db.docs.items() if col == "inference_rollups" and d["granularity"] == "day")
+    assert daily["count"] == 2
+    stats = writer.stats()
+    assert stats["commits_recovered"] == 1 and stats["docs_written"] == 2 and stats["docs_failed"] == 0
@@ -0,0 +1,38 @@
+import pytest
+
+from app.safetensors_mmap import SAFETENSORS_FILE, has_safetensors, load_model_mmap
+
+
+@pytest.mark.parametrize("tiny_bert_dir", [{}, {"num_hidden_layers": 1, "hidden_size": 16}], indirect=True)
+def test_mmap_round_trip_matches_the_saved_model(tiny_bert_dir):
+    import torch
+    from transformers import AutoModelForSequenceClassification
+
+    model_dir = str(tiny_bert_dir)
+    assert has_safetensors(model_dir)
+    reference = AutoModelForSequenceClassification.from_pretrained(model_dir).eval()
+    model = load_model_mmap(model_dir)
+
+    input_ids = torch.tensor([[2, 5, 6, 7, 3], [2, 10, 3, 0, 0]])
+    attention_mask = torch.tensor([[1, 1, 1, 1, 1], [1, 1, 1, 0, 0]])
+    with torch.inference_mode():
+        expected = reference(input_ids=input_ids, attention_mask=attention_mask).logits
+        got = model(input_ids=input_ids, attention_mask=attention_mask).logits
+    torch.testing.assert_close(got, expected)
+
+
+@pytest.mark.parametrize("change", ["drop", "extra"])
+def test_mismatched_checkpoint_is_rejected(tiny_bert_dir, change):
+    import torch
+    from safetensors.torch import load_file, save_file
+
+    path = tiny_bert_dir / SAFETENSORS_FILE
+    state = load_file(str(path))
+    if change == "drop":
+        state.pop("classifier.weight")
+    else:
+        state["classifier.extra"] = torch.zeros(3)
+    save_file(state, str(path), metadata={"format": "pt"})
+
+    with pytest.raises(RuntimeError, match="safetensors incompatível"):
+        load_model_mmap(str(tiny_bert_dir))
@@ -0,0 +1,102 @@
+import csv
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from app import utils
+from app.config import settings
+from training import score_batch
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _predict_in_worker(texts, batch_size=32):
+    # nível de módulo: precisa ser picklável para ir ao pool de processos
+    return [("positive" if "good" in t else "negative", 0.5, 1.0, 1.0) for t in texts]
+
+
+@pytest.fixture
+def fake_model(monkeypatch):
+    calls = []
+
+    def _predict_many(texts, batch_size=32):
+        calls.append(list(texts))
+        if len(calls) == 2 and _predict_many.fail_on_second:
+            raise RuntimeError("worker morreu")
+        return [("positive" if "good" in t else "negative", 0.912345678, 1.0, 1.0) for t in texts]
+
+    _predict_many.fail_on_second = False
+    monkeypatch.setattr(utils, "load_model", lambda: object())
+    monkeypatch.setattr(utils, "predict_many", _predict_many)
+    return _predict_many, calls
+
+
+def _write_jsonl(path, rows):
+    path.write_text("".join(json.dumps(r) + "\n" for r in rows), encoding="utf-8")
+
+
+def test_resumes_from_checkpoint_without_duplicates(tmp_path, fake_model):
+    predict_many, calls = fake_model
+    src, out = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+    _write_jsonl(src, [{"id": i, "text": f"good {i}" if i % 2 else f"bad {i}"} for i in range(5)])
+
+    predict_many.fail_on_second = True
+    with pytest.raises(RuntimeError):
+        score_batch.score_file(str(src), str(out), chunk_size=2)
+    assert json.loads((tmp_path / "out.jsonl.ckpt").read_text())["rows_done"] == 2
+
+    predict_many.fail_on_second = False
+    summary = score_batch.score_file(str(src), str(out), chunk_size=2)
+    assert summary["rows_done"] == 5 and summary["rows_scored"] == 3
+    # a segunda rodada começa na linha 2
+    assert calls[2] == ["bad 2", "good 3"]
+
+    rows = [json.loads(line) for line in out.read_text().splitlines()]
+    assert [r["id"] for r in rows] == [0, 1, 2, 3, 4]
+    assert rows[1]["label"] == "positive" and rows[0]["label"] == "negative"
+    # mesmo arredondamento do /predict
+    assert rows[0]["score"] == 0.91235
+
+
+def test_csv_output_and_empty_text(tmp_path, fake_model):
+    src, out = tmp_path / "in.csv", tmp_path / "out.csv"
+    with open(src, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=["id", "body"])
+        writer.writeheader()
+        writer.writerows([{"id": "a", "body": "good stuff"}, {"id": "b", "body": ""}, {"id": "c", "body": "meh"}])
+
+    score_batch.score_file(str(src), str(out), text_field="body", chunk_size=2)
+
+    with open(out, newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    assert [r["id"] for r in rows] == ["a", "b", "c"]
+    assert rows[0]["label"] == "positive"
+    assert rows[1]["label"] == "" and rows[1]["error"] == "texto vazio"
+
+
+def test_workers_use_the_pool_without_touching_settings(tmp_path, monkeypatch):
+    if not hasattr(os, "fork"):
+        pytest.skip("--workers precisa de fork")
+    monkeypatch.setattr(utils, "load_model", lambda: object())
+    monkeypatch.setattr(utils, "predict_many", _predict_in_worker)
+    before = (settings.serving_mode, settings.process_workers, settings.warmup_enabled)
+
+    src, out = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+    _write_jsonl(src, [{"id": i, "text": f"good {i}" if i % 2 else f"bad {i}"} for i in range(6)])
+    summary = score_batch.score_file(str(src), str(out), chunk_size=2, workers=2)
+
+    rows = [json.loads(line) for line in out.read_text().splitlines()]
+    assert summary["rows_scored"] == 6
+    assert [r["id"] for r in rows] == list(range(6))
+    assert [r["label"] for r in rows] == ["negative", "positive"] * 3
+    assert (settings.serving_mode, settings.process_workers, settings.warmup_enabled) == before
+
+
+def test_script_runs_from_the_repo_root():
+    proc = subprocess.run(
+        [sys.executable, "training/score_batch.py", "--help"], cwd=ROOT, capture_output=True, text=True
+    )
+    assert proc.returncode == 0, proc.stderr
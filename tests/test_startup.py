@@ -0,0 +1,76 @@
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main, startup, utils
+
+
+@pytest.fixture
+def fresh_startup_state(monkeypatch):
+    monkeypatch.setattr(
+        startup,
+        "_state",
+        {key: (False if key == "ready" else None) for key in startup._state},
+    )
+    monkeypatch.setattr(main.settings, "eager_load", True)
+    monkeypatch.setattr(main.settings, "warmup_enabled", True)
+
+
+def test_ready_only_after_load_and_warmup(fresh_startup_state, monkeypatch):
+    warmed = []
+    monkeypatch.setattr(utils, "load_model", lambda: object())
+    monkeypatch.setattr(utils, "model_load_time_ms", lambda: 123.0)
+
+    def _fake_warm_up(lengths, batch_sizes):
+        warmed.append((list(lengths), list(batch_sizes)))
+        time.sleep(0.01)
+        return 45.0
+
+    monkeypatch.setattr(utils, "warm_up", _fake_warm_up)
+
+    client = TestClient(main.app)
+    assert client.get("/ready").status_code == 503
+
+    with TestClient(main.app) as client:
+        r = client.get("/ready")
+        assert r.status_code == 200
+        data = r.json()
+        assert data["status"] == "ready"
+        assert data["model_load_ms"] == 123.0
+        assert data["warmup_ms"] == 45.0
+        assert warmed == [(main.settings.warmup_lengths, main.settings.warmup_batch_sizes)]
+
+
+def test_failed_load_keeps_service_alive_but_not_ready(fresh_startup_state, monkeypatch):
+    def _boom():
+        raise RuntimeError("Modelo não encontrado")
+
+    monkeypatch.setattr(utils, "load_model", _boom)
+
+    with TestClient(main.app) as client:
+        assert client.get("/health").status_code == 200
+        r = client.get("/ready")
+        assert r.status_code == 503
+        assert "Modelo não encontrado" in r.json()["error"]
+
+
+def test_background_startup_serves_health_while_loading(fresh_startup_state, monkeypatch):
+    monkeypatch.setattr(main.settings, "startup_mode", "background")
+    monkeypatch.setattr(main.settings, "warmup_enabled", False)
+    monkeypatch.setattr(utils, "model_load_time_ms", lambda: 300.0)
+
+    def _slow_load():
+        time.sleep(0.3)
+        return object()
+
+    monkeypatch.setattr(utils, "load_model", _slow_load)
+
+    with TestClient(main.app) as client:
+        assert client.get("/health").status_code == 200
+        assert client.get("/ready").status_code == 503
+
+        deadline = time.monotonic() + 5
+        while client.get("/ready").status_code != 200:
+            assert time.monotonic() < deadline
+            time.sleep(0.05)
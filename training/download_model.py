@@ -1,39 +1,84 @@
 """
 Script para pré-carregar o modelo durante build do Docker.
 Reduz cold start na primeira requisição.
+
+Salva o modelo "flat" em ./models (config.json, model.safetensors, tokenizer...),
+que é o formato lido por app/utils.load_model. Os pesos em safetensors são
+carregados via mmap: vários workers compartilham as mesmas páginas de memória.
+
+Uso:
+    python training/download_model.py              # baixa do Hugging Face
+    python training/download_model.py --convert    # converte ./models (pytorch_model.bin) para safetensors
 """
 
+import argparse
 import os
 from transformers import AutoTokenizer, AutoModelForSequenceClassification
 from app.logger import get_logger
 
 logger = get_logger(__name__)
 
-def download_model():
-    """Baixa e cacheia modelo do Hugging Face"""
-    model_name = "cardiffnlp/twitter-roberta-base-sentiment-latest"
-    cache_dir = "./models"
-    
+MODEL_NAME = "cardiffnlp/twitter-roberta-base-sentiment-latest"
+MODEL_DIR = "./models"
+
+
+def download_model(model_name: str = MODEL_NAME, out_dir: str = MODEL_DIR):
+    """Baixa modelo do Hugging Face e salva em safetensors"""
     try:
         logger.info(f"📥 Baixando modelo: {model_name}")
-        
+
         # Criar diretório se não existir
-        os.makedirs(cache_dir, exist_ok=True)
-        
+        os.makedirs(out_dir, exist_ok=True)
+
         # Baixar tokenizer
         logger.info("Baixando tokenizer...")
-        tokenizer = AutoTokenizer.from_pretrained(model_name, cache_dir=cache_dir)
-        
+        tokenizer = AutoTokenizer.from_pretrained(model_name)
+
         # Baixar modelo
         logger.info("Baixando modelo...")
-        model = AutoModelForSequenceClassification.from_pretrained(model_name, cache_dir=cache_dir)
-        
+        model = AutoModelForSequenceClassification.from_pretrained(model_name)
+
+        logger.info(f"Salvando em {out_dir} (safetensors)...")
+        tokenizer.save_pretrained(out_dir)
+        model.save_pretrained(out_dir, safe_serialization=True)
+
         logger.info("✅ Modelo baixado com sucesso!")
         return True
-        
+
     except Exception as e:
         logger.error(f"❌ Erro ao baixar modelo: {e}", exc_info=True)
         return False
 
+
+def convert_to_safetensors(model_dir: str = MODEL_DIR, remove_bin: bool = False):
+    """Converte um modelo local em pytorch_model.bin para model.safetensors"""
+    try:
+        logger.info(f"🔁 Convertendo {model_dir} para safetensors...")
+        model = AutoModelForSequenceClassification.from_pretrained(model_dir)
+        model.save_pretrained(model_dir, safe_serialization=True)
+
+        bin_path = os.path.join(model_dir, "pytorch_model.bin")
+        if remove_bin and os.path.exists(bin_path):
+            os.remove(bin_path)
+            logger.info("pytorch_model.bin removido")
+
+        logger.info("✅ Conversão concluída!")
+        return True
+
+    except Exception as e:
+        logger.error(f"❌ Erro ao converter modelo: {e}", exc_info=True)
+        return False
+
+
 if __name__ == "__main__":
-    download_model()
+    parser = argparse.ArgumentParser(description="Baixa/converte o modelo para ./models")
+    parser.add_argument("--model-name", default=MODEL_NAME)
+    parser.add_argument("--out-dir", default=MODEL_DIR)
+    parser.add_argument("--convert", action="store_true", help="Converte o modelo local para safetensors")
+    parser.add_argument("--remove-bin", action="store_true", help="Com --convert, apaga o pytorch_model.bin")
+    args = parser.parse_args()
+
+    if args.convert:
+        convert_to_safetensors(args.out_dir, remove_bin=args.remove_bin)
+    else:
+        download_model(args.model_name, args.out_dir)
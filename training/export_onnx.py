@@ -0,0 +1,171 @@
+"""
+Exporta o modelo local (./models) para ONNX e gera a versão INT8 (quantização dinâmica).
+
+Uso:
+    python training/export_onnx.py                 # exporta + quantiza + checa drift
+    python training/export_onnx.py --check-only    # só compara torch x ONNX
+
+Depois, rode a API com MODEL_BACKEND=onnx ou MODEL_BACKEND=onnx-int8.
+"""
+
+import argparse
+import os
+import sys
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from app.logger import get_logger  # noqa: E402
+from app.onnx_backend import ONNX_SUBDIR, OnnxSentimentPipeline, onnx_model_path, softmax  # noqa: E402
+
+logger = get_logger(__name__)
+
+# Amostra fixa para o check de drift (labels e scores torch x ONNX)
+SAMPLE_TEXTS = [
+    "I love this, it's amazing!",
+    "Terrible product. Would not recommend.",
+    "The sky is blue.",
+    "Worst customer service I've ever had, never again 😡",
+    "Not bad at all, actually pretty good",
+    "Meeting moved to 3pm tomorrow.",
+    "This update broke everything. Thanks a lot...",
+    "Can't wait for the weekend!!! 🎉",
+    "I'm not sure how I feel about the new logo",
+    "The match ended 1-1 after extra time.",
+    "Absolutely disgusting behaviour from the referee",
+    "Best concert of my life, the crowd was insane",
+    "@user lol yeah sure, whatever you say",
+    "Prices went up again this month.",
+    "so proud of my team today ❤️",
+    "meh",
+]
+
+
+def export_onnx(model_dir: str, opset: int = 17) -> str:
+    import torch
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+    out_path = onnx_model_path(model_dir)
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+
+    logger.info(f"Exportando {model_dir} -> {out_path}")
+    tokenizer = AutoTokenizer.from_pretrained(model_dir)
+    model = AutoModelForSequenceClassification.from_pretrained(model_dir)
+    model.eval()
+
+    dummy = tokenizer(["exemplo de entrada", "outra"], padding=True, return_tensors="pt")
+    with torch.inference_mode():
+        torch.onnx.export(
+            model,
+            (dummy["input_ids"], dummy["attention_mask"]),
+            out_path,
+            input_names=["input_ids", "attention_mask"],
+            output_names=["logits"],
+            dynamic_axes={
+                "input_ids": {0: "batch", 1: "sequence"},
+                "attention_mask": {0: "batch", 1: "sequence"},
+                "logits": {0: "batch"},
+            },
+            opset_version=opset,
+            do_constant_folding=True,
+            dynamo=False,  # exportador TorchScript: grafo único, eixos dinâmicos estáveis
+        )
+    logger.info("✅ ONNX exportado")
+    return out_path
+
+
+def quantize_int8(model_dir: str) -> str:
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    src = onnx_model_path(model_dir)
+    dst = onnx_model_path(model_dir, quantized=True)
+    logger.info(f"Quantizando (INT8 dinâmico) {src} -> {dst}")
+    quantize_dynamic(src, dst, weight_type=QuantType.QInt8)
+    logger.info("✅ ONNX INT8 gerado")
+    return dst
+
+
+def _torch_probs(model_dir: str, texts: list[str]) -> tuple[np.ndarray, dict]:
+    import torch
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+    tokenizer = AutoTokenizer.from_pretrained(model_dir)
+    model = AutoModelForSequenceClassification.from_pretrained(model_dir)
+    model.eval()
+    batch = tokenizer(texts, padding=True, truncation=True, max_length=512, return_tensors="pt")
+    with torch.inference_mode():
+        logits = model(**batch).logits.float().numpy()
+    return softmax(logits), model.config.id2label
+
+
+def check_drift(model_dir: str, onnx_path: str, texts: list[str] = SAMPLE_TEXTS) -> dict:
+    """Compara torch x ONNX: concordância de label e diferença máxima de probabilidade."""
+    ref_probs, id2label = _torch_probs(model_dir, texts)
+
+    pipe = OnnxSentimentPipeline(onnx_path, model_dir)
+    enc = pipe.tokenizer(texts, truncation=True, max_length=512)
+    features = [
+        {"input_ids": ids, "attention_mask": mask}
+        for ids, mask in zip(enc["input_ids"], enc["attention_mask"])
+    ]
+    probs = softmax(pipe.logits(features))
+
+    ref_labels = ref_probs.argmax(axis=-1)
+    labels = probs.argmax(axis=-1)
+    agreement = float((ref_labels == labels).mean())
+    max_abs_diff = float(np.abs(ref_probs - probs).max())
+
+    mismatches = [
+        {"text": t, "torch": id2label[int(a)], "onnx": id2label[int(b)]}
+        for t, a, b in zip(texts, ref_labels, labels)
+        if a != b
+    ]
+    return {
+        "model": os.path.basename(onnx_path),
+        "samples": len(texts),
+        "label_agreement": agreement,
+        "max_abs_prob_diff": max_abs_diff,
+        "mismatches": mismatches,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Exporta o modelo para ONNX / ONNX INT8")
+    parser.add_argument("--model-dir", default=os.getenv("MODEL_LOCAL_PATH", "./models"))
+    parser.add_argument("--opset", type=int, default=17)
+    parser.add_argument("--no-quantize", action="store_true", help="Não gera a versão INT8")
+    parser.add_argument("--check-only", action="store_true", help="Só roda o check de drift")
+    parser.add_argument("--min-agreement", type=float, default=0.9, help="Concordância mínima de labels (INT8)")
+    parser.add_argument("--max-prob-diff", type=float, default=1e-3, help="Diferença máxima de prob. (fp32)")
+    args = parser.parse_args(argv)
+
+    if not args.check_only:
+        export_onnx(args.model_dir, opset=args.opset)
+        if not args.no_quantize:
+            quantize_int8(args.model_dir)
+
+    ok = True
+    for quantized in (False, True):
+        path = onnx_model_path(args.model_dir, quantized=quantized)
+        if not os.path.exists(path):
+            continue
+        report = check_drift(args.model_dir, path)
+        logger.info(f"Drift {report['model']}: {report}")
+
+        if quantized:
+            # INT8 muda scores um pouco; o que importa é o label
+            passed = report["label_agreement"] >= args.min_agreement
+        else:
+            passed = report["label_agreement"] == 1.0 and report["max_abs_prob_diff"] <= args.max_prob_diff
+        if not passed:
+            logger.error(f"❌ Drift acima do limite em {report['model']}")
+            ok = False
+
+    logger.info(f"Arquivos em {os.path.join(args.model_dir, ONNX_SUBDIR)}")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,280 @@
+"""
+Pontuação offline (sem HTTP) de arquivos JSONL/CSV/Parquet com o mesmo modelo da API.
+
+Lê o arquivo em streaming, manda blocos de --chunk-size linhas para
+app.utils.predict_many (mesma tokenização, forward pass e mapeamento de
+labels do /predict) e grava cada bloco na saída assim que fica pronto.
+
+Com --workers > 1, os blocos rodam no pool de processos da API
+(app/process_pool.py, fork depois da carga: os pesos ficam compartilhados),
+com os cores divididos entre os processos. A saída sai na ordem da entrada.
+
+Retomada: depois de cada bloco gravado, <saída>.ckpt guarda quantas linhas da
+entrada já foram processadas e o tamanho da saída. Rodando de novo com o mesmo
+comando, a saída é truncada no último checkpoint e a leitura pula essas linhas.
+
+Uso:
+    python training/score_batch.py tweets.jsonl scored.jsonl
+    python training/score_batch.py tweets.csv scored.csv --text-field body --workers 4
+    python training/score_batch.py dump.parquet scored.jsonl --chunk-size 4096   # precisa de pyarrow
+    python training/score_batch.py tweets.jsonl scored.jsonl --restart            # ignora o checkpoint
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from collections import deque
+from itertools import islice
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from app.logger import get_logger  # noqa: E402
+
+logger = get_logger(__name__)
+
+INPUT_FORMATS = ("jsonl", "csv", "parquet")
+OUTPUT_FORMATS = ("jsonl", "csv")
+RESULT_FIELDS = ("label", "score", "model_version", "error")
+
+
+def detect_format(path: str) -> str:
+    ext = os.path.splitext(path)[1].lower().lstrip(".")
+    if ext in ("jsonl", "ndjson"):
+        return "jsonl"
+    if ext in ("csv", "parquet"):
+        return ext
+    raise ValueError(f"Formato não reconhecido pela extensão: {path} (use .jsonl, .csv ou .parquet)")
+
+
+def read_rows(path: str, fmt: str):
+    """Gera as linhas da entrada como dicts, na ordem do arquivo."""
+    if fmt == "jsonl":
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    elif fmt == "csv":
+        with open(path, encoding="utf-8", newline="") as f:
+            yield from csv.DictReader(f)
+    elif fmt == "parquet":
+        try:
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise RuntimeError("Leitura de Parquet precisa do pyarrow (pip install pyarrow)") from e
+        for batch in pq.ParquetFile(path).iter_batches():
+            yield from batch.to_pylist()
+    else:
+        raise ValueError(f"Formato de entrada inválido: {fmt}")
+
+
+def _chunks(rows, size: int):
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+# ---------------------------------------------------------------- checkpoint
+
+def checkpoint_path(output: str) -> str:
+    return output + ".ckpt"
+
+
+def load_checkpoint(output: str, input_path: str) -> dict | None:
+    path = checkpoint_path(output)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        ckpt = json.load(f)
+    if ckpt.get("input") != os.path.abspath(input_path):
+        raise RuntimeError(f"{path} é de outra entrada ({ckpt.get('input')}); use --restart")
+    return ckpt
+
+
+def save_checkpoint(output: str, input_path: str, rows_done: int, output_bytes: int):
+    path = checkpoint_path(output)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"input": os.path.abspath(input_path), "rows_done": rows_done, "output_bytes": output_bytes}, f)
+    # troca atômica: um kill no meio não deixa checkpoint pela metade
+    os.replace(tmp, path)
+
+
+# ---------------------------------------------------------------- saída
+
+class _Writer:
+    def __init__(self, path: str, fmt: str, resume_bytes: int | None):
+        self.fmt = fmt
+        if resume_bytes is not None and os.path.exists(path):
+            self._file = open(path, "r+", encoding="utf-8", newline="")
+            # descarta o que foi escrito depois do último checkpoint
+            self._file.truncate(resume_bytes)
+            self._file.seek(resume_bytes)
+        else:
+            self._file = open(path, "w", encoding="utf-8", newline="")
+        self._fieldnames = None
+        if fmt == "csv" and resume_bytes:
+            with open(path, encoding="utf-8", newline="") as f:
+                self._fieldnames = next(csv.reader(f))
+
+    def write(self, rows: list[dict]):
+        if self.fmt == "jsonl":
+            for row in rows:
+                self._file.write(json.dumps(row, ensure_ascii=False) + "\n")
+        else:
+            if self._fieldnames is None:
+                self._fieldnames = [k for k in rows[0] if k not in RESULT_FIELDS] + list(RESULT_FIELDS)
+                csv.DictWriter(self._file, fieldnames=self._fieldnames).writeheader()
+            csv.DictWriter(self._file, fieldnames=self._fieldnames, extrasaction="ignore").writerows(rows)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def tell(self) -> int:
+        return self._file.tell()
+
+    def close(self):
+        self._file.close()
+
+
+# ---------------------------------------------------------------- pontuação
+
+def _score_chunk(rows: list[dict], text_field: str, batch_size: int, predict_fn) -> tuple[list[int], list]:
+    """Roda o modelo nas linhas com texto; retorna (índices, saídas de predict_many)."""
+    idx = [i for i, row in enumerate(rows) if isinstance(row.get(text_field), str) and row[text_field].strip()]
+    outputs = predict_fn([rows[i][text_field] for i in idx], batch_size) if idx else []
+    return idx, outputs
+
+
+def _merge(rows: list[dict], idx: list[int], outputs: list, model_version: str) -> list[dict]:
+    results = [
+        {**row, "label": None, "score": None, "model_version": model_version, "error": "texto vazio"} for row in rows
+    ]
+    for i, (label, score, _, _) in zip(idx, outputs):
+        # mesmo arredondamento do /predict
+        results[i].update(label=label, score=round(float(score), 5), error=None)
+    return results
+
+
+def score_file(
+    input_path: str,
+    output_path: str,
+    text_field: str = "text",
+    input_format: str | None = None,
+    output_format: str | None = None,
+    chunk_size: int = 1024,
+    batch_size: int = 64,
+    workers: int = 1,
+    restart: bool = False,
+) -> dict:
+    from app import utils
+    from app.config import settings
+
+    input_format = input_format or detect_format(input_path)
+    output_format = output_format or detect_format(output_path)
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Saída precisa ser {' ou '.join(OUTPUT_FORMATS)} (gravação incremental)")
+
+    ckpt = None if restart else load_checkpoint(output_path, input_path)
+    rows_done = ckpt["rows_done"] if ckpt else 0
+    if ckpt:
+        logger.info(f"Retomando de {checkpoint_path(output_path)}: {rows_done} linhas já processadas")
+
+    utils.load_model()
+    pool = None
+    if workers > 1:
+        from app import process_pool
+
+        # fork depois da carga; os cores são divididos entre os processos
+        process_pool.start_process_pool(workers=workers, warmup=False)
+        pool = process_pool.get_process_pool()
+
+    rows = read_rows(input_path, input_format)
+    for _ in islice(rows, rows_done):
+        pass
+
+    writer = _Writer(output_path, output_format, ckpt["output_bytes"] if ckpt else None)
+    model_version = settings.app_version
+    started = time.perf_counter()
+    scored = 0
+    pending: deque = deque()
+
+    def _drain_one():
+        nonlocal rows_done, scored
+        chunk, fut = pending.popleft()
+        idx, outputs = fut.result() if pool is not None else fut
+        writer.write(_merge(chunk, idx, outputs, model_version))
+        rows_done += len(chunk)
+        scored += len(chunk)
+        save_checkpoint(output_path, input_path, rows_done, writer.tell())
+        elapsed = time.perf_counter() - started
+        logger.info(f"{rows_done} linhas | {scored / elapsed:.1f} linhas/s")
+
+    try:
+        for chunk in _chunks(rows, max(1, chunk_size)):
+            if pool is None:
+                pending.append((chunk, _score_chunk(chunk, text_field, batch_size, utils.predict_many)))
+            else:
+                # mantém todos os processos ocupados sem ler o arquivo inteiro para a memória
+                pending.append((chunk, pool.submit(_score_chunk, chunk, text_field, batch_size, utils.predict_many)))
+            while len(pending) > (2 * workers if pool is not None else 0):
+                _drain_one()
+        while pending:
+            _drain_one()
+    finally:
+        writer.close()
+        if pool is not None:
+            from app import process_pool
+
+            process_pool.shutdown_process_pool(wait=False)
+
+    elapsed = time.perf_counter() - started
+    summary = {
+        "rows_done": rows_done,
+        "rows_scored": scored,
+        "seconds": elapsed,
+        "rows_per_s": scored / elapsed if elapsed > 0 else 0.0,
+    }
+    logger.info(f"✅ {scored} linhas em {elapsed:.1f} s ({summary['rows_per_s']:.1f} linhas/s) -> {output_path}")
+    return summary
+
+
+if __name__ == "__main__":
+    from app.process_pool import available_cores
+
+    parser = argparse.ArgumentParser(description="Pontua um arquivo JSONL/CSV/Parquet com o modelo da API")
+    parser.add_argument("input")
+    parser.add_argument("output")
+    parser.add_argument("--text-field", default="text")
+    parser.add_argument("--input-format", choices=INPUT_FORMATS, help="Default: pela extensão")
+    parser.add_argument("--output-format", choices=OUTPUT_FORMATS, help="Default: pela extensão")
+    parser.add_argument("--chunk-size", type=int, default=1024, help="Linhas por bloco (unidade de checkpoint)")
+    parser.add_argument("--batch-size", type=int, default=64, help="Textos por forward pass")
+    parser.add_argument("--workers", type=int, default=available_cores(), help="Processos (default: um por core)")
+    parser.add_argument("--model-dir", help="Pasta do modelo (default: MODEL_LOCAL_PATH)")
+    parser.add_argument("--restart", action="store_true", help="Ignora o checkpoint e reescreve a saída")
+    args = parser.parse_args()
+
+    if args.model_dir:
+        # antes do import de app.utils (LOCAL_DIR é lido no import)
+        os.environ["MODEL_LOCAL_PATH"] = args.model_dir
+
+    try:
+        score_file(
+            args.input,
+            args.output,
+            text_field=args.text_field,
+            input_format=args.input_format,
+            output_format=args.output_format,
+            chunk_size=args.chunk_size,
+            batch_size=args.batch_size,
+            workers=max(1, args.workers),
+            restart=args.restart,
+        )
+    except Exception as e:
+        logger.error(f"❌ Falha na pontuação: {e}", exc_info=True)
+        sys.exit(1)